@@ -8,6 +8,11 @@ from typing import Optional
 db = SQLAlchemy()
 migrate = Migrate()
 
+# AI服务会引用模型中的定义，需在 db 创建之后导入
+from app.services.ai.registry import AIClientRegistry  # noqa: E402
+
+ai_registry = AIClientRegistry()
+
 def nl2br(value: Optional[str]) -> str:
     """Convert newlines to <br> tags."""
     if not value:
@@ -18,18 +23,43 @@ def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
 
+    from app import database
+    from app.models import types as column_types
+    column_types.init_app(app)
+    database.configure_engine(app)
     db.init_app(app)
+    database.init_app(app)
     migrate.init_app(app, db)
+    ai_registry.init_app(app)
+
+    from app.queries import projects as project_queries
+    project_queries.init_app(app)
+
+    from app.services import search as search_index
+    search_index.init_app(app)
+
+    from app.services import revisions
+    revisions.init_app(app)
+
+    from app.services import blob_store
+    blob_store.init_app(app)
 
     # 注册自定义过滤器
     app.jinja_env.filters['nl2br'] = nl2br
 
-    from app.routes import main, project, outline, content, planning, concept
+    from app.routes import main, project, outline, content, planning, concept, jobs, search, creation, blobs
     app.register_blueprint(main.bp)
     app.register_blueprint(project.bp)
     app.register_blueprint(outline.bp)
     app.register_blueprint(content.bp)
     app.register_blueprint(planning.bp)
     app.register_blueprint(concept.bp)
+    app.register_blueprint(jobs.bp)
+    app.register_blueprint(search.bp)
+    app.register_blueprint(creation.bp)
+    app.register_blueprint(blobs.bp)
+
+    from app.cli import register_commands
+    register_commands(app)
 
     return app
\ No newline at end of file
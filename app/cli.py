@@ -0,0 +1,207 @@
+import time
+from typing import Optional
+
+import click
+from flask import Flask, current_app
+
+
+def register_commands(app: Flask) -> None:
+    """注册命令行工具"""
+
+    @app.cli.command('run-worker')
+    @click.option('--workers', default=2, show_default=True, help='工作线程数')
+    def run_worker(workers: int) -> None:
+        """在独立进程中执行后台生成任务"""
+        from app.services.job_queue import JobWorkerPool
+
+        pool = JobWorkerPool(current_app._get_current_object(), workers,  # type: ignore
+                             float(current_app.config.get('JOB_POLL_INTERVAL', 1.0)))
+        pool.start()
+        click.echo(f'任务工作进程已启动，工作线程数: {workers}')
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            click.echo('正在停止任务工作进程...')
+            pool.stop()
+
+    @app.cli.command('search-reindex')
+    @click.option('--project', 'project_id', type=int, help='只重建指定项目')
+    def search_reindex(project_id: Optional[int]) -> None:
+        """重建全文搜索索引（更换分词器或批量写入数据后执行）"""
+        from app import db
+        from app.services import search
+
+        count = search.rebuild_index(project_id)
+        db.session.commit()
+        click.echo(f'全文搜索索引已重建，共 {count} 个片段')
+
+    @app.cli.command('revisions-compact')
+    @click.option('--content', 'content_id', type=int, help='只合并指定正文')
+    @click.option('--days', type=int, help='合并多少天前的修订，默认为 REVISION_COMPACT_AFTER_DAYS')
+    def revisions_compact(content_id: Optional[int], days: Optional[int]) -> None:
+        """合并旧的正文修订，每个时间段只保留最后一条"""
+        from datetime import datetime, timedelta
+
+        from app import db
+        from app.services import revisions
+
+        before = datetime.utcnow() - timedelta(days=days) if days is not None else None
+        if content_id is not None:
+            removed = revisions.compact(content_id, before)
+            db.session.commit()
+        else:
+            removed = revisions.compact_all(before)
+        click.echo(f'已合并 {removed} 条修订')
+
+    @app.cli.command('blobs-gc')
+    @click.option('--grace-hours', type=int, help='没有引用的文件至少保留的小时数，默认为 BLOB_GC_GRACE_HOURS')
+    def blobs_gc(grace_hours: Optional[int]) -> None:
+        """删除没有素材引用的文件、过期的分块上传和存储目录中没有记录的文件"""
+        from datetime import timedelta
+
+        from app.services import blob_store
+
+        grace = timedelta(hours=grace_hours) if grace_hours is not None else None
+        removed = blob_store.collect_garbage(grace)
+        click.echo(f"删除文件 {removed['blobs']} 个（{removed['bytes'] / 1024 / 1024:.1f}MB），"
+                   f"过期上传 {removed['uploads']} 个，没有记录的文件 {removed['orphans']} 个")
+
+    @app.cli.command('blobs-import-legacy')
+    def blobs_import_legacy() -> None:
+        """把旧的平铺上传文件移入按内容寻址的存储（相同文件只保留一份）"""
+        import os
+
+        from app import db
+        from app.models.creation import InspirationMaterial
+        from app.services import blob_store
+
+        upload_folder = str(current_app.config['UPLOAD_FOLDER'])
+        before = blob_store.disk_usage(upload_folder)
+        imported, missing = 0, 0
+        materials = InspirationMaterial.query.filter(InspirationMaterial.blob_id.is_(None),
+                                                     InspirationMaterial.file_path.isnot(None)).all()
+        for material in materials:
+            path = os.path.join(upload_folder, material.file_path)
+            if not os.path.isfile(path):
+                missing += 1
+                continue
+            material.blob_id = blob_store.import_legacy_file(path, material.file_type).id
+            db.session.commit()
+            # 提交之后再删除原文件，中途失败时可以重新执行
+            os.remove(path)
+            imported += 1
+        after = blob_store.disk_usage(upload_folder)
+        click.echo(f'已导入 {imported} 个文件，缺少 {missing} 个；'
+                   f'上传目录 {before / 1024 / 1024:.1f}MB -> {after / 1024 / 1024:.1f}MB')
+
+    @app.cli.command('materials-derivatives')
+    @click.option('--all', 'process_all', is_flag=True, help='包括已生成的素材（安装 Pillow/PyMuPDF 或修改尺寸后使用）')
+    @click.option('--batch-size', default=200, show_default=True, help='每批提交给进程池的文件数')
+    def materials_derivatives(process_all: bool, batch_size: int) -> None:
+        """为素材生成缩略图、预览图和文本（补齐旧素材或失败的素材）"""
+        from app import db
+        from app.models import Blob
+        from app.models.creation import InspirationMaterial
+        from app.services import derivatives
+
+        query = db.select(InspirationMaterial.blob_id).filter(InspirationMaterial.blob_id.isnot(None))
+        if not process_all:
+            query = query.filter(db.or_(InspirationMaterial.derivative_status.is_(None),
+                                        InspirationMaterial.derivative_status != 'ready'))
+        blob_ids = db.session.execute(query.distinct()).scalars().all()
+
+        totals = {'ready': 0, 'incomplete': 0, 'failed': 0}
+        skipped = 0
+        try:
+            for start in range(0, len(blob_ids), batch_size):
+                blobs = Blob.query.filter(Blob.id.in_(blob_ids[start:start + batch_size])).all()
+                supported = [blob for blob in blobs if derivatives.supported(blob.content_type)]
+                skipped += len(blobs) - len(supported)
+                for status, count in derivatives.process_all(supported).items():
+                    totals[status] += count
+        finally:
+            derivatives.shutdown()
+        click.echo(f"完成 {totals['ready']} 个，缺少依赖 {totals['incomplete']} 个，"
+                   f"失败 {totals['failed']} 个，不支持的类型 {skipped} 个")
+
+    @app.cli.command('export')
+    @click.argument('project_id', type=int)
+    @click.argument('output', type=click.Path(dir_okay=False, allow_dash=True))
+    @click.option('--format', 'fmt', type=click.Choice(['epub', 'md', 'txt']),
+                  help='导出格式，默认按 OUTPUT 的扩展名')
+    @click.option('--settings', 'include_settings', is_flag=True, help='附上项目设定')
+    @click.option('--concept', 'include_concept', is_flag=True, help='附上作品构思')
+    def export_project(project_id: int, output: str, fmt: Optional[str],
+                       include_settings: bool, include_concept: bool) -> None:
+        """导出书稿为 EPUB、Markdown 或纯文本（OUTPUT 为 - 时写到标准输出）"""
+        import os
+
+        from app import db
+        from app.models import Project
+        from app.services import export
+
+        fmt = fmt or os.path.splitext(output)[1].lstrip('.').lower()
+        if fmt not in export.FORMATS:
+            raise click.UsageError('无法从文件名判断导出格式，请指定 --format')
+        project = db.session.get(Project, project_id)
+        if project is None:
+            raise click.ClickException(f'项目不存在: {project_id}')
+        size = 0
+        with click.open_file(output, 'wb') as f:
+            for chunk in export.export(project, fmt, include_settings, include_concept):
+                f.write(chunk)
+                size += len(chunk)
+        if output != '-':
+            click.echo(f'已导出到 {output}（{size / 1024:.0f}KB）')
+
+    @app.cli.command('import-manuscript')
+    @click.argument('project_id', type=int)
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'fmt', type=click.Choice(['txt', 'md', 'docx']), help='文件格式，默认按扩展名')
+    def import_manuscript(project_id: int, path: str, fmt: Optional[str]) -> None:
+        """导入书稿：按章节标题拆分为纲要和正文，批量写入（整个导入在一个事务中）"""
+        from app import db
+        from app.models import Project
+        from app.services import importer
+
+        if db.session.get(Project, project_id) is None:
+            raise click.ClickException(f'项目不存在: {project_id}')
+        started = time.perf_counter()
+        try:
+            with open(path, 'rb') as f:
+                result = importer.import_manuscript(project_id, f, fmt or importer.detect_format(path))
+        except importer.InvalidManuscript as e:
+            db.session.rollback()
+            raise click.ClickException(str(e))
+        db.session.commit()
+        click.echo(f'已导入 {result.outlines} 个纲要、{result.contents} 段正文，共 {result.characters} 字，'
+                   f'用时 {time.perf_counter() - started:.1f} 秒')
+
+    @app.cli.command('compress-text')
+    @click.option('--decompress', is_flag=True, help='还原为未压缩的文本')
+    @click.option('--batch-size', default=500, show_default=True, help='每批处理的行数')
+    def compress_text(decompress: bool, batch_size: int) -> None:
+        """按当前 COMPRESSION_* 配置转换已有的长文本（每批提交一次）"""
+        from app import db
+        from app.models.types import compressed_columns, convert_rows
+
+        with db.engine.connect() as connection:
+            for table, columns in compressed_columns().items():
+                changed = convert_rows(connection, table, columns, compressed=not decompress,
+                                       batch_size=batch_size, after_batch=connection.commit)
+                click.echo(f'{table}: 转换 {changed} 行')
+        click.echo('数据库文件不会自动缩小，可执行 VACUUM 回收空间')
+
+    @app.cli.command('compress-train-dict')
+    @click.argument('output')
+    @click.option('--size', default=112640, show_default=True, help='字典大小（字节）')
+    @click.option('--samples', default=5000, show_default=True, help='最多使用的样本数')
+    def compress_train_dict(output: str, size: int, samples: int) -> None:
+        """用已有的正文和构思训练 zstd 字典（需要安装 zstandard）"""
+        from app.models.types import train_dictionary
+
+        dictionary = train_dictionary(size, samples)
+        with open(output, 'wb') as f:
+            f.write(dictionary)
+        click.echo(f'字典已写入 {output}（{len(dictionary)} 字节），设置 COMPRESSION_ZSTD_DICT 后使用 zstd-dict 压缩')
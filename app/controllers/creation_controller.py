@@ -1,6 +1,11 @@
+from flask import current_app
 from app.services.ai_assistant import AIAssistant
+from app.services.book_pipeline import BookPipeline, PipelineError
+from app.services import derivatives
+from app.models import Outline
 from app.models.creation import Inspiration, CreativeIdea
-from typing import List, Optional
+from app.models.planning import BasicConcept
+from typing import Any, Dict, List, Optional
 from typing_extensions import TypedDict
 
 class IdeaData(TypedDict, total=False):
@@ -19,8 +24,12 @@ class CreationController:
         if not inspiration:
             return []
 
-        # 调用AI助手生成创意
-        result: Optional[List[IdeaData]] = await self.ai_assistant.generate_creative_ideas(inspiration)
+        # 调用AI助手生成创意；附带素材中提取的文本作为上下文
+        content: str = inspiration.content or ''
+        context: str = derivatives.prompt_context(inspiration.id)
+        if context:
+            content = f"{content}\n\n参考素材：\n{context}"
+        result: Optional[List[IdeaData]] = await self.ai_assistant.generate_creative_ideas(content)
         if not result:
             return []
 
@@ -49,27 +58,82 @@ class CreationController:
             return enhanced_concept
         return None
 
-    async def generate_full_outline(self, concept_id: int) -> Optional[str]:
-        """生成全文大纲"""
-        # TODO: 实现全文大纲生成逻辑
-        pass
+    def _pipeline(self, refresh: bool = False) -> BookPipeline:
+        return BookPipeline(self.ai_assistant, refresh=refresh)
 
-    async def generate_chapter_outlines(self, outline_id: int) -> Optional[List[str]]:
-        """生成章节大纲"""
-        # TODO: 实现章节大纲生成逻辑
-        pass
+    async def generate_full_outline(self, concept_id: int, refresh: bool = False) -> Optional[str]:
+        """生成全文大纲；refresh 为真时重新生成，不使用已有结果和AI响应缓存"""
+        concept: Optional[BasicConcept] = BasicConcept.query.get(concept_id)
+        if not concept:
+            return None
+        try:
+            outline = await self._pipeline(refresh).full_outline(concept)
+        except PipelineError as e:
+            current_app.logger.error(f"生成全文大纲失败: {str(e)}")
+            return None
+        return outline.content
 
-    async def generate_section_outlines(self, chapter_id: int) -> Optional[List[str]]:
-        """生成分节大纲"""
-        # TODO: 实现分节大纲生成逻辑
-        pass
+    async def generate_chapter_outlines(self, outline_id: int, refresh: bool = False) -> Optional[List[str]]:
+        """生成章节大纲（各章并发生成，已生成的章节直接复用，refresh 为真时全部重新生成）"""
+        book: Optional[Outline] = Outline.query.get(outline_id)
+        if not book or book.level != 'book':
+            return None
+        pipeline = self._pipeline(refresh)
+        concept: Optional[BasicConcept] = BasicConcept.query.get(book.basic_concept_id) if book.basic_concept_id else None
+        chapter_count = (concept.estimated_chapters if concept else None) or pipeline.default_chapters
+        chapters: List[Outline] = await pipeline.gather([
+            pipeline.chapter_outline(book, n) for n in range(1, chapter_count + 1)
+        ])
+        if pipeline.failures:
+            return None
+        return [chapter.content for chapter in chapters]
 
-    async def generate_content_summary(self, section_id: int) -> Optional[str]:
-        """生成内容概要"""
-        # TODO: 实现内容概要生成逻辑
-        pass
+    async def generate_section_outlines(self, chapter_id: int, refresh: bool = False) -> Optional[List[str]]:
+        """生成分节大纲（各节并发生成，已生成的分节直接复用，refresh 为真时全部重新生成）"""
+        chapter: Optional[Outline] = Outline.query.get(chapter_id)
+        if not chapter or chapter.level != 'chapter':
+            return None
+        pipeline = self._pipeline(refresh)
+        sections: List[Outline] = await pipeline.gather([
+            pipeline.section_outline(chapter, n) for n in range(1, pipeline.sections_per_chapter + 1)
+        ])
+        if pipeline.failures:
+            return None
+        return [section.content for section in sections]
+
+    async def generate_content_summary(self, section_id: int, refresh: bool = False) -> Optional[str]:
+        """生成内容概要；refresh 为真时重新生成，不使用已有结果和AI响应缓存"""
+        section: Optional[Outline] = Outline.query.get(section_id)
+        if not section or section.level != 'section':
+            return None
+        try:
+            section = await self._pipeline(refresh).section_summary(section)
+        except PipelineError as e:
+            current_app.logger.error(f"生成内容概要失败: {str(e)}")
+            return None
+        return section.summary
 
     async def generate_final_content(self, summary_id: int) -> Optional[str]:
-        """生成最终内容"""
-        # TODO: 实现最终内容生成逻辑
-        pass
\ No newline at end of file
+        """生成最终内容；内容概要保存在分节大纲上，summary_id 即分节大纲的ID"""
+        section: Optional[Outline] = Outline.query.get(summary_id)
+        if not section or section.level != 'section':
+            return None
+        if not section.summary:
+            return None
+        try:
+            content = await self._pipeline().section_content(section)
+        except PipelineError as e:
+            current_app.logger.error(f"生成最终内容失败: {str(e)}")
+            return None
+        return content.content
+
+    async def generate_book(self, concept_id: int) -> Optional[Dict[str, Any]]:
+        """按 大纲 → 章节 → 分节 → 概要 → 正文 生成整本书，可在失败后重新调用以继续"""
+        concept: Optional[BasicConcept] = BasicConcept.query.get(concept_id)
+        if not concept:
+            return None
+        try:
+            return await self._pipeline().run(concept)
+        except PipelineError as e:
+            current_app.logger.error(f"整书生成失败: {str(e)}")
+            return None
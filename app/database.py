@@ -0,0 +1,67 @@
+"""数据库引擎配置
+
+按 DATABASE_ENGINE_PROFILE 选择 Config.DATABASE_ENGINE_PROFILES 中的一组配置：
+engine_options 在 db.init_app() 之前合并进 SQLALCHEMY_ENGINE_OPTIONS，
+pragmas 在每个 SQLite 连接建立时执行。
+"""
+from typing import Any, Dict
+
+from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+from app import db
+
+
+def resolve_profile(app: Flask) -> str:
+    """当前使用的配置名"""
+    name = app.config.get('DATABASE_ENGINE_PROFILE') or ''
+    if not name:
+        url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+        name = 'sqlite' if url.get_backend_name() == 'sqlite' else 'server'
+    if name not in app.config.get('DATABASE_ENGINE_PROFILES', {}):
+        raise ValueError(f'未知的数据库引擎配置: {name}')
+    return name
+
+
+def configure_engine(app: Flask) -> None:
+    """合并引擎选项，需在 db.init_app() 之前调用"""
+    profile = app.config['DATABASE_ENGINE_PROFILES'][resolve_profile(app)]
+    options: Dict[str, Any] = dict(profile.get('engine_options', {}))
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def init_app(app: Flask) -> None:
+    """为 SQLite 连接注册 PRAGMA，需在 db.init_app() 之后调用"""
+    name = resolve_profile(app)
+    pragmas = app.config['DATABASE_ENGINE_PROFILES'][name].get('pragmas')
+    app.extensions['database_engine_profile'] = name
+    if not pragmas:
+        return
+
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return
+    if engine.url.database in (None, '', ':memory:'):
+        # 内存数据库不支持 WAL，也没有跨连接的锁竞争
+        pragmas = {key: value for key, value in pragmas.items() if key != 'journal_mode'}
+    _listen_pragmas(engine, pragmas)
+
+
+def _listen_pragmas(engine: Engine, pragmas: Dict[str, Any]) -> None:
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for key, value in pragmas.items():
+                cursor.execute(f'PRAGMA {key}={value}')
+        finally:
+            cursor.close()
+
+
+def pragma_values(keys: Any) -> Dict[str, Any]:
+    """读取当前连接的 PRAGMA 值，用于检查配置是否生效"""
+    connection = db.session.connection()
+    return {key: connection.exec_driver_sql(f'PRAGMA {key}').scalar() for key in keys}
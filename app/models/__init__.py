@@ -3,6 +3,9 @@ from datetime import datetime
 
 # 导入规划模块的模型
 from .planning import InitialIdea, CreativeExpansion, BasicConcept
+from .job import GenerationJob
+from .blob import Blob, UploadSession
+from .types import CompressedText
 
 class Project(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -21,6 +24,10 @@ class Project(db.Model):
     basic_concepts = db.relationship('BasicConcept', backref='project', lazy=True)
 
 class Setting(db.Model):
+    __table_args__ = (
+        db.Index('ix_setting_project_id_setting_type', 'project_id', 'setting_type'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
     setting_type = db.Column(db.String(50), nullable=False)
@@ -29,19 +36,62 @@ class Setting(db.Model):
     updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
 
 class Outline(db.Model):
+    # 流水线生成的节点唯一（手动创建和导入的纲要 level 为空，不受限制），见 app/services/book_pipeline.py
+    __table_args__ = (
+        db.Index('uq_outline_parent_id_level_order', 'parent_id', 'level', 'order', unique=True),
+        db.Index('uq_outline_basic_concept_id_level', 'basic_concept_id', 'level', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False, index=True)
     title = db.Column(db.String(200), nullable=False)
     content = db.Column(db.Text)
     order = db.Column(db.Integer)
+    # 大纲层级：book=全文大纲, chapter=章节大纲, section=分节大纲；手动创建的纲要为空
+    level = db.Column(db.String(20))
+    parent_id = db.Column(db.Integer, db.ForeignKey('outline.id'), index=True)
+    basic_concept_id = db.Column(db.Integer, db.ForeignKey('basic_concept.id'), index=True)  # 全文大纲对应的构思
+    summary = db.Column(db.Text)  # 分节内容概要
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
     updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
 
+    children = db.relationship('Outline', backref=db.backref('parent', remote_side=[id]),
+                               lazy=True, order_by='Outline.order')
+
 class Content(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
-    outline_id = db.Column(db.Integer, db.ForeignKey('outline.id'))
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False, index=True)
+    outline_id = db.Column(db.Integer, db.ForeignKey('outline.id'), index=True)
     title = db.Column(db.String(200))
-    content = db.Column(db.Text)
+    content = db.Column(CompressedText)  # 正文较长，超过阈值时压缩存储
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
-    updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
\ No newline at end of file
+    updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
+
+class ContentRevision(db.Model):
+    """正文的修订历史：完整快照，或相对上一修订的行级差异（见 app/services/revisions.py）"""
+    __table_args__ = (
+        db.UniqueConstraint('content_id', 'number', name='uq_content_revision_content_id_number'),
+        db.Index('ix_content_revision_content_id_created_at', 'content_id', 'created_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    content_id = db.Column(db.Integer, db.ForeignKey('content.id'), nullable=False)
+    number = db.Column(db.Integer, nullable=False)  # 同一正文内递增的修订号
+    is_snapshot = db.Column(db.Boolean, nullable=False, default=False)
+    snapshot_number = db.Column(db.Integer, nullable=False)  # 重建时起始的快照修订号，快照为自身
+    data = db.deferred(db.Column(CompressedText, nullable=False))  # 快照为全文，差异为 JSON
+    delta_chars = db.Column(db.Integer, nullable=False, default=0)  # 自快照以来累计的差异大小
+    length = db.Column(db.Integer, nullable=False, default=0)  # 该修订的正文字数
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    content = db.relationship('Content', backref=db.backref('revisions', lazy='dynamic'))
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'id': self.id,
+            'number': self.number,
+            'is_snapshot': self.is_snapshot,
+            'length': self.length,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
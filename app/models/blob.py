@@ -0,0 +1,51 @@
+from app import db
+from datetime import datetime
+
+class Blob(db.Model):
+    """按内容寻址存储的文件（见 app/services/blob_store.py），相同内容只保存一份"""
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), nullable=False, unique=True)
+    size = db.Column(db.BigInteger, nullable=False)
+    content_type = db.Column(db.String(100))
+    ref_count = db.Column(db.Integer, nullable=False, default=0)  # 引用该文件的素材数，为 0 时可被回收
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_blob_ref_count_created_at', 'ref_count', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f'<Blob {self.id} {self.sha256[:12]}>'
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'id': self.id,
+            'sha256': self.sha256,
+            'size': self.size,
+            'content_type': self.content_type
+        }
+
+class UploadSession(db.Model):
+    """可续传的分块上传：已接收的数据写在临时文件中，received 为已写入的字节数"""
+    id = db.Column(db.String(32), primary_key=True)  # 随机令牌，也是上传地址的一部分
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
+    filename = db.Column(db.String(255))
+    content_type = db.Column(db.String(100))
+    size = db.Column(db.BigInteger)  # 文件总大小，创建时声明
+    received = db.Column(db.BigInteger, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_upload_session_updated_at', 'updated_at'),
+    )
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'upload_id': self.id,
+            'filename': self.filename,
+            'size': self.size,
+            'offset': self.received
+        }
@@ -1,31 +1,92 @@
+from datetime import datetime
+
 from app import db
+from app.models.types import CompressedText
 
 class Inspiration(db.Model):
+    __table_args__ = (
+        db.Index('ix_inspiration_project_id_created_at', 'project_id', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False, index=True)
     content = db.Column(db.Text)
     source_type = db.Column(db.String(50))  # 真实事件/虚构世界/主题表达等
     tags = db.Column(db.String(200))  # 以逗号分隔的标签
     materials = db.relationship('InspirationMaterial', backref='inspiration', lazy=True)
-    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)  # 精确到微秒，分页游标按 (created_at, id) 比较
     updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
 
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'id': self.id,
+            'project_id': self.project_id,
+            'content': self.content,
+            'source_type': self.source_type,
+            'tags': self.tags,
+            'materials': [material.to_dict() for material in self.materials],
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
 class InspirationMaterial(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    inspiration_id = db.Column(db.Integer, db.ForeignKey('inspiration.id'), nullable=False)
+    inspiration_id = db.Column(db.Integer, db.ForeignKey('inspiration.id'), nullable=False, index=True)
+    # 文件名；旧数据（blob_id 为空）为 UPLOAD_FOLDER 下的文件名 {inspiration_id}_{原文件名}
     file_path = db.Column(db.String(500))
     file_type = db.Column(db.String(50))
     description = db.Column(db.Text)
+    blob_id = db.Column(db.Integer, db.ForeignKey('blob.id'), index=True)  # 文件内容，相同文件共用一个
+    # 缩略图、预览图和提取的文本（见 app/services/derivatives.py）；状态为 pending/ready/incomplete/failed，
+    # 不支持的文件类型为空
+    derivative_status = db.Column(db.String(20))
+    has_thumbnail = db.Column(db.Boolean, nullable=False, default=False)
+    has_preview = db.Column(db.Boolean, nullable=False, default=False)
+    extracted_text = db.deferred(db.Column(CompressedText))  # 列表页不需要，按需加载
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
 
+    blob = db.relationship('Blob')
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'id': self.id,
+            'inspiration_id': self.inspiration_id,
+            'file_path': self.file_path,
+            'file_type': self.file_type,
+            'description': self.description,
+            'blob_id': self.blob_id,
+            'derivative_status': self.derivative_status,
+            'has_thumbnail': self.has_thumbnail,
+            'has_preview': self.has_preview
+        }
+
 class CreativeIdea(db.Model):
+    __table_args__ = (
+        db.Index('ix_creative_idea_project_id_created_at', 'project_id', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
-    inspiration_id = db.Column(db.Integer, db.ForeignKey('inspiration.id'))
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False, index=True)
+    inspiration_id = db.Column(db.Integer, db.ForeignKey('inspiration.id'), index=True)
     summary = db.Column(db.Text)  # 作品简述
     genre = db.Column(db.String(50))  # 体裁
     theme = db.Column(db.String(200))  # 主题
     innovation_points = db.Column(db.Text)  # 创新点
     score = db.Column(db.Float)  # 评分
-    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
-    updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
\ No newline at end of file
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)  # 精确到微秒，分页游标按 (created_at, id) 比较
+    updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'id': self.id,
+            'project_id': self.project_id,
+            'inspiration_id': self.inspiration_id,
+            'summary': self.summary,
+            'genre': self.genre,
+            'theme': self.theme,
+            'innovation_points': self.innovation_points,
+            'score': self.score,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
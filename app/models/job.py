@@ -0,0 +1,54 @@
+from app import db
+from datetime import datetime
+import json
+from typing import Any, Dict, Optional
+
+class GenerationJob(db.Model):
+    """后台生成任务"""
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)  # 任务类型，对应已注册的处理函数
+    payload = db.Column(db.Text)  # JSON 参数
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending/running/succeeded/failed/cancelled
+    result = db.Column(db.Text)  # JSON 结果
+    error = db.Column(db.Text)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    timeout = db.Column(db.Integer, nullable=False, default=300)  # 单次执行超时（秒）
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    worker = db.Column(db.String(100))  # 正在执行的工作线程
+    run_after = db.Column(db.DateTime)  # 重试时的最早执行时间
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_generation_job_status_run_after', 'status', 'run_after'),
+    )
+
+    def __repr__(self):
+        return f'<GenerationJob {self.id} {self.kind} {self.status}>'
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ('succeeded', 'failed', 'cancelled')
+
+    def get_payload(self) -> Dict[str, Any]:
+        return json.loads(self.payload) if self.payload else {}
+
+    def get_result(self) -> Optional[Any]:
+        return json.loads(self.result) if self.result else None
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'error': self.error,
+            'cancel_requested': self.cancel_requested,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
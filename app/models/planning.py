@@ -1,21 +1,41 @@
 from app import db
 from datetime import datetime, timezone
 from typing import Dict, Any, List, Optional
+from sqlalchemy import exists
 from sqlalchemy.orm import Mapped
+from app.models.types import CompressedText
 
 class InitialIdea(db.Model):
     """初始灵感模型"""
+    __table_args__ = (
+        db.Index('ix_initial_idea_project_id_created_at', 'project_id', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
     content = db.Column(db.Text, nullable=False)  # 灵感内容
     source_type = db.Column(db.String(50))  # 真实事件/虚构世界/主题表达等
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
 
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'id': self.id,
+            'project_id': self.project_id,
+            'content': self.content,
+            'source_type': self.source_type,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
 class CreativeExpansion(db.Model):
     """创意发散模型"""
+    __table_args__ = (
+        db.Index('ix_creative_expansion_project_id_initial_idea_id', 'project_id', 'initial_idea_id', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
-    initial_idea_id = db.Column(db.Integer, db.ForeignKey('initial_idea.id'), nullable=False)
+    initial_idea_id = db.Column(db.Integer, db.ForeignKey('initial_idea.id'), nullable=False, index=True)
     summary = db.Column(db.Text)  # 作品简述
     genre = db.Column(db.String(50))  # 体裁
     theme = db.Column(db.String(200))  # 主题
@@ -26,11 +46,6 @@ class CreativeExpansion(db.Model):
     # 关联全文构思
     concepts = db.relationship('BasicConcept', backref='creative_expansion', lazy=True)
 
-    @property
-    def has_concept(self) -> bool:
-        """是否已经生成了全文构思"""
-        return bool(self.concepts.first())
-        
     def to_dict(self):
         """转换为字典"""
         return {
@@ -45,51 +60,66 @@ class CreativeExpansion(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+# 全文构思的字段分组，可以按组分别生成后合并：(分组标识, 名称, 字段)
+CONCEPT_FIELD_GROUPS = (
+    ('world', '世界观设定', ('world_setting', 'culture_background', 'special_elements')),
+    ('story', '故事架构', ('core_conflict', 'plot_outline', 'subplot_design', 'key_events', 'plot_progression')),
+    ('characters', '人物系统', ('main_characters', 'supporting_characters', 'character_relationships', 'character_arcs')),
+    ('theme', '主题与深度', ('theme_design', 'philosophical_elements', 'social_commentary', 'symbolic_system')),
+    ('narrative', '叙事策略', ('narrative_perspective', 'timeline_structure', 'pacing_design', 'foreshadowing')),
+    ('style', '写作风格与规划', ('writing_style', 'language_features', 'atmosphere_building', 'literary_devices',
+                           'chapter_structure', 'volume_planning', 'word_count_target', 'estimated_chapters')),
+)
+
 class BasicConcept(db.Model):
     """作品全文基本构思模型"""
+    __table_args__ = (
+        db.Index('ix_basic_concept_project_id_created_at', 'project_id', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
-    creative_expansion_id = db.Column(db.Integer, db.ForeignKey('creative_expansion.id'), nullable=False)
+    creative_expansion_id = db.Column(db.Integer, db.ForeignKey('creative_expansion.id'), nullable=False, index=True)
     
     # 世界观设定
-    world_setting = db.Column(db.Text)  # 时代背景、社会环境、特殊规则等
-    culture_background = db.Column(db.Text)  # 文化背景、风俗习惯、社会制度等
-    special_elements = db.Column(db.Text)  # 特殊元素（如魔法系统、科技水平等）
+    world_setting = db.Column(CompressedText)  # 时代背景、社会环境、特殊规则等
+    culture_background = db.Column(CompressedText)  # 文化背景、风俗习惯、社会制度等
+    special_elements = db.Column(CompressedText)  # 特殊元素（如魔法系统、科技水平等）
     
     # 故事架构
-    core_conflict = db.Column(db.Text)  # 核心冲突
-    plot_outline = db.Column(db.Text)  # 故事大纲（三幕结构或其他）
-    subplot_design = db.Column(db.Text)  # 子情节设计
-    key_events = db.Column(db.Text)  # 关键事件
-    plot_progression = db.Column(db.Text)  # 情节推进方式
+    core_conflict = db.Column(CompressedText)  # 核心冲突
+    plot_outline = db.Column(CompressedText)  # 故事大纲（三幕结构或其他）
+    subplot_design = db.Column(CompressedText)  # 子情节设计
+    key_events = db.Column(CompressedText)  # 关键事件
+    plot_progression = db.Column(CompressedText)  # 情节推进方式
     
     # 人物系统
-    main_characters = db.Column(db.Text)  # 主要人物（性格、背景、动机等）
-    supporting_characters = db.Column(db.Text)  # 重要配角
-    character_relationships = db.Column(db.Text)  # 人物关系网
-    character_arcs = db.Column(db.Text)  # 人物成长线
+    main_characters = db.Column(CompressedText)  # 主要人物（性格、背景、动机等）
+    supporting_characters = db.Column(CompressedText)  # 重要配角
+    character_relationships = db.Column(CompressedText)  # 人物关系网
+    character_arcs = db.Column(CompressedText)  # 人物成长线
     
     # 主题与深度
-    theme_design = db.Column(db.Text)  # 主题设计（核心思想、寓意等）
-    philosophical_elements = db.Column(db.Text)  # 哲学元素
-    social_commentary = db.Column(db.Text)  # 社会评论
-    symbolic_system = db.Column(db.Text)  # 象征系统
+    theme_design = db.Column(CompressedText)  # 主题设计（核心思想、寓意等）
+    philosophical_elements = db.Column(CompressedText)  # 哲学元素
+    social_commentary = db.Column(CompressedText)  # 社会评论
+    symbolic_system = db.Column(CompressedText)  # 象征系统
     
     # 叙事策略
-    narrative_perspective = db.Column(db.Text)  # 叙事视角
-    timeline_structure = db.Column(db.Text)  # 时间线结构
-    pacing_design = db.Column(db.Text)  # 节奏设计
-    foreshadowing = db.Column(db.Text)  # 伏笔设置
+    narrative_perspective = db.Column(CompressedText)  # 叙事视角
+    timeline_structure = db.Column(CompressedText)  # 时间线结构
+    pacing_design = db.Column(CompressedText)  # 节奏设计
+    foreshadowing = db.Column(CompressedText)  # 伏笔设置
     
     # 写作风格
-    writing_style = db.Column(db.Text)  # 写作风格
-    language_features = db.Column(db.Text)  # 语言特色
-    atmosphere_building = db.Column(db.Text)  # 氛围营造
-    literary_devices = db.Column(db.Text)  # 文学手法
+    writing_style = db.Column(CompressedText)  # 写作风格
+    language_features = db.Column(CompressedText)  # 语言特色
+    atmosphere_building = db.Column(CompressedText)  # 氛围营造
+    literary_devices = db.Column(CompressedText)  # 文学手法
     
     # 规划信息
-    chapter_structure = db.Column(db.Text)  # 章节结构
-    volume_planning = db.Column(db.Text)  # 分卷规划
+    chapter_structure = db.Column(CompressedText)  # 章节结构
+    volume_planning = db.Column(CompressedText)  # 分卷规划
     word_count_target = db.Column(db.Integer)  # 预计字数
     estimated_chapters = db.Column(db.Integer)  # 预计章节数
 
@@ -165,4 +195,16 @@ class BasicConcept(db.Model):
     estimated_chapters = db.Column(db.Integer)  # 预计章节数
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+# “是否存在”标记：EXISTS 子查询列，默认延迟加载（访问时单独查询一次），
+# 列表页通过 app.queries.planning 用 undefer 随主查询一起取出
+InitialIdea.has_expansions = db.column_property(
+    exists().where(CreativeExpansion.initial_idea_id == InitialIdea.id).correlate_except(CreativeExpansion),
+    deferred=True
+)
+CreativeExpansion.has_concept = db.column_property(
+    exists().where(BasicConcept.creative_expansion_id == CreativeExpansion.id).correlate_except(BasicConcept),
+    deferred=True
+)
@@ -0,0 +1,212 @@
+"""自定义列类型
+
+CompressedText：超过阈值的长文本压缩后以 BLOB 存储，读取时自动解压，模型和业务代码仍按字符串使用。
+短文本和压缩前写入的旧数据保持原样（TEXT），两种值可以在同一列中共存，
+因此启用压缩不需要修改表结构，旧数据可以随时用 `flask compress-text` 或迁移分批转换。
+
+压缩值的格式：MAGIC + 编码标识（1 字节）+ 压缩数据。编码：
+- z：zlib（标准库）
+- s：zstd（需要安装 zstandard）
+- d：zstd + 预训练字典（COMPRESSION_ZSTD_DICT 指向字典文件，字典由 `flask compress-train-dict` 生成）
+
+SQLite 的列不限制值的类型，其他数据库的 TEXT 列不能保存二进制数据，压缩只在 SQLite 上启用。
+"""
+import zlib
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from flask import Flask
+from sqlalchemy import Text, text
+from sqlalchemy.types import TypeDecorator
+
+MAGIC = b'\x00CT'
+
+CODEC_ZLIB = b'z'
+CODEC_ZSTD = b's'
+CODEC_ZSTD_DICT = b'd'
+
+_CODEC_NAMES = {'zlib': CODEC_ZLIB, 'zstd': CODEC_ZSTD, 'zstd-dict': CODEC_ZSTD_DICT}
+
+# 当前进程的压缩配置，由 init_app() 按应用配置设置
+_settings: Dict[str, Any] = {
+    'codec': CODEC_ZLIB,
+    'threshold': 1024,
+    'level': 6,
+    'dictionary': None,
+}
+
+
+def init_app(app: Flask) -> None:
+    """按 COMPRESSION_* 配置设置压缩方式"""
+    name = app.config.get('COMPRESSION_CODEC', 'zlib')
+    _settings['codec'] = None if name == 'none' else _CODEC_NAMES.get(name)
+    if name != 'none' and _settings['codec'] is None:
+        raise ValueError(f'未知的压缩方式: {name}')
+    _settings['threshold'] = int(app.config.get('COMPRESSION_THRESHOLD', 1024))
+    _settings['level'] = int(app.config.get('COMPRESSION_LEVEL', 6))
+    _settings['dictionary'] = None
+
+    # 切换到其他压缩方式后，读取旧数据仍需要字典
+    dict_path = app.config.get('COMPRESSION_ZSTD_DICT')
+    if dict_path:
+        with open(dict_path, 'rb') as f:
+            _settings['dictionary'] = f.read()
+    elif _settings['codec'] == CODEC_ZSTD_DICT:
+        raise ValueError('COMPRESSION_CODEC=zstd-dict 需要设置 COMPRESSION_ZSTD_DICT')
+
+
+def is_compressed(value: Any) -> bool:
+    return isinstance(value, bytes) and value.startswith(MAGIC)
+
+
+def compress(value: str, codec: Optional[bytes] = None, level: Optional[int] = None) -> bytes:
+    """压缩文本，codec 默认为当前配置"""
+    return _compress_bytes(value.encode('utf-8'), codec, level)
+
+
+def _compress_bytes(raw: bytes, codec: Optional[bytes] = None, level: Optional[int] = None) -> bytes:
+    codec = codec or _settings['codec'] or CODEC_ZLIB
+    level = level if level is not None else _settings['level']
+    if codec == CODEC_ZLIB:
+        data = zlib.compress(raw, level)
+    else:
+        data = _zstd_compressor(codec, level).compress(raw)
+    return MAGIC + codec + data
+
+
+def decompress(value: Any) -> Any:
+    """解压 compress() 的结果；其他值原样返回"""
+    if not is_compressed(value):
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+    codec, data = value[len(MAGIC):len(MAGIC) + 1], value[len(MAGIC) + 1:]
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(data).decode('utf-8')
+    if codec in (CODEC_ZSTD, CODEC_ZSTD_DICT):
+        return _zstd_decompressor(codec).decompress(data).decode('utf-8')
+    raise ValueError(f'未知的压缩编码: {codec!r}')
+
+
+def _zstd_module() -> Any:
+    try:
+        import zstandard
+    except ImportError as e:
+        raise RuntimeError('zstd 压缩需要安装 zstandard：pip install zstandard') from e
+    return zstandard
+
+
+def _zstd_dictionary() -> Any:
+    if _settings['dictionary'] is None:
+        raise RuntimeError('读取字典压缩的数据需要设置 COMPRESSION_ZSTD_DICT')
+    return _zstd_module().ZstdCompressionDict(_settings['dictionary'])
+
+
+def _zstd_compressor(codec: bytes, level: int) -> Any:
+    zstandard = _zstd_module()
+    if codec == CODEC_ZSTD_DICT:
+        return zstandard.ZstdCompressor(level=level, dict_data=_zstd_dictionary())
+    return zstandard.ZstdCompressor(level=level)
+
+
+def _zstd_decompressor(codec: bytes) -> Any:
+    zstandard = _zstd_module()
+    if codec == CODEC_ZSTD_DICT:
+        return zstandard.ZstdDecompressor(dict_data=_zstd_dictionary())
+    return zstandard.ZstdDecompressor()
+
+
+class CompressedText(TypeDecorator):
+    """超过 COMPRESSION_THRESHOLD 字节的文本压缩存储（仅 SQLite）"""
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[str], dialect: Any) -> Any:
+        codec = _settings['codec']
+        if value is None or codec is None or dialect.name != 'sqlite':
+            return value
+        raw = value.encode('utf-8')
+        if len(raw) < _settings['threshold']:
+            return value
+        return _compress_bytes(raw, codec)
+
+    def process_result_value(self, value: Any, dialect: Any) -> Optional[str]:
+        return decompress(value)
+
+
+def compressed_columns() -> Dict[str, List[str]]:
+    """使用 CompressedText 的列，{表名: [列名]}"""
+    from app import db
+
+    result: Dict[str, List[str]] = {}
+    for table in db.metadata.sorted_tables:
+        columns = [column.name for column in table.columns if isinstance(column.type, CompressedText)]
+        if columns:
+            result[table.name] = columns
+    return result
+
+
+def convert_rows(connection: Any, table: str, columns: Iterable[str], compressed: bool = True,
+                 batch_size: int = 500, after_batch: Optional[Callable[[], None]] = None) -> int:
+    """按主键分批转换已有数据：compressed=True 时压缩超过阈值的文本，False 时全部还原为文本
+
+    返回修改的行数。不会一次性把整张表读入内存；after_batch 在每批之后调用（如提交事务）。
+    """
+    columns = list(columns)
+    column_list = ', '.join(columns)
+    last_id, changed = 0, 0
+    while True:
+        rows = connection.execute(text(
+            f'SELECT id, {column_list} FROM {table} WHERE id > :last_id ORDER BY id LIMIT :limit'
+        ), {'last_id': last_id, 'limit': batch_size}).fetchall()
+        if not rows:
+            return changed
+        updates = []
+        for row in rows:
+            values = {}
+            for column, value in zip(columns, row[1:]):
+                new_value = _convert_value(value, compressed)
+                if new_value is not value:
+                    values[column] = new_value
+            if values:
+                updates.append((row[0], values))
+        for row_id, values in updates:
+            assignments = ', '.join(f'{column} = :{column}' for column in values)
+            connection.execute(text(f'UPDATE {table} SET {assignments} WHERE id = :id'),
+                               dict(values, id=row_id))
+        changed += len(updates)
+        last_id = rows[-1][0]
+        if after_batch is not None:
+            after_batch()
+
+
+def _convert_value(value: Any, compressed: bool) -> Any:
+    if value is None:
+        return value
+    if not compressed:
+        return decompress(value) if is_compressed(value) else value
+    if is_compressed(value) or _settings['codec'] is None:
+        return value
+    raw = value.encode('utf-8') if isinstance(value, str) else value
+    if len(raw) < _settings['threshold']:
+        return value
+    return _compress_bytes(raw)
+
+
+def train_dictionary(size: int = 112640, max_samples: int = 5000) -> bytes:
+    """用已有的长文本训练 zstd 字典，样本为各列中按 4KB 切分的片段"""
+    from app import db
+
+    zstandard = _zstd_module()
+    samples: List[bytes] = []
+    for table, columns in compressed_columns().items():
+        for column in columns:
+            rows = db.session.execute(text(
+                f'SELECT {column} FROM {table} WHERE {column} IS NOT NULL ORDER BY id DESC LIMIT :limit'
+            ), {'limit': max_samples})
+            for (value,) in rows:
+                raw = decompress(value).encode('utf-8')
+                samples.extend(raw[start:start + 4096] for start in range(0, len(raw), 4096))
+                if len(samples) >= max_samples:
+                    break
+    if not samples:
+        raise RuntimeError('没有可用于训练字典的文本')
+    return zstandard.train_dictionary(size, samples[:max_samples]).as_bytes()
@@ -0,0 +1,19 @@
+"""正文页面的查询
+
+修订列表不取出修订数据（ContentRevision.data 为延迟加载的列），按 (created_at, id) 倒序分页。
+"""
+from typing import Optional
+
+from flask_sqlalchemy.query import Query
+
+from app.models import ContentRevision
+from app.queries.pagination import Page, ordered, paginate
+
+
+def revisions_query(content_id: int) -> Query:
+    return ordered(ContentRevision.query.filter_by(content_id=content_id), ContentRevision)
+
+
+def revisions_page(content_id: int, cursor: Optional[str] = None, limit: Optional[int] = None) -> Page:
+    """正文修订的一页（最新的在前）"""
+    return paginate(revisions_query(content_id), ContentRevision, cursor, limit)
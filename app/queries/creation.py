@@ -0,0 +1,38 @@
+"""创作页面（灵感素材、创意构思）的查询
+
+列表按 (created_at, id) 倒序，*_page 函数按游标分页。
+"""
+from typing import List, Optional
+
+from flask_sqlalchemy.query import Query
+from sqlalchemy.orm import load_only, selectinload
+
+from app.models.creation import Inspiration, InspirationMaterial, CreativeIdea
+from app.queries.pagination import Page, ordered, paginate
+
+
+def inspirations_query(project_id: int) -> Query:
+    return ordered(Inspiration.query.filter_by(project_id=project_id).options(
+        selectinload(Inspiration.materials).joinedload(InspirationMaterial.blob)
+    ), Inspiration)
+
+
+def inspirations_page(project_id: int, cursor: Optional[str] = None, limit: Optional[int] = None) -> Page:
+    """项目灵感素材的一页，连同各自的素材和文件记录"""
+    return paginate(inspirations_query(project_id), Inspiration, cursor, limit)
+
+
+def get_inspiration_choices(project_id: int) -> List[Inspiration]:
+    """创意表单下拉框用的灵感列表，只取编号和内容"""
+    return ordered(Inspiration.query.filter_by(project_id=project_id).options(
+        load_only(Inspiration.id, Inspiration.content, Inspiration.created_at)
+    ), Inspiration).all()
+
+
+def creative_ideas_query(project_id: int) -> Query:
+    return ordered(CreativeIdea.query.filter_by(project_id=project_id), CreativeIdea)
+
+
+def creative_ideas_page(project_id: int, cursor: Optional[str] = None, limit: Optional[int] = None) -> Page:
+    """项目创意构思的一页"""
+    return paginate(creative_ideas_query(project_id), CreativeIdea, cursor, limit)
@@ -0,0 +1,40 @@
+"""SQLite 查询计划检查
+
+对查询执行 EXPLAIN QUERY PLAN，找出其中的全表扫描（"SCAN 表名" 且未使用索引）。
+用于保证热点查询都能命中索引，见 benchmarks/query_plans.py。
+"""
+import re
+from typing import Any, Iterable, List, NamedTuple
+
+from app import db
+
+# SQLite 3.36 之前的输出为 "SCAN TABLE x"，之后为 "SCAN x"
+_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?(.*)$')
+
+
+class PlanStep(NamedTuple):
+    detail: str
+    table: str
+    full_scan: bool
+
+
+def explain(statement: Any) -> List[PlanStep]:
+    """返回语句的查询计划；statement 可以是 ORM 查询或 SQLAlchemy 语句"""
+    statement = getattr(statement, 'statement', statement)
+    compiled = statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+    rows = db.session.execute(db.text(f'EXPLAIN QUERY PLAN {compiled}')).all()
+
+    steps = []
+    for row in rows:
+        detail = row[-1]
+        match = _SCAN.match(detail)
+        table = match.group(1) if match else ''
+        full_scan = bool(match) and 'INDEX' not in match.group(2)
+        steps.append(PlanStep(detail, table, full_scan))
+    return steps
+
+
+def full_scans(statement: Any, allowed_tables: Iterable[str] = ()) -> List[str]:
+    """返回查询计划中不被允许的全表扫描"""
+    allowed = set(allowed_tables)
+    return [step.detail for step in explain(statement) if step.full_scan and step.table not in allowed]
@@ -0,0 +1,60 @@
+"""键集分页
+
+列表按 (created_at, id) 倒序排列，下一页的条件是 (created_at, id) < 上一页最后一条，
+配合 (..., created_at) 索引（SQLite 索引项自带 rowid）直接定位，不需要 OFFSET 跳过前面的行，
+翻到多深都是同样的代价，翻页期间新增的记录也不会导致重复或遗漏。
+
+游标是上一页最后一条的 created_at 和 id，编码为 URL 安全的字符串。
+"""
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+from flask import current_app
+from flask_sqlalchemy.query import Query
+from sqlalchemy import tuple_
+
+
+class InvalidCursor(ValueError):
+    """无法解析的分页游标"""
+
+
+class Page(NamedTuple):
+    items: List[Any]
+    next_cursor: Optional[str]  # 没有下一页时为 None
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    raw = f'{created_at.isoformat()}|{id}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, id = raw.split('|')
+        return datetime.fromisoformat(created_at), int(id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursor(f'无效的分页游标: {cursor}') from e
+
+
+def ordered(query: Query, model: Any) -> Query:
+    """按 (created_at, id) 倒序"""
+    return query.order_by(model.created_at.desc(), model.id.desc())
+
+
+def paginate(query: Query, model: Any, cursor: Optional[str] = None, limit: Optional[int] = None) -> Page:
+    """取出游标之后的一页；query 需已按 ordered() 排序"""
+    limit = limit or int(current_app.config.get('LIST_PAGE_SIZE', 20))
+    if cursor:
+        created_at, id = decode_cursor(cursor)
+        query = query.filter(tuple_(model.created_at, model.id) < (created_at, id))
+
+    # 多取一条判断是否还有下一页
+    items = query.limit(limit + 1).all()
+    if len(items) <= limit:
+        return Page(items, None)
+    items = items[:limit]
+    last = items[-1]
+    return Page(items, encode_cursor(last.created_at, last.id))
@@ -0,0 +1,63 @@
+"""规划页面的查询
+
+每个函数以固定数量的查询取出页面需要的全部数据，查询数不随灵感、创意和构思的数量增长：
+关联对象使用 joinedload 一并取出，“是否存在”标记使用 EXISTS 子查询作为列取出。
+列表按 (created_at, id) 倒序，*_page 函数按游标分页，get_* 函数取出全部。
+*_query 函数返回未执行的查询，供查询计划检查使用。
+"""
+from typing import List, Optional
+
+from flask_sqlalchemy.query import Query
+from sqlalchemy.orm import joinedload, undefer
+
+from app.models.planning import InitialIdea, CreativeExpansion, BasicConcept
+from app.queries.pagination import Page, ordered, paginate
+
+
+def concepts_query(project_id: int) -> Query:
+    return ordered(BasicConcept.query.filter_by(project_id=project_id).options(
+        joinedload(BasicConcept.creative_expansion)
+    ), BasicConcept)
+
+
+def get_concepts(project_id: int) -> List[BasicConcept]:
+    """项目的全部构思（按创建时间倒序），连同对应的创意发散"""
+    return concepts_query(project_id).all()
+
+
+def concepts_page(project_id: int, cursor: Optional[str] = None, limit: Optional[int] = None) -> Page:
+    """项目构思的一页"""
+    return paginate(concepts_query(project_id), BasicConcept, cursor, limit)
+
+
+def initial_ideas_query(project_id: int) -> Query:
+    return ordered(InitialIdea.query.filter_by(project_id=project_id).options(
+        undefer(InitialIdea.has_expansions)
+    ), InitialIdea)
+
+
+def get_initial_ideas(project_id: int) -> List[InitialIdea]:
+    """项目的全部灵感（按创建时间倒序），附带 has_expansions 标记"""
+    return initial_ideas_query(project_id).all()
+
+
+def initial_ideas_page(project_id: int, cursor: Optional[str] = None, limit: Optional[int] = None) -> Page:
+    """项目灵感的一页"""
+    return paginate(initial_ideas_query(project_id), InitialIdea, cursor, limit)
+
+
+def creative_expansions_query(project_id: int, idea_id: int) -> Query:
+    return ordered(CreativeExpansion.query.filter_by(project_id=project_id, initial_idea_id=idea_id).options(
+        undefer(CreativeExpansion.has_concept)
+    ), CreativeExpansion)
+
+
+def get_creative_expansions(project_id: int, idea_id: int) -> List[CreativeExpansion]:
+    """灵感的全部创意发散（按创建时间倒序），附带 has_concept 标记"""
+    return creative_expansions_query(project_id, idea_id).all()
+
+
+def creative_expansions_page(project_id: int, idea_id: int, cursor: Optional[str] = None,
+                             limit: Optional[int] = None) -> Page:
+    """灵感创意发散的一页"""
+    return paginate(creative_expansions_query(project_id, idea_id), CreativeExpansion, cursor, limit)
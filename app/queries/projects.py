@@ -0,0 +1,81 @@
+"""侧边栏项目列表
+
+几乎每个页面的侧边栏都要列出全部项目，这里只查询 (id, name, genre) 三列并缓存在进程内，
+项目新增、修改或删除的事务提交后立即失效。其他进程中的修改无法通知到本进程，
+缓存另有 SIDEBAR_CACHE_TTL 秒的过期时间兜底。
+"""
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from flask import Flask, current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import Project
+
+
+class SidebarProject(NamedTuple):
+    id: int
+    name: str
+    genre: Optional[str]
+
+
+_lock = threading.Lock()
+
+
+def init_app(app: Flask) -> None:
+    """注册侧边栏的模板上下文和失效事件"""
+    app.extensions['sidebar_projects'] = {'rows': None, 'expires_at': 0.0}
+
+    @app.context_processor
+    def inject_sidebar_projects() -> Dict[str, Any]:
+        return {'sidebar_projects': get_sidebar_projects()}
+
+    if not event.contains(Session, 'before_flush', _track_project_changes):
+        event.listen(Session, 'before_flush', _track_project_changes)
+        event.listen(Session, 'after_commit', _invalidate_after_commit)
+        event.listen(Session, 'after_rollback', _discard_changes)
+
+
+def get_sidebar_projects() -> List[SidebarProject]:
+    """全部项目的 (id, name, genre)，按 id 排序"""
+    state = current_app.extensions.setdefault('sidebar_projects', {'rows': None, 'expires_at': 0.0})
+    rows = state['rows']
+    if rows is not None and time.monotonic() < state['expires_at']:
+        return rows
+
+    with _lock:
+        if state['rows'] is not None and time.monotonic() < state['expires_at']:
+            return state['rows']
+        rows = [SidebarProject(*row) for row in db.session.execute(
+            db.select(Project.id, Project.name, Project.genre).order_by(Project.id)
+        )]
+        state['rows'] = rows
+        state['expires_at'] = time.monotonic() + float(current_app.config.get('SIDEBAR_CACHE_TTL', 60))
+    return rows
+
+
+def invalidate_sidebar_projects(app: Optional[Flask] = None) -> None:
+    """使侧边栏缓存失效"""
+    app = app or current_app._get_current_object()  # type: ignore
+    state = app.extensions.get('sidebar_projects')
+    if state is not None:
+        state['rows'] = None
+
+
+def _track_project_changes(session: Session, flush_context: Any, instances: Any) -> None:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Project):
+            session.info['sidebar_projects_changed'] = True
+            return
+
+
+def _invalidate_after_commit(session: Session) -> None:
+    if session.info.pop('sidebar_projects_changed', False) and has_app_context():
+        invalidate_sidebar_projects()
+
+
+def _discard_changes(session: Session) -> None:
+    session.info.pop('sidebar_projects_changed', None)
@@ -0,0 +1,103 @@
+"""按内容哈希读取素材文件
+
+URL 中包含文件的 SHA-256，内容变化时 URL 随之变化，因此响应可以被浏览器和 CDN 永久缓存
+（Cache-Control: immutable），ETag 即为哈希，If-None-Match 命中时直接返回 304。
+文件路径由哈希直接得到；Content-Type 取自 Blob.content_type，不使用 URL 中的文件名，
+只有 INLINE_TYPES 中的类型在浏览器中直接打开，其他文件一律作为附件下载（防止上传的 HTML 等被当作页面执行）。
+缩略图和预览图（见 app/services/derivatives.py）
+由 /blobs/derived/<哈希>/<thumb|preview> 读取，缓存方式相同。
+
+默认由 send_file 发送文件（支持 Range 请求，返回 206）。部署在 nginx/Apache 之后时，
+可设置 BLOB_SENDFILE 把文件发送交给前端服务器，Python 进程只返回响应头：
+- x-accel-redirect：nginx，需配置 internal location（BLOB_ACCEL_PREFIX）指向 BLOB_FOLDER，例如
+      location /_blobs/ { internal; alias /path/to/uploads/blobs/; }
+- x-sendfile：Apache mod_xsendfile / lighttpd，响应头中为文件的绝对路径
+两种方式下 Range 和断点续传都由前端服务器处理。
+"""
+import os
+import re
+from typing import Optional, Tuple
+
+from flask import Blueprint, Response, abort, current_app, request, send_file
+from werkzeug.http import parse_options_header
+
+from app import db
+from app.models import Blob
+from app.services import blob_store, derivatives
+
+bp = Blueprint('blobs', __name__, url_prefix='/blobs')
+
+_SHA256 = re.compile('^[0-9a-f]{64}$')
+
+# 可以在浏览器中直接打开的类型；SVG 可以包含脚本，不在其中
+INLINE_TYPES = frozenset([
+    'image/png', 'image/jpeg', 'image/gif', 'image/webp', 'image/avif', 'image/bmp',
+    'application/pdf', 'text/plain',
+    'audio/mpeg', 'audio/mp4', 'audio/ogg', 'audio/wav', 'audio/webm', 'audio/flac', 'audio/aac',
+])
+
+def _serve_type(content_type: Optional[str]) -> Tuple[str, bool]:
+    """按存储的 Content-Type 决定响应类型，返回 (mimetype, 是否作为附件)"""
+    mimetype, options = parse_options_header(content_type or '')
+    mimetype = mimetype.lower()
+    if mimetype not in INLINE_TYPES:
+        return 'application/octet-stream', True
+    if mimetype == 'text/plain' and options.get('charset'):
+        return f'text/plain; charset={options["charset"]}', False
+    return mimetype, False
+
+def _cache(response: Response, etag: str) -> Response:
+    """内容寻址的文件永不变化：强 ETag + 长期缓存"""
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = int(current_app.config.get('BLOB_CACHE_MAX_AGE', 31536000))
+    response.cache_control.immutable = True
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    return response
+
+def _send(path: str, etag: str, mimetype: str, download_name: Optional[str] = None,
+          as_attachment: bool = False) -> Response:
+    """发送存储中的文件，按 BLOB_SENDFILE 交给前端服务器或由 send_file 发送"""
+    if not os.path.isfile(path):
+        abort(404)
+
+    mode = current_app.config.get('BLOB_SENDFILE')
+    if not mode:
+        response = send_file(path, mimetype=mimetype, as_attachment=as_attachment, download_name=download_name,
+                             conditional=True, etag=etag,
+                             max_age=int(current_app.config.get('BLOB_CACHE_MAX_AGE', 31536000)))
+        return _cache(response, etag)
+
+    if etag in request.if_none_match:
+        return _cache(Response(status=304), etag)
+    response = Response(mimetype=mimetype)
+    if as_attachment:
+        # 前端服务器沿用这里的响应头
+        response.headers.set('Content-Disposition', 'attachment', filename=download_name or 'download')
+    if mode == 'x-accel-redirect':
+        prefix = str(current_app.config.get('BLOB_ACCEL_PREFIX', '/_blobs/'))
+        response.headers['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + os.path.relpath(
+            path, blob_store.blob_folder()).replace(os.sep, '/')
+    elif mode == 'x-sendfile':
+        response.headers['X-Sendfile'] = os.path.abspath(path)
+    else:
+        abort(500, description=f'未知的 BLOB_SENDFILE: {mode}')
+    return _cache(response, etag)
+
+@bp.route('/<sha256>/<path:filename>')
+def get_blob(sha256: str, filename: str):
+    """读取文件；filename 只用作下载时的文件名"""
+    if not _SHA256.match(sha256):
+        abort(404)
+    content_type = db.session.execute(db.select(Blob.content_type).filter_by(sha256=sha256)).first()
+    if content_type is None:
+        abort(404)
+    mimetype, as_attachment = _serve_type(content_type[0])
+    return _send(blob_store.blob_path(sha256), sha256, mimetype, filename, as_attachment)
+
+@bp.route('/derived/<sha256>/<any(thumb, preview):variant>')
+def get_derivative(sha256: str, variant: str):
+    """读取缩略图或预览图"""
+    if not _SHA256.match(sha256):
+        abort(404)
+    return _send(derivatives.derivative_path(sha256, variant), f'{sha256}.{variant}', derivatives.image_mimetype())
@@ -1,5 +1,14 @@
-from flask import Blueprint, render_template, request, jsonify
+from flask import Blueprint, render_template, request, jsonify, current_app, Response, stream_with_context, abort
 from app.models import db, Project, Content, Outline
+from app.queries import content as content_queries
+from app.routes.jobs import accepted
+from app.routes.pagination import load_page, next_page_url
+from app.services import importer, job_queue, revisions
+from app.services.ai import get_ai_service
+from app.services.ai.concurrency import iterate_async
+from app.services.job_queue import job_handler, JobFailed
+import json
+import zipfile
 
 bp = Blueprint('content', __name__, url_prefix='/content')
 
@@ -20,6 +29,25 @@ def new_content(project_id):
         return jsonify({'status': 'success', 'id': content.id})
     return render_template('content/new.html', project=project, outlines=outlines)
 
+@bp.route('/<int:project_id>/import', methods=['POST'])
+def import_manuscript(project_id):
+    """导入书稿（txt、md、docx）：按章节标题拆分为纲要和正文，返回创建的数量
+
+    文件字段为 file，格式默认按扩展名判断，也可以用 format 参数指定。
+    """
+    Project.query.get_or_404(project_id)
+    file = request.files.get('file')
+    if file is None or not file.filename:
+        return jsonify({'error': '缺少文件'}), 400
+    try:
+        fmt = request.form.get('format') or importer.detect_format(file.filename)
+        result = importer.import_manuscript(project_id, file.stream, fmt)
+    except (importer.InvalidManuscript, zipfile.BadZipFile, KeyError) as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    db.session.commit()
+    return jsonify(dict(result.to_dict(), status='success')), 201
+
 @bp.route('/<int:content_id>/edit', methods=['GET', 'POST'])
 def edit_content(content_id):
     content = Content.query.get_or_404(content_id)
@@ -38,4 +66,111 @@ def delete_content(content_id):
     content = Content.query.get_or_404(content_id)
     db.session.delete(content)
     db.session.commit()
-    return jsonify({'status': 'success'})
\ No newline at end of file
+    return jsonify({'status': 'success'})
+
+def _require_content(content_id: int) -> None:
+    """正文不存在时返回 404（只查询 id，不读取正文）"""
+    if db.session.execute(db.select(Content.id).filter_by(id=content_id)).scalar() is None:
+        abort(404)
+
+@bp.route('/<int:content_id>/revisions')
+def list_revisions(content_id):
+    """修订列表（最新的在前），按 cursor 分页"""
+    _require_content(content_id)
+    page = load_page(content_queries.revisions_page, content_id)
+    return jsonify({
+        'items': [revision.to_dict() for revision in page.items],
+        'next_cursor': page.next_cursor,
+        'next_url': next_page_url('content.list_revisions', page, content_id=content_id)
+    })
+
+@bp.route('/<int:content_id>/revisions/<int:number>')
+def show_revision(content_id, number):
+    """重建指定修订的全文"""
+    try:
+        text = revisions.get_text(content_id, number)
+    except revisions.RevisionNotFound:
+        abort(404)
+    return jsonify({'number': number, 'content': text})
+
+@bp.route('/<int:content_id>/revisions/<int:number>/restore', methods=['POST'])
+def restore_revision(content_id, number):
+    """把正文恢复为指定修订（恢复本身也记录为一条新修订）"""
+    content = Content.query.get_or_404(content_id)
+    try:
+        content.content = revisions.get_text(content_id, number)
+    except revisions.RevisionNotFound:
+        abort(404)
+    db.session.commit()
+    return jsonify({'status': 'success'})
+
+@bp.route('/<int:content_id>/revisions/compact', methods=['POST'])
+def compact_revisions(content_id):
+    """合并旧修订（后台任务，返回 202 和任务ID）"""
+    _require_content(content_id)
+    job = job_queue.enqueue('content.compact_revisions', {'content_id': content_id})
+    return accepted(job)
+
+@job_handler('content.compact_revisions')
+async def compact_revisions_job(payload):
+    """后台合并旧修订；payload 不含 content_id 时处理全部正文"""
+    content_id = payload.get('content_id')
+    if content_id is None:
+        return {'status': 'success', 'removed': revisions.compact_all()}
+    if db.session.execute(db.select(Content.id).filter_by(id=content_id)).scalar() is None:
+        raise JobFailed('正文不存在')
+    removed = revisions.compact(content_id)
+    db.session.commit()
+    return {'status': 'success', 'removed': removed}
+
+def _sse(event: str, data: dict) -> str:
+    """格式化一条 Server-Sent Events 消息"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@bp.route('/<int:content_id>/generate/stream', methods=['POST'])
+def stream_content(content_id):
+    """以 Server-Sent Events 格式流式生成正文，生成完成后保存到该正文
+
+    会调用付费模型并覆盖正文，因此只接受 JSON 请求体的 POST（前端用 fetch() 读取响应流）：
+    其他网站的表单、图片、EventSource 和预取都无法发出这样的请求（跨站的 JSON 请求需要 CORS 预检）。
+    段落概要取自请求体的 summary，缺省时使用关联纲要的内容。
+    """
+    content = Content.query.get_or_404(content_id)
+    if not request.is_json:
+        return jsonify({'status': 'error', 'message': '请求体需要是 JSON'}), 415
+    summary = (request.get_json(silent=True) or {}).get('summary')
+    if not summary and content.outline_id:
+        outline = Outline.query.get(content.outline_id)
+        summary = outline.content if outline else None
+    if not summary:
+        return jsonify({'status': 'error', 'message': '缺少段落概要'}), 400
+
+    ai_service = get_ai_service()
+
+    def events():
+        parts = []
+        try:
+            for chunk in iterate_async(ai_service.stream_section_content(summary)):
+                parts.append(chunk)
+                yield _sse('chunk', {'text': chunk})
+        except Exception as e:
+            current_app.logger.error(f"流式生成正文失败: {str(e)}")
+            yield _sse('error', {'message': '正文生成失败'})
+            return
+
+        text = ''.join(parts)
+        if not text:
+            yield _sse('error', {'message': '正文生成失败'})
+            return
+
+        # 全部生成完成后再落库，客户端中途断开不会覆盖原有正文
+        record = db.session.get(Content, content_id)
+        record.content = text
+        db.session.commit()
+        yield _sse('done', {'id': content_id, 'length': len(text)})
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
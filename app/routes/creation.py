@@ -1,9 +1,13 @@
-from flask import Blueprint, render_template, request, jsonify, current_app, send_from_directory
+from concurrent.futures.process import BrokenProcessPool
+from flask import Blueprint, render_template, request, jsonify, current_app, send_from_directory, url_for, redirect
 from typing import List, Optional
-from app.models import db, Project
+from app.models import db, Project, Blob, UploadSession
 from app.models.creation import Inspiration, InspirationMaterial, CreativeIdea
 from app.controllers.creation_controller import CreationController
-import os
+from app.queries import creation as creation_queries
+from app.routes.pagination import load_page, next_page_url, page_json
+from app.services import blob_store, derivatives
+from app.services.job_queue import job_handler, JobFailed
 
 bp = Blueprint('creation', __name__, url_prefix='/project/<int:project_id>/creation')
 
@@ -11,6 +15,17 @@ bp = Blueprint('creation', __name__, url_prefix='/project/<int:project_id>/creat
 def inspiration(project_id: int):
     project: Project = Project.query.get_or_404(project_id)
     if request.method == 'POST':
+        # 已通过分块上传接口上传的素材：blob_ids 与 blob_names 一一对应；先全部校验，再写入
+        raw_ids: List[str] = request.form.getlist('blob_ids')
+        try:
+            requested_ids: List[int] = [int(blob_id) for blob_id in raw_ids]
+        except ValueError:
+            return jsonify({'error': f'素材文件 id 无效: {", ".join(raw_ids)}'}), 400
+        blobs = {blob.id: blob for blob in Blob.query.filter(Blob.id.in_(requested_ids))} if requested_ids else {}
+        missing = [str(blob_id) for blob_id in requested_ids if blob_id not in blobs]
+        if missing:
+            return jsonify({'error': f'素材文件不存在: {", ".join(missing)}'}), 400
+
         inspiration: Inspiration = Inspiration(
             project_id=project_id,
             content=request.form['content'],
@@ -18,39 +33,160 @@ def inspiration(project_id: int):
             tags=request.form['tags']
         )
         db.session.add(inspiration)
-        db.session.commit()
-        
-        # 处理上传的材料
-        if 'materials' in request.files:
-            files = request.files.getlist('materials')
-            for file in files:
+        db.session.flush()
+        blob_ids: List[int] = []
+        description: str = request.form.get('material_description', '')
+
+        blob_names: List[str] = request.form.getlist('blob_names')
+        for index, blob_id in enumerate(requested_ids):
+            blob: Blob = blobs[blob_id]
+            blob_ids.append(blob.id)
+            db.session.add(InspirationMaterial(
+                inspiration_id=inspiration.id,
+                file_path=blob_names[index] if index < len(blob_names) else blob.sha256,
+                file_type=blob.content_type,
+                description=description,
+                blob_id=blob.id
+            ))
+
+        # 随表单一起上传的小文件，同样存入按内容寻址的存储
+        try:
+            for file in request.files.getlist('materials'):
                 if file.filename:
-                    filename: str = f"{inspiration.id}_{file.filename}"
-                    file_path: str = os.path.join(str(current_app.config['UPLOAD_FOLDER']), filename)
-                    file.save(file_path)
-                    
-                    material: InspirationMaterial = InspirationMaterial(
+                    blob = blob_store.store_stream(file.stream, file.content_type)
+                    blob_ids.append(blob.id)
+                    db.session.add(InspirationMaterial(
                         inspiration_id=inspiration.id,
-                        file_path=filename,
+                        file_path=file.filename,
                         file_type=file.content_type,
-                        description=request.form.get('material_description', '')
-                    )
-                    db.session.add(material)
-            db.session.commit()
-            
+                        description=description,
+                        blob_id=blob.id
+                    ))
+        except blob_store.UploadError as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
+        db.session.commit()
+        # 缩略图和文本在后台生成，页面在生成完成前显示原文件
+        derivatives.schedule(blob_ids)
+
         return jsonify({'status': 'success', 'id': inspiration.id})
     
-    projects: List[Project] = Project.query.all()  # 为侧边栏准备数据
-    inspirations: List[Inspiration] = Inspiration.query.filter_by(project_id=project_id).all()
+    page = creation_queries.inspirations_page(project_id)
     return render_template('project/creation/inspiration.html', 
                          project=project, 
-                         projects=projects,
-                         inspirations=inspirations)
+                         inspirations=page.items,
+                         next_url=next_page_url('creation.inspirations_api', page, project_id=project_id, html=1))
+
+@bp.route('/api/inspirations')
+def inspirations_api(project_id: int):
+    """灵感素材列表接口（键集分页）"""
+    project: Project = Project.query.get_or_404(project_id)
+    page = load_page(creation_queries.inspirations_page, project_id)
+    return page_json(page, 'creation.inspirations_api', {'project_id': project_id},
+                     'project/creation/_inspiration_items.html', 'inspirations', project=project)
+
+@bp.route('/uploads', methods=['POST'])
+def create_upload(project_id: int):
+    """创建分块上传：参数 filename、size（字节）、content_type，返回 upload_url 和每块大小"""
+    Project.query.get_or_404(project_id)
+    data = request.get_json(silent=True) or request.form
+    try:
+        upload: UploadSession = blob_store.create_upload(
+            project_id,
+            data.get('filename'),
+            int(data['size']) if data.get('size') is not None else None,
+            data.get('content_type') or 'application/octet-stream'
+        )
+    except (ValueError, blob_store.UploadError) as e:
+        return jsonify({'error': str(e)}), 400
+    db.session.commit()
+    return jsonify(_upload_status(upload)), 201
+
+def _upload_status(upload: UploadSession) -> dict:
+    body = upload.to_dict()
+    body['upload_url'] = url_for('creation.upload_chunk', project_id=upload.project_id, upload_id=upload.id)
+    body['chunk_size'] = int(current_app.config.get('UPLOAD_CHUNK_SIZE', 4 * 1024 * 1024))
+    return body
+
+@bp.route('/uploads/<upload_id>', methods=['GET'])
+def upload_status(project_id: int, upload_id: str):
+    """上传进度，中断后按返回的 offset 续传"""
+    upload: UploadSession = UploadSession.query.filter_by(id=upload_id, project_id=project_id).first_or_404()
+    return jsonify(_upload_status(upload))
+
+@bp.route('/uploads/<upload_id>', methods=['PATCH'])
+def upload_chunk(project_id: int, upload_id: str):
+    """追加一块数据：请求体为原始字节，Upload-Offset 头为这一块在文件中的起始位置"""
+    upload: UploadSession = UploadSession.query.filter_by(id=upload_id, project_id=project_id).first_or_404()
+    offset = request.headers.get('Upload-Offset', type=int)
+    if offset is None:
+        return jsonify({'error': '缺少 Upload-Offset 头'}), 400
+    try:
+        received = blob_store.append_chunk(upload, offset, request.stream)
+    except blob_store.OffsetMismatch as e:
+        db.session.rollback()
+        return jsonify({'error': str(e), 'offset': e.expected}), 409
+    except blob_store.UploadError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 413
+    db.session.commit()
+    return jsonify({'offset': received})
+
+@bp.route('/uploads/<upload_id>/complete', methods=['POST'])
+def complete_upload(project_id: int, upload_id: str):
+    """结束上传，返回文件的 blob_id（相同内容的文件已存在时复用）"""
+    upload: UploadSession = UploadSession.query.filter_by(id=upload_id, project_id=project_id).first_or_404()
+    filename = upload.filename
+    try:
+        blob: Blob = blob_store.complete_upload(upload)
+    except blob_store.UploadError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e), 'offset': upload.received}), 409
+    db.session.commit()
+    return jsonify(dict(blob.to_dict(), blob_id=blob.id, filename=filename))
 
 @bp.route('/inspiration/<int:inspiration_id>/material/<filename>')
 def get_inspiration_material(project_id: int, inspiration_id: int, filename: str):
+    """按素材读取文件；存储中的文件重定向到按内容哈希的地址（页面中直接使用该地址，不经过这里）"""
     material: InspirationMaterial = InspirationMaterial.query.filter_by(inspiration_id=inspiration_id, file_path=filename).first_or_404()
-    return send_from_directory(str(current_app.config['UPLOAD_FOLDER']), filename)
+    if material.blob_id is None:
+        # 启用文件存储之前上传的文件
+        return send_from_directory(str(current_app.config['UPLOAD_FOLDER']), filename)
+    return redirect(material_url(material))
+
+@bp.app_template_global()
+def material_url(material: InspirationMaterial, variant: Optional[str] = None) -> str:
+    """素材文件的地址：存储中的文件为可永久缓存的哈希地址
+
+    variant 为 thumb（缩略图）或 preview（预览图）时，已生成的返回其地址，否则返回原文件地址。
+    """
+    if material.blob is None:
+        return url_for('creation.get_inspiration_material', project_id=material.inspiration.project_id,
+                       inspiration_id=material.inspiration_id, filename=material.file_path)
+    if (variant == 'thumb' and material.has_thumbnail) or (variant == 'preview' and material.has_preview):
+        return url_for('blobs.get_derivative', sha256=material.blob.sha256, variant=variant)
+    return url_for('blobs.get_blob', sha256=material.blob.sha256, filename=material.file_path)
+
+@job_handler('material.derivatives')
+async def material_derivatives_job(payload):
+    """后台为素材文件生成缩略图、预览图和文本"""
+    blob: Optional[Blob] = db.session.get(Blob, payload['blob_id'])
+    if blob is None:
+        raise JobFailed('素材文件不存在')
+    try:
+        result = await derivatives.process_blob(blob)
+    except BrokenProcessPool:
+        # 子进程意外退出（如内存不足），由任务队列重试
+        raise
+    except Exception as e:
+        # 文件损坏、格式无法识别或图片过大，重试也不会成功
+        db.session.rollback()
+        derivatives.mark_failed(blob.id)
+        db.session.commit()
+        raise JobFailed(f'素材文件处理失败: {e}')
+    db.session.commit()
+    return {'status': 'success', 'thumbnail': result['thumb'], 'preview': result['preview'],
+            'text_chars': len(result['text'] or ''), 'missing': result['missing']}
 
 @bp.route('/generate_ideas', methods=['POST'])
 async def generate_ideas(project_id: int):
@@ -86,11 +222,18 @@ def creative(project_id: int):
         db.session.commit()
         return jsonify({'status': 'success', 'id': idea.id})
     
-    projects: List[Project] = Project.query.all()  # 为侧边栏准备数据
-    inspirations: List[Inspiration] = Inspiration.query.filter_by(project_id=project_id).all()
-    ideas: List[CreativeIdea] = CreativeIdea.query.filter_by(project_id=project_id).all()
+    inspirations: List[Inspiration] = creation_queries.get_inspiration_choices(project_id)
+    page = creation_queries.creative_ideas_page(project_id)
     return render_template('project/creation/creative.html', 
                          project=project,
-                         projects=projects,
                          inspirations=inspirations,
-                         ideas=ideas)
\ No newline at end of file
+                         ideas=page.items,
+                         next_url=next_page_url('creation.creative_ideas_api', page, project_id=project_id, html=1))
+
+@bp.route('/api/creative-ideas')
+def creative_ideas_api(project_id: int):
+    """创意构思列表接口（键集分页）"""
+    project: Project = Project.query.get_or_404(project_id)
+    page = load_page(creation_queries.creative_ideas_page, project_id)
+    return page_json(page, 'creation.creative_ideas_api', {'project_id': project_id},
+                     'project/creation/_creative_idea_items.html', 'ideas', project=project)
@@ -0,0 +1,41 @@
+from flask import Blueprint, jsonify, url_for
+from app.models.job import GenerationJob
+from app.services import job_queue
+
+bp = Blueprint('jobs', __name__, url_prefix='/jobs')
+
+def accepted(job: GenerationJob, **extra):
+    """任务已创建的 202 响应"""
+    body = {
+        'status': 'accepted',
+        'job_id': job.id,
+        'status_url': url_for('jobs.job_status', job_id=job.id),
+        'result_url': url_for('jobs.job_result', job_id=job.id)
+    }
+    body.update(extra)
+    return jsonify(body), 202
+
+@bp.route('/<int:job_id>')
+def job_status(job_id):
+    """查询任务状态"""
+    job = GenerationJob.query.get_or_404(job_id)
+    return jsonify(job.to_dict())
+
+@bp.route('/<int:job_id>/result')
+def job_result(job_id):
+    """获取任务结果；未完成时返回 202，失败时返回 500"""
+    job = GenerationJob.query.get_or_404(job_id)
+    if not job.is_finished:
+        return jsonify({'status': job.status, 'error': '任务尚未完成'}), 202
+    if job.status != 'succeeded':
+        return jsonify({'status': job.status, 'error': job.error or '任务失败'}), 500
+    return jsonify(job.get_result())
+
+@bp.route('/<int:job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """取消任务"""
+    job = GenerationJob.query.get_or_404(job_id)
+    if job.is_finished:
+        return jsonify({'error': '任务已结束，无法取消', 'status': job.status}), 409
+    job = job_queue.cancel(job)
+    return jsonify(job.to_dict())
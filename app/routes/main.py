@@ -6,4 +6,14 @@ bp = Blueprint('main', __name__)
 @bp.route('/')
 def index():
     projects = Project.query.all()
-    return render_template('index.html', projects=projects)
\ No newline at end of file
+    return render_template('index.html', projects=projects)
+
+@bp.route('/api/ai-cache/stats')
+def ai_cache_stats():
+    """AI响应缓存的命中统计（当前工作进程自启动以来的计数）"""
+    from app import ai_registry
+
+    cache = ai_registry.get_cache()
+    if cache is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **cache.stats()})
@@ -0,0 +1,47 @@
+"""列表页和列表 JSON 接口共用的分页处理
+
+页面只渲染第一页，并把下一页的接口地址交给前端（main.js 中的无限滚动）；
+接口按 cursor 返回下一页，html=1 时附带渲染好的列表项，前端直接追加到列表末尾。
+"""
+from typing import Any, Callable, Dict, Optional
+
+from flask import abort, jsonify, render_template, request, url_for
+
+from app.queries.pagination import InvalidCursor, Page
+
+MAX_PAGE_SIZE = 100
+
+
+def load_page(loader: Callable[..., Page], *args: Any) -> Page:
+    """按请求中的 cursor 和 limit 取一页，游标无效时返回 400"""
+    limit = request.args.get('limit', type=int)
+    if limit is not None:
+        limit = min(max(limit, 1), MAX_PAGE_SIZE)
+    try:
+        return loader(*args, cursor=request.args.get('cursor') or None, limit=limit)
+    except InvalidCursor as e:
+        abort(400, description=str(e))
+
+
+def next_page_url(endpoint: str, page: Page, **values: Any) -> Optional[str]:
+    """下一页的接口地址（保留本次请求的 limit），没有下一页时为 None"""
+    if page.next_cursor is None:
+        return None
+    if request.args.get('limit'):
+        values.setdefault('limit', request.args['limit'])
+    return url_for(endpoint, cursor=page.next_cursor, **values)
+
+
+def page_json(page: Page, endpoint: str, url_values: Dict[str, Any], template: str,
+              item_name: str, **context: Any):
+    """分页接口的响应：items 为记录字典，next_cursor/next_url 指向下一页"""
+    want_html = bool(request.args.get('html'))
+    body: Dict[str, Any] = {
+        'items': [item.to_dict() for item in page.items],
+        'next_cursor': page.next_cursor,
+        'next_url': next_page_url(endpoint, page, **url_values, **({'html': 1} if want_html else {})),
+    }
+    if want_html:
+        context[item_name] = page.items
+        body['html'] = render_template(template, **context)
+    return jsonify(body)
@@ -3,7 +3,11 @@ from typing import List, Optional
 from app.models import Project
 from app.models.planning import InitialIdea, CreativeExpansion, BasicConcept
 from app.controllers.planning_controller import PlanningController
-from sqlalchemy import desc
+from app.services import job_queue
+from app.services.job_queue import job_handler
+from app.routes.jobs import accepted
+from app.queries import planning as planning_queries
+from app.routes.pagination import load_page, next_page_url, page_json
 
 bp = Blueprint('project_planning', __name__, url_prefix='/project/<int:project_id>/planning')
 
@@ -13,23 +17,24 @@ def view_concepts(project_id: int):
     # 获取项目信息
     project = Project.query.get_or_404(project_id)
     
-    # 获取所有构思，按创建时间倒序排列
-    concepts = BasicConcept.query.filter_by(project_id=project_id).order_by(desc(BasicConcept.created_at)).all()
-    
-    # 获取每个构思对应的创意发散信息
-    for concept in concepts:
-        concept.expansion = CreativeExpansion.query.get(concept.creative_expansion_id)
-    
-    # 获取所有项目用于侧边栏
-    projects = Project.query.all()
+    # 第一页构思（按创建时间倒序）及对应的创意发散，后续页面由前端滚动加载
+    page = planning_queries.concepts_page(project_id)
     
     return render_template(
         'planning/concepts.html',
         project=project,
-        concepts=concepts,
-        projects=projects
+        concepts=page.items,
+        next_url=next_page_url('project_planning.concepts_api', page, project_id=project_id, html=1)
     )
 
+@bp.route('/api/concepts')
+def concepts_api(project_id: int):
+    """构思列表接口（键集分页）"""
+    Project.query.get_or_404(project_id)
+    page = load_page(planning_queries.concepts_page, project_id)
+    return page_json(page, 'project_planning.concepts_api', {'project_id': project_id},
+                     'planning/_concept_items.html', 'concepts')
+
 @bp.route('/initial-idea', methods=['GET', 'POST'])
 async def initial_idea(project_id: int):
     """初始灵感管理"""
@@ -55,19 +60,21 @@ async def initial_idea(project_id: int):
             'id': idea.id
         })
     
-    # GET 请求展示表单和列表
-    # 获取所有灵感并检查是否有创意发散
-    initial_ideas = InitialIdea.query.filter_by(project_id=project_id).order_by(InitialIdea.created_at.desc()).all()
-    for idea in initial_ideas:
-        # 检查是否有对应的创意发散
-        idea.has_expansions = CreativeExpansion.query.filter_by(initial_idea_id=idea.id).first() is not None
-    
-    # 获取所有项目列表用于侧边栏
-    projects = Project.query.all()
+    # GET 请求展示表单和第一页灵感（附带是否有创意发散），后续页面由前端滚动加载
+    page = planning_queries.initial_ideas_page(project_id)
     return render_template('project/planning/initial_idea.html',
                          project=project,
-                         projects=projects,
-                         initial_ideas=initial_ideas)
+                         initial_ideas=page.items,
+                         next_url=next_page_url('project_planning.initial_ideas_api', page,
+                                                project_id=project_id, html=1))
+
+@bp.route('/api/initial-ideas')
+def initial_ideas_api(project_id: int):
+    """灵感列表接口（键集分页）"""
+    project = Project.query.get_or_404(project_id)
+    page = load_page(planning_queries.initial_ideas_page, project_id)
+    return page_json(page, 'project_planning.initial_ideas_api', {'project_id': project_id},
+                     'project/planning/_initial_idea_items.html', 'initial_ideas', project=project)
 
 @bp.route('/initial-idea/<int:idea_id>/creative-expansions', methods=['GET', 'POST'])
 async def creative_expansions(project_id: int, idea_id: int):
@@ -77,52 +84,29 @@ async def creative_expansions(project_id: int, idea_id: int):
     
     if request.method == 'POST':
         current_app.logger.info(f'Received POST request for creative expansions. Idea ID: {idea_id}')
-        try:
-            controller = PlanningController()
-            # 获取已存在的创意
-            existing_expansions = CreativeExpansion.query.filter_by(
-                initial_idea_id=idea_id
-            ).order_by(desc(CreativeExpansion.created_at)).all()
-            
-            # 生成新的创意
-            new_expansions = await controller.generate_creative_expansions(idea_id)
-            if not new_expansions:
-                return jsonify({'error': '生成创意发散失败，请重试'}), 500
-                
-            # 返回成功响应
-            return jsonify({
-                'status': 'success',
-                'count': len(new_expansions),
-                'new_expansions': [expansion.to_dict() for expansion in new_expansions]
-            })
-            
-            # 生成新的创意
-            expansions = await controller.generate_creative_expansions(idea_id)
-            if not expansions:
-                return jsonify({'error': '生成创意发散失败，请重试'}), 500
-                
-            return jsonify({
-                'status': 'success',
-                'count': len(expansions)
-            })
-        except Exception as e:
-            current_app.logger.error(f"创意生成失败: {str(e)}")
-            return jsonify({'error': '生成过程发生错误，请重试'}), 500
-    
-    # GET 请求展示创意列表
-    expansions = CreativeExpansion.query.filter_by(
-        project_id=project_id,
-        initial_idea_id=idea_id
-    ).order_by(CreativeExpansion.created_at.desc()).all()
+        # 生成耗时较长，交给后台任务执行
+        job = job_queue.enqueue('planning.creative_expansions', {'idea_id': initial_idea.id})
+        return accepted(job)
     
-    # 获取所有项目列表用于侧边栏
-    projects = Project.query.all()
+    # GET 请求展示第一页创意，后续页面由前端滚动加载
+    page = planning_queries.creative_expansions_page(project_id, idea_id)
     
     return render_template('project/planning/creative_expansions.html',
                          project=project,
-                         projects=projects,
                          initial_idea=initial_idea,
-                         expansions=expansions)
+                         expansions=page.items,
+                         next_url=next_page_url('project_planning.creative_expansions_api', page,
+                                                project_id=project_id, idea_id=idea_id, html=1))
+
+@bp.route('/api/initial-ideas/<int:idea_id>/creative-expansions')
+def creative_expansions_api(project_id: int, idea_id: int):
+    """创意发散列表接口（键集分页）；start 为前端已显示的条数，用于创意编号"""
+    project = Project.query.get_or_404(project_id)
+    page = load_page(planning_queries.creative_expansions_page, project_id, idea_id)
+    return page_json(page, 'project_planning.creative_expansions_api',
+                     {'project_id': project_id, 'idea_id': idea_id},
+                     'project/planning/_creative_expansion_items.html', 'expansions',
+                     project=project, start=request.args.get('start', 0, type=int))
 
 @bp.route('/creative-expansion/<int:expansion_id>/select', methods=['POST'])
 async def select_expansion(project_id: int, expansion_id: int):
@@ -147,15 +131,8 @@ async def basic_concept(project_id: int, expansion_id: int):
         if not expansion.is_selected:
             return jsonify({'error': '请先选择该创意方向'}), 400
             
-        controller = PlanningController()
-        concept = await controller.generate_basic_concept(expansion_id)
-        if not concept:
-            return jsonify({'error': '生成基本构思失败'}), 500
-            
-        return jsonify({
-            'status': 'success',
-            'id': concept.id
-        })
+        job = job_queue.enqueue('planning.basic_concept', {'expansion_id': expansion.id})
+        return accepted(job)
     
     # GET 请求展示基本构思
     concept = BasicConcept.query.filter_by(
@@ -163,11 +140,32 @@ async def basic_concept(project_id: int, expansion_id: int):
         creative_expansion_id=expansion_id
     ).first()
     
-    # 获取所有项目列表用于侧边栏
-    projects = Project.query.all()
-    
     return render_template('project/planning/basic_concept.html',
                          project=project,
-                         projects=projects,
                          expansion=expansion,
-                         concept=concept)
\ No newline at end of file
+                         concept=concept)
+
+@job_handler('planning.creative_expansions')
+async def creative_expansions_job(payload):
+    """后台生成创意发散"""
+    controller = PlanningController()
+    new_expansions = await controller.generate_creative_expansions(payload['idea_id'])
+    if not new_expansions:
+        raise RuntimeError('生成创意发散失败，请重试')
+    return {
+        'status': 'success',
+        'count': len(new_expansions),
+        'new_expansions': [expansion.to_dict() for expansion in new_expansions]
+    }
+
+@job_handler('planning.basic_concept')
+async def basic_concept_job(payload):
+    """后台生成作品基本构思"""
+    controller = PlanningController()
+    concept = await controller.generate_basic_concept(payload['expansion_id'])
+    if not concept:
+        raise RuntimeError('生成基本构思失败')
+    return {
+        'status': 'success',
+        'id': concept.id
+    }
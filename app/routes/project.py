@@ -1,5 +1,7 @@
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for
+from urllib.parse import quote
+from flask import Blueprint, render_template, request, jsonify, redirect, url_for, Response, stream_with_context
 from app.models import db, Project, Setting
+from app.services import export
 
 bp = Blueprint('project', __name__, url_prefix='/project')
 
@@ -47,15 +49,12 @@ def new_project():
         
         db.session.commit()
         return redirect(url_for('project.view', project_id=project.id))
-    # 获取所有项目用于侧边栏显示
-    projects = Project.query.all()
-    return render_template('project/new.html', projects=projects)
+    return render_template('project/new.html')
 
 @bp.route('/<int:project_id>')
 def view(project_id):
     project = Project.query.get_or_404(project_id)
-    projects = Project.query.all()  # 获取所有项目用于侧边栏显示
-    return render_template('project/view.html', project=project, projects=projects)
+    return render_template('project/view.html', project=project)
 
 @bp.route('/<int:project_id>/settings', methods=['GET', 'POST'])
 def settings(project_id):
@@ -78,5 +77,24 @@ def settings(project_id):
         db.session.commit()
         return jsonify({'status': 'success'})
     
-    projects = Project.query.all()  # 获取所有项目用于侧边栏显示
-    return render_template('project/settings.html', project=project, projects=projects)
\ No newline at end of file
+    return render_template('project/settings.html', project=project)
+
+@bp.route('/<int:project_id>/export.<any(epub, md, txt):fmt>')
+def export_project(project_id, fmt):
+    """导出书稿（EPUB、Markdown 或纯文本），边生成边下载
+
+    参数 settings=1 附上项目设定，concept=1 附上作品构思。
+    """
+    project = Project.query.get_or_404(project_id)
+    filename = f'{project.name}.{fmt}'
+    chunks = export.export(project, fmt,
+                           include_settings=request.args.get('settings', type=int, default=0) == 1,
+                           include_concept=request.args.get('concept', type=int, default=0) == 1)
+    return Response(
+        stream_with_context(chunks),
+        content_type=export.FORMATS[fmt],
+        headers={
+            'Content-Disposition': f"attachment; filename=\"export.{fmt}\"; filename*=UTF-8''{quote(filename)}",
+            'X-Accel-Buffering': 'no'
+        }
+    )
@@ -0,0 +1,46 @@
+from flask import Blueprint, request, jsonify, url_for
+from app.models import Project
+from app.services import search as search_index
+
+bp = Blueprint('search', __name__, url_prefix='/project/<int:project_id>/search')
+
+MAX_LIMIT = 100
+
+def _document_url(project_id: int, hit: search_index.SearchHit) -> str:
+    """命中记录的查看/编辑页面"""
+    if hit.doc_type == 'content':
+        return url_for('content.edit_content', content_id=hit.doc_id)
+    if hit.doc_type == 'outline':
+        return url_for('outline.edit_outline', outline_id=hit.doc_id)
+    if hit.doc_type == 'setting':
+        return url_for('project.settings', project_id=project_id)
+    if hit.doc_type == 'initial_idea':
+        return url_for('project_planning.creative_expansions', project_id=project_id, idea_id=hit.doc_id)
+    return url_for('concept.show_concept', concept_id=hit.doc_id)
+
+@bp.route('')
+def search(project_id: int):
+    """项目内全文搜索：q 为搜索词（空白分隔，全部命中），按相关度排序，摘要中的命中词用 <mark> 标出"""
+    Project.query.get_or_404(project_id)
+    query = request.args.get('q', '').strip()
+    limit = min(max(request.args.get('limit', 20, type=int), 1), MAX_LIMIT)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+
+    if not search_index.is_available():
+        return jsonify({'error': '当前数据库不支持全文搜索'}), 501
+
+    # 多取一条判断是否还有下一页
+    hits = search_index.search(project_id, query, limit=limit + 1, offset=offset) if query else []
+    return jsonify({
+        'query': query,
+        'offset': offset,
+        'has_more': len(hits) > limit,
+        'results': [{
+            'type': hit.doc_type,
+            'id': hit.doc_id,
+            'field': hit.field,
+            'title': hit.title,
+            'snippet': str(hit.snippet),
+            'url': _document_url(project_id, hit)
+        } for hit in hits[:limit]]
+    })
@@ -1,14 +1,15 @@
 from flask import current_app
-from typing import Union
+from typing import Optional
 
 from .base_ai_service import BaseAIService
-from .gemini_ai_service import GeminiAIService
+from .registry import AIClientRegistry
 
-def get_ai_service() -> BaseAIService:
-    """获取配置的AI服务实例"""
-    service_name = current_app.config.get('AI_SERVICE', 'gemini')
-    
-    if service_name == 'gemini':
-        return GeminiAIService()
-    else:
-        raise ValueError(f'不支持的AI服务: {service_name}')
\ No newline at end of file
+# 具体的服务实现（及其SDK）由注册表按 AI_SERVICE 配置按需导入
+
+def get_ai_service(provider: Optional[str] = None, model: Optional[str] = None) -> BaseAIService:
+    """获取配置的AI服务实例（由应用级注册表复用）"""
+    registry: Optional[AIClientRegistry] = current_app.extensions.get('ai_registry')
+    if registry is None:
+        # 未通过 create_app 注册时，退回到应用级的临时注册表
+        registry = AIClientRegistry(current_app._get_current_object())  # type: ignore
+    return registry.get(provider, model)
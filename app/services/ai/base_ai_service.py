@@ -1,9 +1,103 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Dict, FrozenSet, TypeVar
+
+from flask import current_app
+
+from .cache import AIResponseCache
+from .rate_limit import ProviderLimiter
+from .tokens import TRIM_MARKER, UsageLedger, count_tokens, fit_to_budget
+
+T = TypeVar('T')
+
+# 固定指令占满预算时，上下文至少保留的预算比例
+MIN_CONTEXT_RATIO = 0.25
 
 class BaseAIService(ABC):
     """AI服务的基类，定义了所有AI服务需要实现的接口"""
 
+    provider_name: str = 'base'
+    model_name: str = 'default'
+    # 由 AIClientRegistry 注入；只有 cacheable_features 中的功能会读写缓存
+    cache: Optional[AIResponseCache] = None
+    cacheable_features: FrozenSet[str] = frozenset()
+    # 由 AIClientRegistry 注入，同一服务商的所有实例共享配额
+    limiter: Optional[ProviderLimiter] = None
+    # 由 AIClientRegistry 注入：按功能累计 token 用量，以及每个功能的提示词 token 预算
+    usage: Optional[UsageLedger] = None
+    prompt_budgets: Dict[str, int] = {}
+    default_prompt_budget: int = 0
+
+    def _get_cached(self, feature: Optional[str], prompt: str) -> Optional[str]:
+        """读取缓存的响应，功能不可缓存时返回 None"""
+        if self.cache is None or feature not in self.cacheable_features:
+            return None
+        return self.cache.get(self.provider_name, self.model_name, feature, prompt)
+
+    def _set_cached(self, feature: Optional[str], prompt: str, value: Optional[str]) -> None:
+        """缓存成功的响应"""
+        if self.cache is None or feature not in self.cacheable_features or not value:
+            return
+        self.cache.set(self.provider_name, self.model_name, feature, prompt, value)
+
+    def _prompt_budget(self, feature: Optional[str]) -> int:
+        """功能的提示词 token 预算，0 表示不限制"""
+        if feature is None:
+            return self.default_prompt_budget
+        return int(self.prompt_budgets.get(feature, self.default_prompt_budget))
+
+    def _fit_context(self, feature: Optional[str], instructions: str, context: str) -> str:
+        """将上下文裁剪到功能预算扣除固定指令后剩余的 token 数以内
+
+        固定指令本身接近或超出预算时，上下文至少保留预算的 MIN_CONTEXT_RATIO（fit_to_budget 把 0 视为不限制）。
+        """
+        budget = self._prompt_budget(feature)
+        if budget <= 0:
+            return context
+        remaining = budget - count_tokens(instructions)
+        minimum = max(1, int(budget * MIN_CONTEXT_RATIO))
+        if remaining < minimum:
+            current_app.logger.warning(
+                f"固定指令超出预算 - {feature}：指令 {count_tokens(instructions)} tokens，"
+                f"预算 {budget} tokens，上下文按 {minimum} tokens 裁剪"
+            )
+            remaining = minimum
+        fitted = fit_to_budget(context, remaining)
+        if fitted != context:
+            current_app.logger.warning(
+                f"提示词超出预算 - {feature}：上下文 {count_tokens(context)} tokens，"
+                f"预算 {budget} tokens，已裁剪为 {count_tokens(fitted)} tokens"
+            )
+        return fitted
+
+    def _record_usage(self, feature: Optional[str], prompt: str, response_text: Optional[str],
+                      reserved: int, input_tokens: Optional[int] = None,
+                      output_tokens: Optional[int] = None) -> None:
+        """记录一次调用的输入/输出 token；服务商未返回用量时使用估算值"""
+        if input_tokens is None:
+            input_tokens = count_tokens(prompt)
+        if output_tokens is None:
+            output_tokens = count_tokens(response_text)
+        if self.usage is not None:
+            self.usage.record(feature or 'unknown', input_tokens, output_tokens,
+                              trimmed=TRIM_MARKER in prompt)
+        if self.limiter is not None:
+            self.limiter.settle(reserved, input_tokens + output_tokens)
+        budget = self._prompt_budget(feature)
+        log = current_app.logger.warning if budget and input_tokens > budget else current_app.logger.info
+        log(f"AI用量 - {feature}：输入 {input_tokens} tokens，输出 {output_tokens} tokens，预算 {budget or '不限'}")
+
+    async def _call_with_limits(self, func: Callable[[], Awaitable[T]], tokens: int = 1) -> T:
+        """在服务商配额内调用，可重试的错误（如429）自动退避重试"""
+        if self.limiter is None:
+            return await func()
+        return await self.limiter.call(func, tokens)
+
+    def _stream_with_limits(self, open_stream: Callable[[], AsyncIterator[T]], tokens: int = 1) -> AsyncIterator[T]:
+        """在服务商配额内流式调用，收到第一段之前的可重试错误（如429）自动退避重试"""
+        if self.limiter is None:
+            return open_stream()
+        return self.limiter.stream(open_stream, tokens)
+
     @abstractmethod
     async def generate_creative_ideas(self, content: str) -> Optional[List[Dict[str, str]]]:
         """基于灵感生成创意方向"""
@@ -37,4 +131,22 @@ class BaseAIService(ABC):
     @abstractmethod
     async def generate_section_content(self, section_summary: str) -> Optional[str]:
         """生成段落正文"""
-        pass
\ No newline at end of file
+        pass
+
+    async def stream_outline(self, content: str) -> AsyncIterator[str]:
+        """流式生成全文大纲，按到达顺序产出文本片段
+
+        默认实现等待完整结果后一次性产出，支持流式输出的服务应覆盖此方法。
+        """
+        outline = await self.generate_outline(content)
+        if outline:
+            yield outline
+
+    async def stream_section_content(self, section_summary: str) -> AsyncIterator[str]:
+        """流式生成段落正文，按到达顺序产出文本片段
+
+        默认实现等待完整结果后一次性产出，支持流式输出的服务应覆盖此方法。
+        """
+        content = await self.generate_section_content(section_summary)
+        if content:
+            yield content
@@ -0,0 +1,205 @@
+"""AI响应缓存
+
+两级缓存：进程内的 LRU 内存缓存（TTL + 条目数淘汰），以及基于 SQLite 的持久缓存
+（重启后保留，并由同一台机器上的所有工作进程共享）。
+缓存键由服务商、模型、功能名称和提示词的哈希组成。
+"""
+import contextlib
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, Tuple
+
+# 在当前上下文中跳过缓存（仍然会写入新结果）
+_bypass: ContextVar[bool] = ContextVar('ai_cache_bypass', default=False)
+
+
+@contextlib.contextmanager
+def bypass_cache() -> Iterator[None]:
+    """在 with 块内的AI调用不读取缓存，例如用户主动要求重新生成时"""
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def make_cache_key(provider: str, model: str, feature: str, prompt: str) -> str:
+    """生成缓存键"""
+    prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+    return f'{provider}:{model}:{feature}:{prompt_hash}'
+
+
+class MemoryCacheTier:
+    """进程内 LRU 缓存"""
+
+    def __init__(self, max_entries: int = 512, ttl: float = 3600) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: 'OrderedDict[str, Tuple[float, str]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._data[key] = (time.time() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCacheTier:
+    """基于 SQLite 的持久缓存，多个进程可同时读写同一个文件"""
+
+    def __init__(self, path: str, max_entries: int = 20000, ttl: float = 7 * 24 * 3600) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS ai_cache ('
+            ' key TEXT PRIMARY KEY,'
+            ' value TEXT NOT NULL,'
+            ' expires_at REAL NOT NULL,'
+            ' accessed_at REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_ai_cache_accessed_at ON ai_cache (accessed_at)')
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 连接不能跨线程使用，每个线程持有自己的连接
+        conn: Optional[sqlite3.Connection] = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute(
+            'SELECT value, expires_at FROM ai_cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at < now:
+            conn.execute('DELETE FROM ai_cache WHERE key = ?', (key,))
+            return None
+        conn.execute('UPDATE ai_cache SET accessed_at = ? WHERE key = ?', (now, key))
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            'INSERT OR REPLACE INTO ai_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)',
+            (key, value, now + self.ttl, now)
+        )
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self.evict()
+
+    def evict(self) -> None:
+        """删除过期条目，并按最近访问时间裁剪到 max_entries"""
+        conn = self._connect()
+        conn.execute('DELETE FROM ai_cache WHERE expires_at < ?', (time.time(),))
+        conn.execute(
+            'DELETE FROM ai_cache WHERE key IN ('
+            ' SELECT key FROM ai_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,)
+        )
+
+    def clear(self) -> None:
+        self._connect().execute('DELETE FROM ai_cache')
+
+
+class AIResponseCache:
+    """AI响应的两级缓存，带命中统计"""
+
+    def __init__(self, memory: MemoryCacheTier, disk: Optional[SQLiteCacheTier] = None) -> None:
+        self.memory = memory
+        self.disk = disk
+        self._stats: Dict[str, int] = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'writes': 0, 'bypassed': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def get(self, provider: str, model: str, feature: str, prompt: str) -> Optional[str]:
+        """读取缓存；在 bypass_cache() 内始终返回 None"""
+        if _bypass.get():
+            self._count('bypassed')
+            return None
+
+        key = make_cache_key(provider, model, feature, prompt)
+        value = self.memory.get(key)
+        if value is not None:
+            self._count('memory_hits')
+            return value
+
+        if self.disk is not None:
+            try:
+                value = self.disk.get(key)
+            except sqlite3.Error:
+                value = None
+            if value is not None:
+                self.memory.set(key, value)
+                self._count('disk_hits')
+                return value
+
+        self._count('misses')
+        return None
+
+    def set(self, provider: str, model: str, feature: str, prompt: str, value: str) -> None:
+        """写入两级缓存"""
+        key = make_cache_key(provider, model, feature, prompt)
+        self.memory.set(key, value)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, value)
+            except sqlite3.Error:
+                # 持久层写入失败不影响本次结果
+                pass
+        self._count('writes')
+
+    def stats(self) -> Dict[str, int]:
+        """命中/未命中计数"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['memory_entries'] = len(self.memory)
+        return stats
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
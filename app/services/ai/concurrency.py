@@ -0,0 +1,130 @@
+"""AI调用的并发控制
+
+模型SDK的同步调用会占住事件循环，这里把它们统一放到一个进程级的有界线程池中执行。
+线程池的大小即为每个进程允许同时进行的模型调用数（配置项 AI_MAX_CONCURRENCY）。
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar('T')
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor(max_workers: int) -> ThreadPoolExecutor:
+    """获取进程级的AI调用线程池，首次调用时按 max_workers 创建"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=max(1, max_workers),
+                    thread_name_prefix='ai-call'
+                )
+    return _executor
+
+
+class SharedSemaphore:
+    """可以在多个线程的事件循环之间共享的信号量
+
+    asyncio.Semaphore 只能在创建它的事件循环中使用；这里用线程锁计数，等待时 asyncio.sleep 轮询。
+    """
+
+    def __init__(self, value: int, poll_interval: float = 0.05) -> None:
+        self.value = max(1, value)
+        self.poll_interval = poll_interval
+        self.in_use = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.in_use < self.value:
+                self.in_use += 1
+                return True
+            return False
+
+    async def acquire(self) -> None:
+        while not self.try_acquire():
+            await asyncio.sleep(self.poll_interval)
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_use = max(0, self.in_use - 1)
+
+    async def __aenter__(self) -> 'SharedSemaphore':
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self.release()
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, max_workers: int = 8, **kwargs: Any) -> T:
+    """在线程池中执行阻塞调用，等待期间不占用事件循环"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_executor(max_workers),
+        functools.partial(func, *args, **kwargs)
+    )
+
+
+async def stream_blocking(make_iter: Callable[[], Iterable[T]], max_workers: int = 8) -> AsyncIterator[T]:
+    """在线程池中消费阻塞的迭代器（如SDK的流式响应），逐项转交给事件循环
+
+    调用方提前停止迭代时，工作线程会在取到下一项后退出并释放线程池名额。
+    """
+    loop = asyncio.get_running_loop()
+    queue: 'asyncio.Queue[Any]' = asyncio.Queue()
+    finished = object()
+    stopped = threading.Event()
+
+    def put(item: Any) -> None:
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            # 事件循环已关闭（客户端断开），直接丢弃
+            stopped.set()
+
+    def produce() -> None:
+        try:
+            for item in make_iter():
+                if stopped.is_set():
+                    break
+                put(item)
+        except BaseException as e:  # 交给消费方重新抛出
+            put(e)
+        finally:
+            put(finished)
+
+    loop.run_in_executor(get_executor(max_workers), produce)
+    try:
+        while True:
+            item = await queue.get()
+            if item is finished:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stopped.set()
+
+
+def iterate_async(agen: AsyncIterator[T]) -> Iterator[T]:
+    """在同步代码（如 WSGI 流式响应）中消费异步迭代器，使用独立的事件循环驱动"""
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(agen.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        aclose = getattr(agen, 'aclose', None)
+        if aclose is not None:
+            loop.run_until_complete(aclose())
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
@@ -0,0 +1,196 @@
+"""本地假AI服务
+
+AI_SERVICE=fake 时使用，不需要API密钥，也不访问网络。所有方法返回符合格式要求的固定内容
+（创意发散为5个方向的数组，全文构思包含全部28个字段），相同输入总是得到相同输出。
+响应延迟、流式输出的片段大小和间隔、限流错误的比例都可以配置，
+调用同样经过缓存、限流和 token 统计，可以离线对整个系统做基准测试和压力测试。
+"""
+import asyncio
+import hashlib
+import json
+import random
+import threading
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from flask import current_app
+
+from app.models.planning import CONCEPT_FIELD_GROUPS
+from app.services.ai.base_ai_service import BaseAIService
+from app.services.ai.rate_limit import RateLimitError
+from app.services.ai.tokens import estimate_tokens
+
+_GENRES = ['奇幻小说', '科幻小说', '悬疑小说', '历史小说', '都市小说']
+_INT_FIELDS = {'word_count_target', 'estimated_chapters'}
+
+
+class FakeAIService(BaseAIService):
+    provider_name = 'fake'
+
+    def __init__(self, model_name: Optional[str] = None) -> None:
+        """初始化假AI服务，参数从 FAKE_AI_* 配置读取"""
+        config = current_app.config
+        self.model_name = model_name or 'fake'
+        self.latency = float(config.get('FAKE_AI_LATENCY', 0.05))
+        self.chunk_size = max(1, int(config.get('FAKE_AI_CHUNK_SIZE', 16)))
+        self.chunk_interval = float(config.get('FAKE_AI_CHUNK_INTERVAL', 0.02))
+        self.error_rate = float(config.get('FAKE_AI_ERROR_RATE', 0.0))
+        # 错误按固定种子的随机序列注入，同样的调用顺序得到同样的错误分布
+        self._random = random.Random(int(config.get('FAKE_AI_SEED', 0)))
+        self._random_lock = threading.Lock()
+        current_app.logger.info(
+            f"Initialized fake AI service: latency={self.latency}s, chunk={self.chunk_size}/"
+            f"{self.chunk_interval}s, error_rate={self.error_rate}"
+        )
+
+    # ---- 模拟调用 ----
+
+    def _maybe_fail(self) -> None:
+        with self._random_lock:
+            failed = self.error_rate > 0 and self._random.random() < self.error_rate
+        if failed:
+            raise RateLimitError('fake rate limit exceeded', retry_after=0.1)
+
+    async def _respond(self, feature: str, prompt: str, text: str) -> Optional[str]:
+        """模拟一次完整调用：等待延迟后返回 text，经过缓存、限流和用量统计"""
+        cached = self._get_cached(feature, prompt)
+        if cached is not None:
+            return cached
+
+        async def call() -> str:
+            await asyncio.sleep(self.latency)
+            self._maybe_fail()
+            return text
+
+        reserved = estimate_tokens(prompt)
+        try:
+            response_text = await self._call_with_limits(call, reserved)
+        except Exception as e:
+            current_app.logger.error(f"假AI服务调用失败 - {feature}: {str(e)}")
+            return None
+        self._record_usage(feature, prompt, response_text, reserved)
+        self._set_cached(feature, prompt, response_text)
+        return response_text
+
+    async def _stream(self, feature: str, prompt: str, text: str) -> AsyncIterator[str]:
+        """模拟流式调用：等待首段延迟后按固定大小和间隔逐段产出"""
+        cached = self._get_cached(feature, prompt)
+        if cached is not None:
+            yield cached
+            return
+
+        async def open_stream() -> AsyncIterator[str]:
+            await asyncio.sleep(self.latency)
+            self._maybe_fail()
+            for start in range(0, len(text), self.chunk_size):
+                if start:
+                    await asyncio.sleep(self.chunk_interval)
+                yield text[start:start + self.chunk_size]
+
+        reserved = estimate_tokens(prompt)
+        chunks = self._stream_with_limits(open_stream, reserved)
+        try:
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+        self._record_usage(feature, prompt, text, reserved)
+        self._set_cached(feature, prompt, text)
+
+    # ---- 固定内容 ----
+
+    @staticmethod
+    def _tag(*parts: Any) -> str:
+        """由输入得到的短标识，使不同输入的输出可以区分"""
+        digest = hashlib.sha256('\x00'.join(str(p) for p in parts).encode('utf-8')).hexdigest()
+        return digest[:8]
+
+    def _concept(self, source: str) -> Dict[str, Any]:
+        tag = self._tag('concept', source)
+        data: Dict[str, Any] = {}
+        for _, title, fields in CONCEPT_FIELD_GROUPS:
+            for field in fields:
+                if field == 'word_count_target':
+                    data[field] = 300000
+                elif field == 'estimated_chapters':
+                    data[field] = 12
+                else:
+                    data[field] = f'【{title}】{field} 的示例设定（{tag}）'
+        return data
+
+    def _paragraphs(self, title: str, source: str, count: int) -> str:
+        tag = self._tag(title, source)
+        return '\n'.join(
+            f'{index}. {title}示例内容，第{index}部分（{tag}）：情节推进，人物互动，情感变化。'
+            for index in range(1, count + 1)
+        )
+
+    def _outline_text(self, content: str) -> str:
+        return self._paragraphs('全文大纲', content, 8)
+
+    def _section_content_text(self, section_summary: str) -> str:
+        return self._paragraphs('段落正文', section_summary, 12)
+
+    # ---- BaseAIService 接口 ----
+
+    async def generate_creative_ideas(self, content: str) -> Optional[List[Dict[str, str]]]:
+        """基于灵感生成创意方向"""
+        tag = self._tag('creative_ideas', content)
+        ideas = [{
+            'summary': f'创意方向{index + 1}：围绕灵感展开的故事（{tag}）',
+            'genre': _GENRES[index],
+            'theme': f'主题{index + 1}',
+            'innovation': f'创新点{index + 1}'
+        } for index in range(5)]
+        response = await self._respond('creative_ideas', content, json.dumps(ideas, ensure_ascii=False))
+        return json.loads(response) if response else None
+
+    async def generate_concept(self, prompt: str) -> Optional[Dict[str, Any]]:
+        """生成全文构思"""
+        concept = json.dumps(self._concept(prompt), ensure_ascii=False)
+        response = await self._respond('concept', prompt, concept)
+        return json.loads(response) if response else None
+
+    async def enhance_basic_concept(self, expansion: Dict[str, str]) -> Optional[Dict[str, str]]:
+        """基于创意发散生成全文构思"""
+        source = json.dumps(expansion, ensure_ascii=False, sort_keys=True, default=str)
+        concept = json.dumps(self._concept(source), ensure_ascii=False)
+        response = await self._respond('basic_concept', source, concept)
+        return json.loads(response) if response else None
+
+    async def generate_outline(self, content: str) -> Optional[str]:
+        """生成全文大纲"""
+        return await self._respond('outline', content, self._outline_text(content))
+
+    async def stream_outline(self, content: str) -> AsyncIterator[str]:
+        """流式生成全文大纲"""
+        async for chunk in self._stream('outline', content, self._outline_text(content)):
+            yield chunk
+
+    async def generate_chapter_outline(self, outline: str, chapter_number: int) -> Optional[List[str]]:
+        """生成章节大纲"""
+        prompt = f'{chapter_number}\n{outline}'
+        content = await self._respond('chapter_outline', prompt,
+                                      self._paragraphs(f'第{chapter_number}章大纲', outline, 5))
+        return content.split('\n') if content else None
+
+    async def generate_section_outline(self, chapter_outline: str, section_number: int) -> Optional[str]:
+        """生成段落大纲"""
+        prompt = f'{section_number}\n{chapter_outline}'
+        return await self._respond('section_outline', prompt,
+                                   self._paragraphs(f'第{section_number}节大纲', chapter_outline, 4))
+
+    async def generate_section_summary(self, section_outline: str) -> Optional[str]:
+        """生成段落概要"""
+        return await self._respond('section_summary', section_outline,
+                                   self._paragraphs('段落概要', section_outline, 3))
+
+    async def generate_section_content(self, section_summary: str) -> Optional[str]:
+        """生成段落正文"""
+        return await self._respond('section_content', section_summary,
+                                   self._section_content_text(section_summary))
+
+    async def stream_section_content(self, section_summary: str) -> AsyncIterator[str]:
+        """流式生成段落正文"""
+        async for chunk in self._stream('section_content', section_summary,
+                                        self._section_content_text(section_summary)):
+            yield chunk
@@ -1,148 +1,243 @@
-from typing import Any, Dict, List, Optional, TypeVar, Union, cast
+import asyncio
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, TypeVar, Union, cast
 import google.generativeai as genai  # type: ignore
 from flask import current_app
 import json
 from typing_extensions import TypeAlias
 
+from app.models.planning import CONCEPT_FIELD_GROUPS
 from app.services.ai.base_ai_service import BaseAIService
+from app.services.ai.concurrency import run_blocking, stream_blocking
+from app.services.ai.json_stream import JSONObjectStreamParser, JSONStreamError
+from app.services.ai.tokens import count_tokens, estimate_tokens
 
 T = TypeVar('T')
 JSONValue: TypeAlias = Union[str, int, float, bool, None, Dict[str, Any], List[Any]]
 JSONObject: TypeAlias = Dict[str, JSONValue]
 JSONList: TypeAlias = List[JSONObject]
 
+# 全文构思（BasicConcept）的字段
+CONCEPT_INT_FIELDS = ["word_count_target", "estimated_chapters"]
+CONCEPT_STR_FIELDS = [
+    field for _, _, fields in CONCEPT_FIELD_GROUPS for field in fields
+    if field not in CONCEPT_INT_FIELDS
+]
+CONCEPT_FIELD_DESCRIPTIONS = {
+    "world_setting": "详细的时代背景、社会环境介绍",
+    "culture_background": "具体的文化背景、风俗习惯、社会制度描述",
+    "special_elements": "特殊元素（如魔法系统、科技水平等）的具体设定",
+    "core_conflict": "核心矛盾和冲突的本质及其社会/个人意义",
+    "plot_outline": "完整的故事大纲，包括开端、发展、高潮、结局",
+    "subplot_design": "2-3条重要子情节的设计及其与主线的关系",
+    "key_events": "5-8个关键事件的具体设计",
+    "plot_progression": "情节推进的方式和节奏控制的具体规划",
+    "main_characters": "3-5个主要人物的详细设定（性格、背景、动机等）",
+    "supporting_characters": "5-8个重要配角的简要设定",
+    "character_relationships": "主要人物之间的关系网络及其演变",
+    "character_arcs": "主要人物的成长轨迹和改变历程",
+    "theme_design": "核心主题的具体阐释和表达方式",
+    "philosophical_elements": "作品中的哲学思考和意义探讨",
+    "social_commentary": "对现实社会问题的隐喻和思考",
+    "symbolic_system": "重要象征元素的系统设计",
+    "narrative_perspective": "叙事视角的选择及其效果分析",
+    "timeline_structure": "时间线的具体安排和特殊处理",
+    "pacing_design": "故事节奏的具体规划和情感曲线",
+    "foreshadowing": "主要伏笔的设置和呼应设计",
+    "writing_style": "整体写作风格的定位和特点",
+    "language_features": "语言特色的具体规划",
+    "atmosphere_building": "不同场景的氛围营造方式",
+    "literary_devices": "计划使用的主要文学手法",
+    "chapter_structure": "章节的组织结构和划分原则",
+    "volume_planning": "分卷的规划（如果需要）",
+    "word_count_target": "预计字数（整数）",
+    "estimated_chapters": "预计章节数（整数）"
+}
+
 class GeminiAIService(BaseAIService):
+    provider_name = 'gemini'
     api_key: Optional[str]
+    model_name: str
     model: Any  # Using Any since we can't properly type hint the GenerativeModel
+    max_concurrency: int
     
-    def __init__(self) -> None:
-        """初始化 Gemini AI 服务"""
+    def __init__(self, model_name: Optional[str] = None) -> None:
+        """初始化 Gemini AI 服务
+
+        实例不保存请求级状态，可以在线程之间共享，通常由 AIClientRegistry 创建并复用。
+        """
         # 从配置中获取API密钥
         api_key = current_app.config.get('GEMINI_API_KEY', '')  # type: ignore
         if not api_key:
             raise ValueError("Gemini API key not found in configuration")
         
+        self.model_name = model_name or current_app.config.get('GEMINI_MODEL', 'gemini-2.5-pro')
         try:
-            # 初始化Google AI配置和模型
-            genai.configure(api_key=api_key)  # type: ignore
-            self.model = genai.GenerativeModel('gemini-2.5-pro')  # type: ignore
+            # 初始化Google AI配置和模型；底层连接随实例长期保持，复用于后续请求
+            genai.configure(  # type: ignore
+                api_key=api_key,
+                transport=current_app.config.get('GEMINI_TRANSPORT', 'grpc')
+            )
+            self.model = genai.GenerativeModel(self.model_name)  # type: ignore
             self.api_key = api_key
-            current_app.logger.info("Initialized Gemini AI service with model: gemini-2.5-pro")
+            self.max_concurrency = int(current_app.config.get('AI_MAX_CONCURRENCY', 8))
+            current_app.logger.info(f"Initialized Gemini AI service with model: {self.model_name}")
         except Exception as e:
             current_app.logger.error(f"Failed to initialize Gemini AI service: {str(e)}")
             raise
 
-    def _validate_concept_data(self, concept_data: Dict[str, Any]) -> None:
-        """验证生成的概念数据的有效性"""
-        required_fields = [
-            "world_setting", "culture_background", "special_elements",
-            "core_conflict", "plot_outline", "subplot_design",
-            "key_events", "plot_progression", "main_characters",
-            "supporting_characters", "character_relationships",
-            "character_arcs", "theme_design", "philosophical_elements",
-            "social_commentary", "symbolic_system", "narrative_perspective",
-            "timeline_structure", "pacing_design", "foreshadowing",
-            "writing_style", "language_features", "atmosphere_building",
-            "literary_devices", "chapter_structure", "volume_planning",
-            "word_count_target", "estimated_chapters"
-        ]
-        
-        for field in required_fields:
-            if field not in concept_data:
-                raise ValueError(f"缺少必要字段: {field}")
+    @staticmethod
+    def _usage_counts(response: Any) -> Dict[str, Optional[int]]:
+        """读取响应中服务商返回的实际 token 用量"""
+        metadata = getattr(response, 'usage_metadata', None)
+        return {
+            'input_tokens': getattr(metadata, 'prompt_token_count', None) or None,
+            'output_tokens': getattr(metadata, 'candidates_token_count', None) or None
+        }
 
     def _process_concept_data(self, concept_data: Dict[str, Any]) -> Dict[str, Any]:
         """处理生成的概念数据"""
         # 确保所有字段都被转换为字符串（除了整数字段）
-        str_fields = [
-            "world_setting", "culture_background", "special_elements",
-            "core_conflict", "plot_outline", "subplot_design",
-            "key_events", "plot_progression", "main_characters",
-            "supporting_characters", "character_relationships",
-            "character_arcs", "theme_design", "philosophical_elements",
-            "social_commentary", "symbolic_system", "narrative_perspective",
-            "timeline_structure", "pacing_design", "foreshadowing",
-            "writing_style", "language_features", "atmosphere_building",
-            "literary_devices", "chapter_structure", "volume_planning"
-        ]
-        
-        for field in str_fields:
+        for field in CONCEPT_STR_FIELDS:
             if isinstance(concept_data.get(field), (dict, list)):
                 concept_data[field] = json.dumps(concept_data[field], ensure_ascii=False)
             elif not isinstance(concept_data.get(field), str):
                 concept_data[field] = str(concept_data.get(field, ''))
                 
         # 确保整数字段是整数
-        int_fields = ["word_count_target", "estimated_chapters"]
-        for field in int_fields:
+        for field in CONCEPT_INT_FIELDS:
+            value = concept_data.get(field, 0)
+            if isinstance(value, str):
+                value = value.strip().replace(',', '')
             try:
-                concept_data[field] = int(concept_data.get(field, 0))
+                concept_data[field] = int(value)
             except (TypeError, ValueError):
                 concept_data[field] = 0
                 
         return concept_data
 
-    async def generate_concept(self, prompt: str) -> Optional[Dict[str, Any]]:
-        """生成全文构思"""
-        response = await self._generate_content(prompt, "全文构思生成")
-        if not response:
-            return None
-            
-        try:
-            # 尝试清理响应文本，移除可能的前后缀
-            cleaned_response = response.strip()
-            if cleaned_response.startswith('```json'):
-                cleaned_response = cleaned_response[7:]
-            if cleaned_response.endswith('```'):
-                cleaned_response = cleaned_response[:-3]
-            cleaned_response = cleaned_response.strip()
-            
-            # 将所有行尾的换行符移除，确保JSON格式正确
-            cleaned_response = cleaned_response.replace('\n', ' ').replace('\r', '')
-            # 去除多余的空格
-            cleaned_response = ' '.join(cleaned_response.split())
-            
-            # 尝试预验证JSON格式
-            try:
-                # 先尝试解析一次，如果失败就记录错误的具体位置
-                json.loads(cleaned_response)
-            except json.JSONDecodeError as e:
-                current_app.logger.error(f"JSON预验证失败: {str(e)}")
-                current_app.logger.error(f"错误位置附近的内容: {cleaned_response[max(0, e.pos-50):min(len(cleaned_response), e.pos+50)]}")
-                raise
+    async def _stream_json_object(self, prompt: str, feature_name: str, feature: str,
+                                  fields: List[str]) -> Optional[Dict[str, Any]]:
+        """流式生成包含指定字段的JSON对象
 
-            current_app.logger.info(f"清理后的JSON响应: {cleaned_response[:200]}...")
-            
-            # 解析JSON
-            concept_data = json.loads(cleaned_response)
-            # 验证必要字段
-            self._validate_concept_data(concept_data)
-            # 处理字段数据类型
-            processed_data = self._process_concept_data(concept_data)
-            return processed_data
-            
-        except json.JSONDecodeError as e:
-            current_app.logger.error(f"解析JSON失败: {str(e)}")
-            return None
-        except ValueError as e:
-            current_app.logger.error(f"概念数据验证失败: {str(e)}")
+        边接收边解析并校验字段，结构明显错误时立即中止请求；对象完整后即停止接收。
+        """
+        parser = JSONObjectStreamParser(fields, [f for f in fields if f in CONCEPT_INT_FIELDS])
+        stream = self._stream_content(prompt, feature_name, feature=feature)
+        try:
+            async for chunk in stream:
+                if parser.feed(chunk):
+                    break
+            return parser.result()
+        except JSONStreamError as e:
+            current_app.logger.error(
+                f"{feature_name}JSON校验失败，已中止请求（已收到 {parser.received_fields} 个字段）: {str(e)}"
+            )
             return None
         except Exception as e:
-            current_app.logger.error(f"处理概念数据时发生未知错误: {str(e)}")
+            current_app.logger.error(f"{feature_name}失败: {str(e)}")
+            return None
+        finally:
+            await stream.aclose()
+
+    async def _generate_concept_data(self, prompt: str, feature_name: str,
+                                     feature: str) -> Optional[Dict[str, Any]]:
+        """一次调用生成全部构思字段"""
+        concept_data = await self._stream_json_object(
+            prompt, feature_name, feature, CONCEPT_STR_FIELDS + CONCEPT_INT_FIELDS
+        )
+        return self._process_concept_data(concept_data) if concept_data else None
+
+    async def _generate_concept_sectioned(self, concept_info: str) -> Optional[Dict[str, Any]]:
+        """按字段分组并发生成全文构思
+
+        先生成一份简短的构思基调，各分组都以它为依据，保证分别生成的内容彼此一致；
+        随后各分组并发生成，总耗时取决于最慢的分组而不是所有分组之和。
+        """
+        seed_prompt = f"""你是一个专业的小说策划顾问。请基于以下创意信息，写一份300字以内的构思基调，
+作为后续各部分分工策划的共同依据。构思基调需要明确：
+1. 作品定位与整体基调
+2. 世界的核心设定
+3. 主角及其核心欲望
+4. 核心冲突与故事走向（包括结局方向）
+
+直接输出构思基调，不要添加额外说明。
+
+创意信息：
+{concept_info}"""
+        seed = await self._generate_content(seed_prompt, "构思基调生成", feature="concept_seed")
+        if not seed:
             return None
-            # 尝试解析一次，如果失败就记录错误的具体位置
-            json.loads(cleaned_response)
 
-            current_app.logger.info(f"清理后的JSON响应: {cleaned_response[:200]}...")
+        results = await asyncio.gather(*[
+            self._generate_concept_group(key, title, list(fields), concept_info, seed)
+            for key, title, fields in CONCEPT_FIELD_GROUPS
+        ])
+        failed = [title for (_, title, _), result in zip(CONCEPT_FIELD_GROUPS, results) if result is None]
+        if failed:
+            current_app.logger.error(f"全文构思分组生成失败: {', '.join(failed)}")
+            return None
+
+        concept_data: Dict[str, Any] = {}
+        for result in results:
+            concept_data.update(result or {})
+        return self._process_concept_data(concept_data)
+
+    async def _generate_concept_group(self, key: str, title: str, fields: List[str],
+                                      concept_info: str, seed: str) -> Optional[Dict[str, Any]]:
+        """生成一个字段分组；格式错误时只重新生成这一组"""
+        template = ',\n'.join(
+            f'    "{field}": {CONCEPT_FIELD_DESCRIPTIONS[field]}' if field in CONCEPT_INT_FIELDS
+            else f'    "{field}": "{CONCEPT_FIELD_DESCRIPTIONS[field]}"'
+            for field in fields
+        )
+        prompt = f"""你是一个专业的小说策划顾问。你的任务是基于创意信息和构思基调，完成长篇小说构思方案中"{title}"部分。
+其他部分由其他策划同时完成，请严格遵循构思基调中的设定，保证与其他部分一致。
+请以JSON格式返回，只包含以下字段（注意：必须返回可解析的JSON，不要添加额外说明）：
+
+{{
+{template}
+}}
+
+要求：
+1. 内容必须详尽、具体，可以直接指导创作
+2. 所有设计围绕构思基调中的核心主题和冲突展开
+3. 充分考虑商业价值和艺术价值的平衡
+
+创意信息：
+{concept_info}
+
+构思基调：
+{seed}"""
+
+        for attempt in range(2):
+            data = await self._stream_json_object(prompt, f"全文构思（{title}）", f"concept_{key}", fields)
+            if data is not None:
+                return data
+            if attempt == 0:
+                # 各分组同时失败时（多为限流）错开重试时间，避免一起再次触发限流
+                delay = self.limiter.backoff(attempt) if self.limiter is not None else 0.0
+                current_app.logger.warning(f"全文构思（{title}）生成失败，{delay:.1f} 秒后重新生成该分组")
+                await asyncio.sleep(delay)
+        return None
+
+    async def generate_concept(self, prompt: str) -> Optional[Dict[str, Any]]:
+        """生成全文构思"""
+        return await self._generate_concept_data(prompt, "全文构思生成", feature="concept")
 
-            # 解析JSON
-            concept_data = json.loads(cleaned_response)
+    async def _generate_content(self, prompt: str, feature_name: str = "未指定功能",
+                                feature: Optional[str] = None) -> Optional[str]:
+        """生成内容的通用方法
 
-    async def _generate_content(self, prompt: str, feature_name: str = "未指定功能") -> Optional[str]:
-        """生成内容的通用方法"""
+        feature 为稳定的功能标识（如 'outline'），用于缓存等按功能区分的处理。
+        """
         import time
         from datetime import datetime
 
+        cached = self._get_cached(feature, prompt)
+        if cached is not None:
+            current_app.logger.info(f"AI缓存命中 - {feature_name}")
+            return cached
+
         start_time = time.time()
         try:
             # 记录请求开始
@@ -151,14 +246,21 @@ class GeminiAIService(BaseAIService):
                 f"\n{'='*80}\n"
                 f"AI请求开始 - {feature_name}\n"
                 f"时间: {request_time}\n"
-                f"模型: gemini-2.5-pro\n"
-                f"提示词长度: {len(prompt)} 字符\n"
+                f"模型: {self.model_name}\n"
+                f"提示词长度: {len(prompt)} 字符（约 {count_tokens(prompt)} tokens）\n"
                 f"提示词前200字符: {prompt[:200]}...\n"
                 f"{'='*80}"
             )
 
-            # 生成内容
-            response = self.model.generate_content(prompt)
+            # 生成内容（在有界线程池中执行，避免阻塞事件循环；限流错误按退避策略重试）
+            reserved = estimate_tokens(prompt)
+            response = await self._call_with_limits(
+                lambda: run_blocking(
+                    self.model.generate_content, prompt,
+                    max_workers=self.max_concurrency
+                ),
+                reserved
+            )
             
             # 计算用时
             end_time = time.time()
@@ -178,6 +280,8 @@ class GeminiAIService(BaseAIService):
                 f"{'='*80}"
             )
             
+            self._record_usage(feature, prompt, response_text, reserved, **self._usage_counts(response))
+            self._set_cached(feature, prompt, response_text)
             return response_text
             
         except Exception as e:
@@ -193,6 +297,75 @@ class GeminiAIService(BaseAIService):
             )
             return None
 
+    async def _stream_content(self, prompt: str, feature_name: str = "未指定功能",
+                              feature: Optional[str] = None) -> AsyncIterator[str]:
+        """流式生成内容的通用方法，按模型返回的顺序逐段产出文本
+
+        出错时记录日志并向调用方抛出异常，以便流式接口向客户端报告失败。
+        """
+        import time
+
+        cached = self._get_cached(feature, prompt)
+        if cached is not None:
+            current_app.logger.info(f"AI缓存命中 - {feature_name}")
+            yield cached
+            return
+
+        usage: Dict[str, Optional[int]] = {}
+
+        def open_stream() -> Iterator[str]:
+            for chunk in self.model.generate_content(prompt, stream=True):
+                # 用量信息随最后一个片段返回
+                if getattr(chunk, 'usage_metadata', None) is not None:
+                    usage.update(self._usage_counts(chunk))
+                text = getattr(chunk, 'text', None)
+                if text:
+                    yield text
+
+        start_time = time.time()
+        first_chunk_time: Optional[float] = None
+        parts: List[str] = []
+        current_app.logger.info(
+            f"AI流式请求开始 - {feature_name}，模型: {self.model_name}，"
+            f"提示词长度: {len(prompt)} 字符（约 {count_tokens(prompt)} tokens）"
+        )
+        reserved = estimate_tokens(prompt)
+        # 收到第一段之前的限流等错误按退避策略重试，每次重试重新发起请求
+        chunks = self._stream_with_limits(
+            lambda: stream_blocking(open_stream, max_workers=self.max_concurrency), reserved
+        )
+        try:
+            try:
+                async for text in chunks:
+                    if first_chunk_time is None:
+                        first_chunk_time = time.time() - start_time
+                    parts.append(text)
+                    yield text
+            finally:
+                # 提前结束时立即停止后台线程继续读取模型输出
+                await chunks.aclose()
+        except GeneratorExit:
+            # 调用方提前停止读取（如JSON已完整或校验失败），按已收到的部分记录用量
+            current_app.logger.info(
+                f"AI流式请求提前结束 - {feature_name}，已接收 {len(''.join(parts))} 字符，"
+                f"用时: {time.time() - start_time:.2f} 秒"
+            )
+            self._record_usage(feature, prompt, ''.join(parts), reserved, **usage)
+            raise
+        except Exception as e:
+            current_app.logger.error(
+                f"AI流式请求失败 - {feature_name}，错误类型: {type(e).__name__}，错误信息: {str(e)}"
+            )
+            raise
+
+        response_text = ''.join(parts)
+        current_app.logger.info(
+            f"AI流式响应完成 - {feature_name}，首段用时: {first_chunk_time or 0:.2f} 秒，"
+            f"总用时: {time.time() - start_time:.2f} 秒，响应长度: {len(response_text)} 字符"
+        )
+        self._record_usage(feature, prompt, response_text, reserved, **usage)
+        self._set_cached(feature, prompt, response_text)
+
     async def generate_creative_ideas(self, content: str) -> Optional[List[Dict[str, str]]]:
         """基于灵感生成创意方向"""
         system_prompt = """你是一个专业的创意顾问。你的任务是基于用户提供的灵感，生成5个不同方向的创意构思。
@@ -216,10 +389,11 @@ class GeminiAIService(BaseAIService):
         5. 不要在JSON前后添加任何额外的文字说明
         """
 
+        content = self._fit_context('creative_ideas', system_prompt, content)
         prompt = system_prompt + f"\n\n基于以下灵感，生成5个不同的创意方向：\n{content}"
         response = None  # 初始化response变量
         try:
-            response = await self._generate_content(prompt, "创意发散生成")
+            response = await self._generate_content(prompt, "创意发散生成", feature="creative_ideas")
             if not response:
                 current_app.logger.error("Gemini AI返回空响应")
                 return None
@@ -318,41 +492,16 @@ class GeminiAIService(BaseAIService):
 主题：{expansion.get('theme', '')}
 创新点：{expansion.get('innovation_points', '')}"""
 
-        prompt = system_prompt + f"\n\n基于以下创意信息，生成完整的长篇小说构思方案：\n{concept_info}"
-        response = await self._generate_content(prompt, "全文构思生成")
-        if not response:
-            return None
-            
-        try:
-            # 尝试清理响应文本，移除可能的前后缀
-            cleaned_response = response.strip()
-            if cleaned_response.startswith('```json'):
-                cleaned_response = cleaned_response[7:]
-            if cleaned_response.endswith('```'):
-                cleaned_response = cleaned_response[:-3]
-            cleaned_response = cleaned_response.strip()
-
-            current_app.logger.info(f"清理后的JSON响应: {cleaned_response[:200]}...")
+        concept_info = self._fit_context('basic_concept', system_prompt, concept_info)
+        if current_app.config.get('CONCEPT_GENERATION_MODE', 'sectioned') == 'sectioned':
+            return await self._generate_concept_sectioned(concept_info)
 
-            # 尝试解析JSON响应
-            concept_data = json.loads(cleaned_response)
-            # 验证必要字段
-            self._validate_concept_data(concept_data)
-            # 处理字段数据类型
-            processed_data = self._process_concept_data(concept_data)
-            return processed_data
-            
-        except json.JSONDecodeError as e:
-            current_app.logger.error(f"解析全文构思JSON失败: {str(e)}")
-            current_app.logger.error(f"原始响应: {response[:200]}")
-            return None
-        except Exception as e:
-            current_app.logger.error(f"处理全文构思失败: {str(e)}")
-            return None
+        prompt = system_prompt + f"\n\n基于以下创意信息，生成完整的长篇小说构思方案：\n{concept_info}"
+        return await self._generate_concept_data(prompt, "全文构思生成", feature="basic_concept")
 
 
-    async def generate_outline(self, content: str) -> Optional[str]:
-        """生成全文大纲"""
+    def _outline_prompt(self, content: str) -> str:
+        """构建全文大纲的提示词"""
         system_prompt = """你是一个专业的小说大纲策划师。你的任务是基于作品的基本构思，生成详细的全文大纲。
         大纲需要包含：
         1. 故事主线概述
@@ -371,8 +520,19 @@ class GeminiAIService(BaseAIService):
         - 保持悬念和吸引力
         """
 
-        prompt = system_prompt + f"\n\n基于以下基本构思，生成全文大纲：\n{content}"
-        return await self._generate_content(prompt, "全文大纲生成")
+        content = self._fit_context('outline', system_prompt, content)
+        return system_prompt + f"\n\n基于以下基本构思，生成全文大纲：\n{content}"
+
+    async def generate_outline(self, content: str) -> Optional[str]:
+        """生成全文大纲"""
+        prompt = self._outline_prompt(content)
+        return await self._generate_content(prompt, "全文大纲生成", feature="outline")
+
+    async def stream_outline(self, content: str) -> AsyncIterator[str]:
+        """流式生成全文大纲"""
+        prompt = self._outline_prompt(content)
+        async for chunk in self._stream_content(prompt, "全文大纲生成", feature="outline"):
+            yield chunk
 
     async def generate_chapter_outline(self, outline: str, chapter_number: int) -> Optional[List[str]]:
         """生成章节大纲"""
@@ -400,8 +560,10 @@ class GeminiAIService(BaseAIService):
         - 确保与整体故事的连贯性
         """
 
+        # 全文大纲随篇幅增长，超出预算时保留开头的总体规划和结尾部分
+        outline = self._fit_context('chapter_outline', system_prompt, outline)
         prompt = system_prompt + f"\n\n基于以下全文大纲，请详细规划第{chapter_number}章：\n{outline}"
-        content = await self._generate_content(prompt, f"第{chapter_number}章大纲生成")
+        content = await self._generate_content(prompt, f"第{chapter_number}章大纲生成", feature="chapter_outline")
         return content.split('\n') if content else None
 
     async def generate_section_outline(self, chapter_outline: str, section_number: int) -> Optional[str]:
@@ -432,8 +594,9 @@ class GeminiAIService(BaseAIService):
         - 保持文学性
         """
 
+        chapter_outline = self._fit_context('section_outline', system_prompt, chapter_outline)
         prompt = system_prompt + f"\n\n基于以下章节大纲，请详细规划第{section_number}节：\n{chapter_outline}"
-        return await self._generate_content(prompt, f"第{section_number}节大纲生成")
+        return await self._generate_content(prompt, f"第{section_number}节大纲生成", feature="section_outline")
 
     async def generate_section_summary(self, section_outline: str) -> Optional[str]:
         """生成段落概要"""
@@ -451,11 +614,12 @@ class GeminiAIService(BaseAIService):
         - 为正文创作提供清晰指导
         """
 
+        section_outline = self._fit_context('section_summary', system_prompt, section_outline)
         prompt = system_prompt + f"\n\n基于以下段落大纲，生成段落概要：\n{section_outline}"
-        return await self._generate_content(prompt, "段落概要生成")
+        return await self._generate_content(prompt, "段落概要生成", feature="section_summary")
 
-    async def generate_section_content(self, section_summary: str) -> Optional[str]:
-        """生成段落正文"""
+    def _section_content_prompt(self, section_summary: str) -> str:
+        """构建段落正文的提示词"""
         system_prompt = """你是一个专业的小说创作者。你的任务是基于段落概要，创作出生动的段落正文。
 
 正文创作要求：
@@ -482,5 +646,17 @@ class GeminiAIService(BaseAIService):
 - 确保文字优美且富有感染力
 - 严格遵循中文创作规范"""
 
-        prompt = system_prompt + f"\n\n基于以下段落概要，创作段落正文：\n{section_summary}"
-        return await self._generate_content(prompt, "段落正文创作")
+        section_summary = self._fit_context('section_content', system_prompt, section_summary)
+        return system_prompt + f"\n\n基于以下段落概要，创作段落正文：\n{section_summary}"
+
+    async def generate_section_content(self, section_summary: str) -> Optional[str]:
+        """生成段落正文"""
+        prompt = self._section_content_prompt(section_summary)
+        return await self._generate_content(prompt, "段落正文创作", feature="section_content")
+
+    async def stream_section_content(self, section_summary: str) -> AsyncIterator[str]:
+        """流式生成段落正文"""
+        prompt = self._section_content_prompt(section_summary)
+        async for chunk in self._stream_content(prompt, "段落正文创作", feature="section_content"):
+            yield chunk
+
@@ -0,0 +1,179 @@
+"""流式 JSON 对象解析
+
+模型以 JSON 对象返回结构化结果时，逐段喂入流式响应，顶层字段一完成就立即解码和校验，
+结构明显不对时（根不是对象、出现过多未知字段、整数字段类型错误、对象结束时缺少字段）
+抛出 JSONStreamError，调用方据此立即中止请求，不必等待并支付完整的响应。
+
+兼容模型常见的输出习惯：前后的 ```json 代码块标记，以及字符串中未转义的换行。
+"""
+import json
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+# 代码块标记允许的最长前缀，超过仍未出现 '{' 视为格式错误
+_MAX_PREFIX = 16
+
+
+class JSONStreamError(ValueError):
+    """流式 JSON 结构错误，应中止请求"""
+
+
+class JSONObjectStreamParser:
+    """增量解析单个 JSON 对象，并按字段表校验顶层字段"""
+
+    def __init__(self, required_fields: Iterable[str], int_fields: Iterable[str] = (),
+                 max_unknown_fields: int = 3) -> None:
+        self.required_fields: List[str] = list(required_fields)
+        self.int_fields: Set[str] = set(int_fields)
+        self.max_unknown_fields = max_unknown_fields
+        self.data: Dict[str, Any] = {}
+        self.unknown_fields: List[str] = []
+        self.done = False
+
+        self._buffer = ''
+        self._pos = 0
+        self._prefix = ''
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect = 'key'  # key / key_string / colon / value
+        self._key: Optional[str] = None
+        self._token_start = 0
+        self._value_start: Optional[int] = None
+
+    @property
+    def received_fields(self) -> int:
+        return len(self.data)
+
+    def feed(self, chunk: str) -> bool:
+        """喂入一段文本，返回对象是否已经完整"""
+        if self.done:
+            return True
+        self._buffer += chunk
+        buffer = self._buffer
+        for index in range(self._pos, len(buffer)):
+            self._step(buffer, index, buffer[index])
+            if self.done:
+                break
+        self._pos = len(buffer)
+        return self.done
+
+    def result(self) -> Dict[str, Any]:
+        """返回完整的对象；对象未结束时抛出 JSONStreamError"""
+        if not self.done:
+            raise JSONStreamError(
+                f'JSON对象不完整，已收到 {self.received_fields}/{len(self.required_fields)} 个字段'
+            )
+        return self.data
+
+    def _step(self, buffer: str, index: int, char: str) -> None:
+        if not self._started:
+            self._scan_prefix(char)
+            return
+
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == '\\':
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                if self._expect == 'key_string':
+                    self._finish_key(buffer[self._token_start:index + 1])
+            return
+
+        if self._depth > 1:
+            if char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+            return
+
+        if self._expect == 'key':
+            if char.isspace():
+                return
+            if char == '"':
+                self._in_string = True
+                self._token_start = index
+                self._expect = 'key_string'
+            elif char == '}':
+                self._finish_object()
+            else:
+                raise JSONStreamError(f'字段名位置出现意外字符: {char!r}')
+        elif self._expect == 'colon':
+            if char.isspace():
+                return
+            if char != ':':
+                raise JSONStreamError(f'字段 {self._key} 后缺少冒号')
+            self._expect = 'value'
+            self._value_start = None
+        elif self._expect == 'value':
+            if self._value_start is None:
+                if char.isspace():
+                    return
+                self._value_start = index
+            if char in ',}':
+                self._finish_value(buffer[self._value_start:index])
+                if char == '}':
+                    self._finish_object()
+                else:
+                    self._expect = 'key'
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+
+    def _scan_prefix(self, char: str) -> None:
+        if char == '{':
+            fence = self._prefix.strip().lower()
+            if fence not in ('', '```', '```json'):
+                raise JSONStreamError(f'响应不是JSON对象: {self._prefix.strip()[:50]!r}')
+            self._started = True
+            self._depth = 1
+            return
+        self._prefix += char
+        fence = self._prefix.strip().lower()
+        if len(self._prefix) > _MAX_PREFIX or not '```json'.startswith(fence):
+            raise JSONStreamError(f'响应不是JSON对象: {self._prefix.strip()[:50]!r}')
+
+    def _finish_key(self, token: str) -> None:
+        key = json.loads(token, strict=False)
+        if key not in self.required_fields:
+            self.unknown_fields.append(key)
+            if len(self.unknown_fields) > self.max_unknown_fields:
+                raise JSONStreamError(f'出现过多未知字段: {", ".join(self.unknown_fields)}')
+        self._key = key
+        self._expect = 'colon'
+
+    def _finish_value(self, token: str) -> None:
+        token = token.strip()
+        if not token:
+            raise JSONStreamError(f'字段 {self._key} 缺少值')
+        try:
+            value = json.loads(token, strict=False)
+        except json.JSONDecodeError as e:
+            raise JSONStreamError(f'字段 {self._key} 的值无法解析: {str(e)}')
+
+        key = self._key or ''
+        if key in self.int_fields and not _is_integer_like(value):
+            raise JSONStreamError(f'字段 {key} 应为整数，实际为: {token[:50]}')
+        if key in self.required_fields:
+            self.data[key] = value
+
+    def _finish_object(self) -> None:
+        missing = [field for field in self.required_fields if field not in self.data]
+        if missing:
+            raise JSONStreamError(f'缺少必要字段: {", ".join(missing)}')
+        self.done = True
+
+
+def _is_integer_like(value: Any) -> bool:
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, (int, float)):
+        return True
+    if isinstance(value, str):
+        return value.strip().replace(',', '').isdigit()
+    return False
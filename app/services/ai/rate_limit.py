@@ -0,0 +1,296 @@
+"""AI服务商配额控制
+
+- 令牌桶同时限制每分钟请求数（RPM）和每分钟 token 数（TPM）
+- 对 429/5xx 等可重试错误按指数退避 + 随机抖动重试，优先使用服务商给出的 retry-after
+- 并发上限按 AIMD 自适应：成功时缓慢增加，被限流时减半
+
+限流器只依赖传入的异步调用和异常本身，不绑定具体SDK，可以直接用本地假服务验证。
+所有状态用线程锁保护，等待一律使用 asyncio.sleep，因此可以在多个线程的多个事件循环之间共享。
+"""
+import asyncio
+import random
+import re
+import threading
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar('T')
+
+_RETRY_AFTER_PATTERNS = (
+    re.compile(r'retry[ _-]?after[^0-9]{0,10}(\d+(?:\.\d+)?)', re.IGNORECASE),
+    re.compile(r'retry in (\d+(?:\.\d+)?)\s*s', re.IGNORECASE),
+    re.compile(r'retry_delay\s*\{\s*seconds:\s*(\d+)', re.IGNORECASE),
+)
+_RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+_THROTTLE_NAMES = {'ResourceExhausted', 'TooManyRequests', 'RateLimitError'}
+_RETRYABLE_NAMES = _THROTTLE_NAMES | {
+    'ServiceUnavailable', 'InternalServerError', 'DeadlineExceeded', 'GatewayTimeout',
+    'TimeoutError', 'ConnectionError'
+}
+
+
+class RateLimitError(Exception):
+    """服务商返回的限流错误（429），可携带建议的重试等待时间"""
+
+    def __init__(self, message: str = 'rate limited', retry_after: Optional[float] = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.code = 429
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    for attr in ('code', 'status_code', 'status'):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+        # google.api_core 的 code 可能是 grpc.StatusCode 枚举
+        value = getattr(value, 'value', None)
+        if isinstance(value, tuple) and value and isinstance(value[0], int):
+            return {8: 429, 14: 503, 4: 504, 13: 500}.get(value[0])
+    return None
+
+
+def is_throttle_error(error: BaseException) -> bool:
+    """是否为限流错误"""
+    return _status_code(error) == 429 or type(error).__name__ in _THROTTLE_NAMES
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """是否值得重试（限流、服务端错误、超时、连接错误）"""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    return _status_code(error) in _RETRYABLE_STATUS or type(error).__name__ in _RETRYABLE_NAMES
+
+
+def retry_after_hint(error: BaseException) -> Optional[float]:
+    """从异常中读取服务商建议的等待时间（秒）"""
+    value = getattr(error, 'retry_after', None)
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if headers is not None:
+        header = headers.get('retry-after') or headers.get('Retry-After')
+        try:
+            return float(header) if header is not None else None
+        except ValueError:
+            pass
+
+    message = str(error)
+    for pattern in _RETRY_AFTER_PATTERNS:
+        match = pattern.search(message)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+class TokenBucket:
+    """按分钟速率补充的令牌桶；预留后返回需要等待的秒数"""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None) -> None:
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """预留 amount 个令牌（允许透支），返回为偿还透支需要等待的时间"""
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def adjust(self, delta: float) -> None:
+        """按实际用量修正预留量（delta 为实际减预估）"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens - delta)
+
+    def drain(self, seconds: float) -> None:
+        """服务商要求等待时，清空令牌使后续调用一起让出这段时间"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+
+class AdaptiveConcurrency:
+    """AIMD 并发上限：每个成功的调用使上限增加 1/limit，被限流时上限减半"""
+
+    def __init__(self, maximum: int, minimum: int = 1, initial: Optional[int] = None) -> None:
+        self.maximum = max(1, maximum)
+        self.minimum = max(1, min(minimum, self.maximum))
+        self.limit = float(initial or self.maximum)
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    async def acquire(self, poll_interval: float = 0.05) -> None:
+        while not self.try_acquire():
+            await asyncio.sleep(poll_interval)
+
+    def release(self, throttled: bool = False, succeeded: bool = True) -> None:
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            if throttled:
+                self.limit = max(float(self.minimum), self.limit / 2)
+            elif succeeded:
+                self.limit = min(float(self.maximum), self.limit + 1.0 / self.limit)
+
+
+class ProviderLimiter:
+    """单个服务商的限流、重试与自适应并发控制"""
+
+    def __init__(self, rpm: float = 0, tpm: float = 0, max_concurrency: int = 8,
+                 max_retries: int = 4, base_delay: float = 1.0, max_delay: float = 60.0) -> None:
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.concurrency = AdaptiveConcurrency(max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._stats: Dict[str, int] = {'calls': 0, 'retries': 0, 'throttled': 0, 'failures': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats: Dict[str, Any] = dict(self._stats)
+        stats['concurrency_limit'] = round(self.concurrency.limit, 2)
+        stats['in_flight'] = self.concurrency.in_flight
+        return stats
+
+    def settle(self, reserved: int, actual: int) -> None:
+        """调用完成后按实际 token 用量修正 TPM 预留"""
+        if self.tokens is not None and actual > 0:
+            self.tokens.adjust(actual - reserved)
+
+    async def _wait_for_quota(self, tokens: int) -> None:
+        wait = 0.0
+        if self.requests is not None:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.reserve(tokens))
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def backoff(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        """第 attempt 次重试前的等待时间：服务商提示优先，否则指数退避加全抖动"""
+        hint = retry_after_hint(error) if error is not None else None
+        if hint is not None:
+            return min(self.max_delay, hint + random.uniform(0, self.base_delay))
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """记录一次失败的调用并释放并发名额；可以重试时返回重试前需要等待的秒数，否则返回 None"""
+        throttled = is_throttle_error(error)
+        self.concurrency.release(throttled=throttled, succeeded=False)
+        if throttled:
+            self._count('throttled')
+        if not is_retryable_error(error) or attempt >= self.max_retries:
+            self._count('failures')
+            return None
+        delay = self.backoff(attempt, error)
+        self._count('retries')
+        if throttled and self.requests is not None:
+            # 限流时让同一服务商的所有调用一起让出这段时间，由下一次预留统一等待
+            self.requests.drain(delay)
+            return 0.0
+        return delay
+
+    async def call(self, func: Callable[[], Awaitable[T]], tokens: int = 1) -> T:
+        """在配额内执行调用，可重试的错误按退避策略重试，最终失败时抛出最后一次的异常"""
+        attempt = 0
+        while True:
+            await self._wait_for_quota(tokens)
+            await self.concurrency.acquire()
+            self._count('calls')
+            try:
+                result = await func()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                if delay:
+                    await asyncio.sleep(delay)
+            except BaseException:
+                # 任务取消等：释放名额，不计入成功或失败
+                self.concurrency.release(succeeded=False)
+                raise
+            else:
+                self.concurrency.release()
+                return result
+
+    async def stream(self, open_stream: Callable[[], AsyncIterator[T]], tokens: int = 1) -> AsyncIterator[T]:
+        """在配额内执行流式调用
+
+        收到第一段之前的错误（限流通常在此时返回）与 call() 一样退避重试，每次重试重新打开流；
+        开始产出之后出错直接抛出，已产出的内容无法撤回。调用方提前关闭流视为成功。
+        """
+        attempt = 0
+        while True:
+            await self._wait_for_quota(tokens)
+            await self.concurrency.acquire()
+            self._count('calls')
+            iterator = open_stream()
+            try:
+                first = await iterator.__anext__()
+            except StopAsyncIteration:
+                self.concurrency.release()
+                return
+            except Exception as e:
+                await iterator.aclose()
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                if delay:
+                    await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # 任务取消等：释放名额，不计入成功或失败
+                self.concurrency.release(succeeded=False)
+                await iterator.aclose()
+                raise
+            break
+
+        try:
+            yield first
+            async for item in iterator:
+                yield item
+        except GeneratorExit:
+            # 调用方在收到所需内容后提前关闭流（如JSON对象已完整），属于正常结束
+            self.concurrency.release()
+            raise
+        except Exception as e:
+            throttled = is_throttle_error(e)
+            if throttled:
+                self._count('throttled')
+            self._count('failures')
+            self.concurrency.release(throttled=throttled, succeeded=False)
+            raise
+        except BaseException:
+            self.concurrency.release(succeeded=False)
+            raise
+        else:
+            self.concurrency.release()
+        finally:
+            await iterator.aclose()
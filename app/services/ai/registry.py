@@ -0,0 +1,125 @@
+"""应用级AI客户端注册表
+
+每个进程只初始化一次AI服务实例，按（服务商, 模型）缓存并在请求之间复用，
+避免每个请求重复执行 genai.configure 和创建模型对象，也让底层连接得以保持。
+"""
+import threading
+from typing import Dict, Optional, Tuple
+
+from flask import Flask, current_app
+
+from .base_ai_service import BaseAIService
+from .cache import AIResponseCache, MemoryCacheTier, SQLiteCacheTier
+from .rate_limit import ProviderLimiter
+from .tokens import UsageLedger
+
+
+class AIClientRegistry:
+    """线程安全的AI服务实例注册表，在 create_app 中创建"""
+
+    def __init__(self, app: Optional[Flask] = None) -> None:
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        """注册到应用扩展中，每个应用持有自己的实例缓存"""
+        app.extensions['ai_registry'] = self
+        app.extensions['ai_clients'] = {}
+        app.extensions['ai_cache'] = None
+        app.extensions['ai_limiters'] = {}
+        app.extensions['ai_usage'] = UsageLedger()
+
+    @property
+    def _clients(self) -> Dict[Tuple[str, str], BaseAIService]:
+        return current_app.extensions.setdefault('ai_clients', {})
+
+    def get(self, provider: Optional[str] = None, model: Optional[str] = None) -> BaseAIService:
+        """获取（必要时创建）指定服务商和模型的AI服务实例"""
+        provider = provider or current_app.config.get('AI_SERVICE', 'gemini')
+        model = model or self._default_model(provider)
+        key = (provider, model)
+
+        clients = self._clients
+        client = clients.get(key)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = clients.get(key)
+            if client is None:
+                client = self._create(provider, model)
+                client.cache = self.get_cache()
+                client.cacheable_features = frozenset(current_app.config.get('AI_CACHEABLE_FEATURES', ()))
+                client.limiter = self.get_limiter(provider)
+                client.usage = self.get_usage()
+                client.prompt_budgets = dict(current_app.config.get('AI_PROMPT_BUDGETS', {}))
+                client.default_prompt_budget = int(current_app.config.get('AI_PROMPT_BUDGET_DEFAULT', 0))
+                clients[key] = client
+        return client
+
+    def get_cache(self) -> Optional[AIResponseCache]:
+        """获取应用的AI响应缓存，AI_CACHE_ENABLED 关闭时返回 None"""
+        config = current_app.config
+        if not config.get('AI_CACHE_ENABLED', True):
+            return None
+        cache: Optional[AIResponseCache] = current_app.extensions.get('ai_cache')
+        if cache is None:
+            memory = MemoryCacheTier(
+                max_entries=int(config.get('AI_CACHE_MEMORY_ENTRIES', 512)),
+                ttl=float(config.get('AI_CACHE_TTL', 3600))
+            )
+            disk = None
+            if config.get('AI_CACHE_PATH'):
+                disk = SQLiteCacheTier(
+                    config['AI_CACHE_PATH'],
+                    max_entries=int(config.get('AI_CACHE_DISK_ENTRIES', 20000)),
+                    ttl=float(config.get('AI_CACHE_DISK_TTL', 7 * 24 * 3600))
+                )
+            cache = AIResponseCache(memory, disk)
+            current_app.extensions['ai_cache'] = cache
+        return cache
+
+    def clear(self) -> None:
+        """丢弃所有已缓存的实例（例如更换API密钥后）"""
+        with self._lock:
+            self._clients.clear()
+            current_app.extensions['ai_cache'] = None
+            current_app.extensions['ai_limiters'] = {}
+
+    def get_usage(self) -> UsageLedger:
+        """获取应用的 token 用量统计"""
+        return current_app.extensions.setdefault('ai_usage', UsageLedger())
+
+    def get_limiter(self, provider: str) -> ProviderLimiter:
+        """获取服务商的限流器；同一服务商的所有模型共享配额"""
+        limiters: Dict[str, ProviderLimiter] = current_app.extensions.setdefault('ai_limiters', {})
+        limiter = limiters.get(provider)
+        if limiter is None:
+            config = current_app.config
+            limiter = ProviderLimiter(
+                rpm=float(config.get('AI_RATE_LIMIT_RPM', 0)),
+                tpm=float(config.get('AI_RATE_LIMIT_TPM', 0)),
+                max_concurrency=int(config.get('AI_MAX_CONCURRENCY', 8)),
+                max_retries=int(config.get('AI_MAX_RETRIES', 4)),
+                base_delay=float(config.get('AI_RETRY_BASE_DELAY', 1.0)),
+                max_delay=float(config.get('AI_RETRY_MAX_DELAY', 60.0))
+            )
+            limiters[provider] = limiter
+        return limiter
+
+    def _default_model(self, provider: str) -> str:
+        if provider == 'gemini':
+            return current_app.config.get('GEMINI_MODEL', 'gemini-2.5-pro')
+        if provider == 'fake':
+            return 'fake'
+        return 'default'
+
+    def _create(self, provider: str, model: str) -> BaseAIService:
+        if provider == 'gemini':
+            from .gemini_ai_service import GeminiAIService
+            return GeminiAIService(model_name=model)
+        if provider == 'fake':
+            from .fake_ai_service import FakeAIService
+            return FakeAIService(model_name=model)
+        raise ValueError(f'不支持的AI服务: {provider}')
@@ -0,0 +1,116 @@
+"""提示词 token 计数与预算控制
+
+- count_tokens 按字符类别估算 token 数：中日韩字符和全角标点各计 1 个，
+  其余字符（英文、数字、空白等）按 4 个字符 1 个计。结果是确定的，不依赖具体SDK，
+  服务商返回实际用量时以实际用量为准。
+- fit_to_budget 在上下文超出功能预算时按行保留开头和结尾，中间替换为省略标记，
+  相同输入总是得到相同输出，因此不会破坏响应缓存的命中。
+- UsageLedger 按功能累计每次调用的输入/输出 token，便于找出超大的提示词。
+"""
+import re
+import threading
+from typing import Any, Dict, Optional
+
+_WIDE_CHARS = re.compile(
+    r'[　-〿぀-ヿ㐀-䶿一-鿿가-힯豈-﫿＀-￯]'
+)
+TRIM_MARKER = '\n……（中间内容过长，已省略）……\n'
+
+
+def count_tokens(text: Optional[str]) -> int:
+    """估算文本的 token 数"""
+    if not text:
+        return 0
+    wide = len(_WIDE_CHARS.findall(text))
+    narrow = len(text) - wide
+    return wide + (narrow + 3) // 4
+
+
+def estimate_tokens(text: str) -> int:
+    """估算一次调用需要预留的 token 数（至少为 1），用于 TPM 限流"""
+    return max(1, count_tokens(text))
+
+
+def fit_to_budget(text: str, max_tokens: int, head_ratio: float = 0.6) -> str:
+    """将文本裁剪到 max_tokens 以内：按行保留开头约 head_ratio 和结尾的剩余部分
+
+    单行超长时按字符截断。max_tokens <= 0 表示不限制。
+    """
+    if max_tokens <= 0 or count_tokens(text) <= max_tokens:
+        return text
+
+    available = max(0, max_tokens - count_tokens(TRIM_MARKER))
+    head_budget = int(available * head_ratio)
+    tail_budget = available - head_budget
+    lines = text.split('\n')
+
+    head_lines = []
+    used = 0
+    for line in lines:
+        cost = count_tokens(line) + 1
+        if used + cost > head_budget:
+            break
+        head_lines.append(line)
+        used += cost
+
+    tail_lines = []
+    used = 0
+    for line in reversed(lines[len(head_lines):]):
+        cost = count_tokens(line) + 1
+        if used + cost > tail_budget:
+            break
+        tail_lines.append(line)
+        used += cost
+    tail_lines.reverse()
+
+    head = '\n'.join(head_lines)
+    tail = '\n'.join(tail_lines)
+    if not head_lines:
+        head = _truncate(text, head_budget)
+    if not tail_lines:
+        tail = _truncate(text[::-1], tail_budget)[::-1]
+    return head + TRIM_MARKER + tail
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """按字符截断到 max_tokens 以内"""
+    used = 0
+    for index, char in enumerate(text):
+        used += 4 if _WIDE_CHARS.match(char) else 1
+        if used > max_tokens * 4:
+            return text[:index]
+    return text
+
+
+class UsageLedger:
+    """按功能累计的 token 用量，线程安全"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._features: Dict[str, Dict[str, int]] = {}
+
+    def record(self, feature: str, input_tokens: int, output_tokens: int, trimmed: bool = False) -> None:
+        with self._lock:
+            entry = self._features.setdefault(feature, {
+                'calls': 0, 'input_tokens': 0, 'output_tokens': 0,
+                'max_input_tokens': 0, 'trimmed': 0
+            })
+            entry['calls'] += 1
+            entry['input_tokens'] += input_tokens
+            entry['output_tokens'] += output_tokens
+            entry['max_input_tokens'] = max(entry['max_input_tokens'], input_tokens)
+            if trimmed:
+                entry['trimmed'] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            features = {name: dict(entry) for name, entry in self._features.items()}
+        return {
+            'features': features,
+            'input_tokens': sum(e['input_tokens'] for e in features.values()),
+            'output_tokens': sum(e['output_tokens'] for e in features.values())
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._features.clear()
@@ -1,12 +1,14 @@
 from typing import List, Optional, Dict
 from flask import current_app
 import json
-from app.services.ai.gemini_ai_service import GeminiAIService
+from app.services.ai import get_ai_service
+from app.services.ai.base_ai_service import BaseAIService
 from app.models.planning import CreativeExpansion
 
 class AIAssistant:
-    def __init__(self):
-        self.ai_service = GeminiAIService()
+    def __init__(self, ai_service: Optional[BaseAIService] = None):
+        # 默认复用应用级注册表中的AI服务实例，不在每个请求中重新初始化
+        self.ai_service = ai_service or get_ai_service()
 
     async def generate_creative_ideas(self, content: str) -> Optional[List[Dict[str, str]]]:
         """基于初始灵感生成10个创意方向"""
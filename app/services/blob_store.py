@@ -0,0 +1,371 @@
+"""按内容寻址的文件存储
+
+上传的文件按 SHA-256 保存为 BLOB_FOLDER/ab/cd/abcd...（前两级目录按哈希前缀分片，
+避免单个目录下文件过多），相同内容的文件只保存一份，数据库中对应一行 Blob。
+InspirationMaterial.blob_id 指向文件，Blob.ref_count 记录引用数，由 Session 的
+before_flush 事件随素材的新增、删除在同一事务中更新；引用数为 0 且超过
+BLOB_GC_GRACE_HOURS 的文件由 `flask blobs-gc` 回收（宽限期内刚上传、尚未关联素材的文件不会被删除）。
+
+写入时边读边计算哈希，数据按 BLOB_READ_SIZE 分块从请求流复制到临时文件，内存占用与文件大小无关。
+先登记 Blob 记录，事务提交后才把临时文件重命名到最终位置（同一文件系统内为原子操作），
+回滚时删除临时文件，因此存储中不会因为失败的请求留下没有记录的文件。回收时先把文件改名移开，
+再确认记录仍不存在才删除，与同时上传相同内容的请求不会互相覆盖；进程中途退出等原因留下的
+没有记录的文件由 collect_garbage() 扫描目录清理。
+
+分块上传可以续传：create_upload() 创建 UploadSession，append_chunk() 按偏移量追加数据，
+中断后按 UploadSession.received 从断点继续，complete_upload() 校验大小并存入存储。
+"""
+import glob
+import hashlib
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, BinaryIO, Dict, Optional, Tuple
+
+from flask import Flask, current_app
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import Blob, UploadSession
+
+
+class UploadError(ValueError):
+    """上传请求无效（偏移量不一致、超过大小限制等）"""
+
+
+class OffsetMismatch(UploadError):
+    """分块的偏移量与已接收的字节数不一致，客户端应从 expected 处续传"""
+
+    def __init__(self, expected: int) -> None:
+        super().__init__(f'偏移量不一致，应从 {expected} 字节处继续上传')
+        self.expected = expected
+
+
+# 进行中的上传的哈希状态 {upload_id: (已计算的字节数, 哈希对象)}；
+# 进程重启或请求落到其他进程时，从临时文件重新计算
+_hashers: Dict[str, Tuple[int, Any]] = {}
+_hashers_lock = threading.Lock()
+_upload_locks: Dict[str, threading.Lock] = {}
+
+
+def init_app(app: Flask) -> None:
+    """注册引用计数和文件移动事件"""
+    if not event.contains(Session, 'before_flush', _count_references):
+        event.listen(Session, 'before_flush', _count_references)
+    if not event.contains(Session, 'after_commit', _move_files):
+        event.listen(Session, 'after_commit', _move_files)
+    if not event.contains(Session, 'after_transaction_end', _discard_files):
+        event.listen(Session, 'after_transaction_end', _discard_files)
+
+
+def blob_folder() -> str:
+    return str(current_app.config['BLOB_FOLDER'])
+
+
+def _temp_folder() -> str:
+    path = os.path.join(blob_folder(), 'tmp')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def blob_path(sha256: str) -> str:
+    """文件在存储中的路径"""
+    return os.path.join(blob_folder(), sha256[:2], sha256[2:4], sha256)
+
+
+def _read_size() -> int:
+    return int(current_app.config.get('BLOB_READ_SIZE', 64 * 1024))
+
+
+def _copy(stream: BinaryIO, target: BinaryIO, hasher: Any, limit: Optional[int] = None) -> int:
+    """分块复制并更新哈希，返回复制的字节数；超过 limit 时抛出 UploadError"""
+    read_size = _read_size()
+    copied = 0
+    while True:
+        block = stream.read(read_size)
+        if not block:
+            return copied
+        copied += len(block)
+        if limit is not None and copied > limit:
+            raise UploadError('文件超过大小限制')
+        hasher.update(block)
+        target.write(block)
+
+
+def store_stream(stream: BinaryIO, content_type: Optional[str] = None) -> Blob:
+    """把文件流存入存储，返回对应的 Blob（相同内容已存在时直接返回已有的）"""
+    hasher = hashlib.sha256()
+    temp_path = os.path.join(_temp_folder(), uuid.uuid4().hex)
+    try:
+        with open(temp_path, 'wb') as target:
+            size = _copy(stream, target, hasher, int(current_app.config.get('MAX_UPLOAD_SIZE', 0)) or None)
+        return _commit_file(temp_path, hasher.hexdigest(), size, content_type)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _commit_file(temp_path: str, sha256: str, size: int, content_type: Optional[str]) -> Blob:
+    """登记文件，事务提交后临时文件移到哈希对应的位置（回滚时删除）
+
+    内容已存在时刷新记录的 created_at，使其重新获得回收宽限期：分块上传完成后到素材引用它之前，
+    或者回收任务已选中它时，这个文件都不会被删除（回收按 created_at 条件删除记录）。
+    """
+    touched = db.session.execute(
+        db.update(Blob).where(Blob.sha256 == sha256).values(created_at=datetime.utcnow())
+    ).rowcount
+    blob: Optional[Blob] = None
+    if touched:
+        blob = Blob.query.filter_by(sha256=sha256).one()
+    else:
+        try:
+            # 并发上传同一文件时另一个请求可能先插入，此时使用已有的记录
+            with db.session.begin_nested():
+                blob = Blob(sha256=sha256, size=size, content_type=content_type)
+                db.session.add(blob)
+        except IntegrityError:
+            blob = Blob.query.filter_by(sha256=sha256).one()
+    # 内容相同时覆盖已有文件也无妨；总是移动可以保证提交后文件一定存在，即使回收任务刚把它移走
+    db.session.info.setdefault('blob_moves', []).append((temp_path, blob_path(sha256)))
+    return blob
+
+
+def _move_files(session: Session) -> None:
+    for temp_path, path in session.info.pop('blob_moves', []):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp_path, path)
+
+
+def _discard_files(session: Session, transaction: Any) -> None:
+    """最外层事务结束时仍未移动的文件（回滚、关闭会话）随之删除"""
+    if transaction.parent is not None:
+        return
+    for temp_path, _ in session.info.pop('blob_moves', []):
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def create_upload(project_id: int, filename: Optional[str], size: Optional[int],
+                  content_type: Optional[str]) -> UploadSession:
+    """创建分块上传，调用方负责提交"""
+    limit = int(current_app.config.get('MAX_UPLOAD_SIZE', 0))
+    if size is not None and (size < 0 or (limit and size > limit)):
+        raise UploadError('文件超过大小限制')
+    upload = UploadSession(id=uuid.uuid4().hex, project_id=project_id, filename=filename,
+                           size=size, content_type=content_type, received=0)
+    db.session.add(upload)
+    open(_part_path(upload.id), 'wb').close()
+    return upload
+
+
+def _part_path(upload_id: str) -> str:
+    return os.path.join(_temp_folder(), f'{upload_id}.part')
+
+
+def _upload_lock(upload_id: str) -> threading.Lock:
+    with _hashers_lock:
+        return _upload_locks.setdefault(upload_id, threading.Lock())
+
+
+def _hasher(upload: UploadSession) -> Any:
+    """取出与已接收数据一致的哈希状态，必要时从临时文件重新计算"""
+    with _hashers_lock:
+        state = _hashers.pop(upload.id, None)
+    if state is not None and state[0] == upload.received:
+        return state[1]
+    hasher = hashlib.sha256()
+    with open(_part_path(upload.id), 'rb') as f:
+        remaining = upload.received
+        while remaining > 0:
+            block = f.read(min(_read_size(), remaining))
+            if not block:
+                break
+            hasher.update(block)
+            remaining -= len(block)
+    return hasher
+
+
+def append_chunk(upload: UploadSession, offset: int, stream: BinaryIO) -> int:
+    """在 offset 处追加一块数据，返回新的偏移量；调用方负责提交
+
+    offset 必须等于已接收的字节数（重复发送已接收的块也会被拒绝，客户端按返回的偏移量续传）。
+    """
+    with _upload_lock(upload.id):
+        db.session.refresh(upload)
+        if offset != upload.received:
+            raise OffsetMismatch(upload.received)
+
+        limit = upload.size if upload.size is not None else int(current_app.config.get('MAX_UPLOAD_SIZE', 0))
+        hasher = _hasher(upload)
+        with open(_part_path(upload.id), 'r+b') as target:
+            # 丢弃上次中断时写入但未登记的数据
+            target.truncate(upload.received)
+            target.seek(upload.received)
+            copied = _copy(stream, target, hasher, (limit - upload.received) if limit else None)
+
+        upload.received += copied
+        with _hashers_lock:
+            _hashers[upload.id] = (upload.received, hasher)
+        return upload.received
+
+
+def complete_upload(upload: UploadSession) -> Blob:
+    """结束上传，文件存入存储，删除上传记录；调用方负责提交"""
+    with _upload_lock(upload.id):
+        db.session.refresh(upload)
+        if upload.size is not None and upload.received != upload.size:
+            raise UploadError(f'文件不完整：已接收 {upload.received} 字节，共 {upload.size} 字节')
+        hasher = _hasher(upload)
+        part_path = _part_path(upload.id)
+        with open(part_path, 'r+b') as f:
+            f.truncate(upload.received)
+        blob = _commit_file(part_path, hasher.hexdigest(), upload.received, upload.content_type)
+        db.session.delete(upload)
+    with _hashers_lock:
+        _upload_locks.pop(upload.id, None)
+    return blob
+
+
+def _count_references(session: Session, flush_context: Any, instances: Any) -> None:
+    from app.models.creation import InspirationMaterial
+
+    changes: Dict[int, int] = {}
+    for obj in session.new:
+        if isinstance(obj, InspirationMaterial) and obj.blob_id is not None:
+            changes[obj.blob_id] = changes.get(obj.blob_id, 0) + 1
+    for obj in session.deleted:
+        if isinstance(obj, InspirationMaterial) and obj.blob_id is not None:
+            changes[obj.blob_id] = changes.get(obj.blob_id, 0) - 1
+    for obj in session.dirty:
+        if isinstance(obj, InspirationMaterial):
+            history = db.inspect(obj).attrs.blob_id.history
+            for blob_id in history.added:
+                if blob_id is not None:
+                    changes[blob_id] = changes.get(blob_id, 0) + 1
+            for blob_id in history.deleted:
+                if blob_id is not None:
+                    changes[blob_id] = changes.get(blob_id, 0) - 1
+
+    for blob_id, delta in changes.items():
+        if delta:
+            session.execute(db.update(Blob).where(Blob.id == blob_id)
+                            .values(ref_count=Blob.ref_count + delta))
+
+
+def collect_garbage(grace: Optional[timedelta] = None) -> Dict[str, int]:
+    """删除没有引用的文件、过期的上传和没有记录的文件，返回删除的数量；每批提交一次"""
+    if grace is None:
+        grace = timedelta(hours=int(current_app.config.get('BLOB_GC_GRACE_HOURS', 24)))
+    cutoff = datetime.utcnow() - grace
+    removed = {'blobs': 0, 'uploads': 0, 'bytes': 0, 'orphans': 0}
+
+    expired = db.and_(Blob.ref_count <= 0, Blob.created_at < cutoff)
+    while True:
+        blobs = db.session.execute(db.select(Blob.id, Blob.sha256, Blob.size).filter(expired).limit(500)).all()
+        if not blobs:
+            break
+        # 条件删除：选出之后被引用或被重新上传（刷新了 created_at）的记录不会被删除
+        db.session.execute(db.delete(Blob).where(Blob.id.in_([blob.id for blob in blobs]), expired))
+        db.session.commit()
+        # 先删除记录再删除文件：提交失败时文件仍在，不会出现记录指向不存在的文件
+        for blob in blobs:
+            if _remove_file(blob.sha256):
+                removed['blobs'] += 1
+                removed['bytes'] += blob.size
+
+    ttl = timedelta(hours=int(current_app.config.get('UPLOAD_SESSION_TTL_HOURS', 24)))
+    for upload in UploadSession.query.filter(UploadSession.updated_at < datetime.utcnow() - ttl).all():
+        part_path = _part_path(upload.id)
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        db.session.delete(upload)
+        removed['uploads'] += 1
+    db.session.commit()
+
+    removed['orphans'] = _sweep_orphans(cutoff)
+    return removed
+
+
+def _remove_file(sha256: str) -> bool:
+    """删除文件及其生成的文件，记录仍存在（被重新上传）时保留；返回是否删除
+
+    先把文件改名移开再检查记录：上传请求总是在提交记录之后才把文件移到最终位置，
+    所以检查时没有记录就可以放心删除移开的文件，之后提交的上传会重新放入自己的文件。
+    """
+    path = blob_path(sha256)
+    doomed = f'{path}.gc-{uuid.uuid4().hex}'
+    try:
+        os.replace(path, doomed)
+    except FileNotFoundError:
+        doomed = ''
+    if db.session.execute(db.select(Blob.id).filter_by(sha256=sha256)).first() is not None:
+        db.session.rollback()
+        if doomed:
+            os.replace(doomed, path)
+        return False
+    db.session.rollback()
+    if doomed:
+        os.remove(doomed)
+    # 缩略图等生成的文件与原文件同名加后缀
+    for name in glob.glob(glob.escape(path) + '.*'):
+        if '.gc-' not in os.path.basename(name) and os.path.exists(name):
+            os.remove(name)
+    return bool(doomed)
+
+
+def _sweep_orphans(cutoff: datetime) -> int:
+    """扫描存储目录，删除修改时间早于 cutoff、没有对应记录的文件和临时文件"""
+    root = blob_folder()
+    if not os.path.isdir(root):
+        return 0
+    timestamp = cutoff.replace(tzinfo=timezone.utc).timestamp()
+    removed = 0
+    temp_folder = os.path.join(root, 'tmp')
+    for entry in os.scandir(temp_folder) if os.path.isdir(temp_folder) else ():
+        # 进行中的分块上传由 UploadSession 的过期时间管理
+        if entry.is_file() and not entry.name.endswith('.part') and entry.stat().st_mtime < timestamp:
+            os.remove(entry.path)
+            removed += 1
+
+    for directory, _, files in os.walk(root):
+        if os.path.relpath(directory, root).split(os.sep)[0] == 'tmp':
+            continue
+        candidates = set()
+        for name in files:
+            sha256 = name.split('.', 1)[0]
+            if len(sha256) == 64 and os.path.getmtime(os.path.join(directory, name)) < timestamp:
+                candidates.add(sha256)
+        if not candidates:
+            continue
+        existing = set(db.session.execute(db.select(Blob.sha256).filter(Blob.sha256.in_(candidates))).scalars())
+        db.session.rollback()
+        for sha256 in candidates - existing:
+            path = blob_path(sha256)
+            if os.path.exists(path):
+                removed += _remove_file(sha256)
+            else:
+                # 只剩生成的文件或回收中断留下的文件
+                for name in glob.glob(glob.escape(path) + '.*'):
+                    os.remove(name)
+                removed += 1
+    return removed
+
+
+def import_legacy_file(path: str, content_type: Optional[str] = None) -> Blob:
+    """把旧的平铺上传文件存入存储（不删除原文件）"""
+    with open(path, 'rb') as f:
+        return store_stream(f, content_type)
+
+
+def disk_usage(folder: str) -> int:
+    """目录下文件的总字节数"""
+    total = 0
+    for root, _, files in os.walk(folder):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
@@ -0,0 +1,245 @@
+"""整书生成流水线
+
+按依赖关系生成：全文大纲 → 章节大纲 → 分节大纲 → 内容概要 → 正文。
+每个节点只依赖自己的上游节点，上游一完成就立即展开下游，互不相关的章节和分节并发执行，
+进程内所有流水线的AI调用共享同一个并发上限（PIPELINE_MAX_CONCURRENCY）。每个节点完成后立即写入数据库，
+再次运行时已完成的节点直接跳过，从中断处继续；refresh 为真时（用户要求重新生成）
+大纲和概要节点忽略已有结果并跳过AI响应缓存，重新生成后覆盖；正文不受影响。
+
+同一本书可能同时运行多次（重复点击、接口和后台任务同时触发）：同一进程内同一个节点同时只由一个流水线生成，
+另一个等待后直接使用结果；纲要节点在 (parent_id, level, order) 和 (basic_concept_id, level) 上唯一，
+其他进程同时创建同一节点时使用已有的记录，不会出现重复的章节和分节。
+"""
+import asyncio
+import contextlib
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import Outline, Content
+from app.models.planning import BasicConcept
+from app.services.ai.cache import bypass_cache
+from app.services.ai.concurrency import SharedSemaphore
+from app.services.ai_assistant import AIAssistant
+
+T = TypeVar('T')
+
+_slots: Optional[SharedSemaphore] = None
+_nodes: Dict[Tuple[Any, ...], List[Any]] = {}  # {节点: [锁, 使用者数]}
+_lock = threading.Lock()
+
+
+def shared_slots(size: int) -> SharedSemaphore:
+    """进程级的流水线并发上限，首次调用时按 size 创建"""
+    global _slots
+    if _slots is None:
+        with _lock:
+            if _slots is None:
+                _slots = SharedSemaphore(size)
+    return _slots
+
+
+@contextlib.asynccontextmanager
+async def _node(*key: Any) -> AsyncIterator[None]:
+    """同一进程内同一个节点同时只由一个流水线生成"""
+    with _lock:
+        entry = _nodes.setdefault(key, [SharedSemaphore(1), 0])
+        entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        with _lock:
+            entry[1] -= 1
+            if entry[1] == 0:
+                _nodes.pop(key, None)
+
+
+def _get_or_create(keys: Dict[str, Any], **values: Any) -> Outline:
+    """按唯一键取得纲要节点，不存在时创建；其他进程同时创建时使用已有的记录"""
+    outline = Outline.query.filter_by(**keys).first()
+    if outline is not None:
+        return outline
+    try:
+        with db.session.begin_nested():
+            outline = Outline(**keys, **values)
+            db.session.add(outline)
+    except IntegrityError:
+        outline = Outline.query.filter_by(**keys).one()
+    return outline
+
+# 构思中不参与提示词的字段
+_CONCEPT_META_FIELDS = {'id', 'project_id', 'creative_expansion_id', 'created_at', 'updated_at'}
+
+
+class PipelineError(Exception):
+    """流水线节点失败"""
+
+
+class BookPipeline:
+    """整书生成的执行器"""
+
+    def __init__(self, ai_assistant: AIAssistant, max_concurrency: Optional[int] = None,
+                 default_chapters: Optional[int] = None, sections_per_chapter: Optional[int] = None,
+                 refresh: bool = False) -> None:
+        """max_concurrency 为空时使用进程级的共享上限，指定时该流水线单独计数；refresh 见模块说明"""
+        config = current_app.config
+        self.ai_assistant = ai_assistant
+        self.semaphore = (SharedSemaphore(max_concurrency) if max_concurrency
+                          else shared_slots(int(config.get('PIPELINE_MAX_CONCURRENCY', 8))))
+        self.default_chapters = default_chapters or int(config.get('PIPELINE_DEFAULT_CHAPTERS', 10))
+        self.sections_per_chapter = sections_per_chapter or int(config.get('PIPELINE_SECTIONS_PER_CHAPTER', 3))
+        self.refresh = refresh
+        self.failures: List[str] = []
+
+    async def _call(self, node: str, factory: Callable[[], Awaitable[Optional[T]]]) -> T:
+        """在进程级并发上限内执行一次AI调用，失败时抛出 PipelineError"""
+        async with self.semaphore:
+            with bypass_cache() if self.refresh else contextlib.nullcontext():
+                result = await factory()
+        if not result:
+            raise PipelineError(f'{node} 生成失败')
+        return result
+
+    async def gather(self, coros: List[Awaitable[Any]]) -> List[Any]:
+        """并发执行同级节点；单个节点失败不影响其他节点，失败记录在 failures 中"""
+        results = await asyncio.gather(*coros, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                self.failures.append(str(result))
+                current_app.logger.error(f"整书生成节点失败: {str(result)}")
+        return [r for r in results if not isinstance(r, Exception)]
+
+    # ---- 单个节点 ----
+
+    async def full_outline(self, concept: BasicConcept) -> Outline:
+        """全文大纲节点"""
+        async with _node('book', concept.id):
+            outline = Outline.query.filter_by(basic_concept_id=concept.id, level='book').first()
+            if outline and outline.content and not self.refresh:
+                return outline
+
+            concept_text = '\n'.join(
+                f'{key}: {value}' for key, value in concept.to_dict().items()
+                if key not in _CONCEPT_META_FIELDS and value
+            )
+            content = await self._call('全文大纲', lambda: self.ai_assistant.generate_outline(concept_text))
+
+            outline = _get_or_create({'basic_concept_id': concept.id, 'level': 'book'},
+                                     project_id=concept.project_id, title='全文大纲', order=0)
+            outline.content = content
+            db.session.commit()
+            return outline
+
+    async def chapter_outline(self, book: Outline, chapter_number: int) -> Outline:
+        """章节大纲节点"""
+        keys = {'parent_id': book.id, 'level': 'chapter', 'order': chapter_number}
+        async with _node('outline', *keys.values()):
+            chapter = Outline.query.filter_by(**keys).first()
+            if chapter and chapter.content and not self.refresh:
+                return chapter
+
+            book_content = book.content or ''
+            lines = await self._call(
+                f'第{chapter_number}章大纲',
+                lambda: self.ai_assistant.generate_chapter_outline(book_content, chapter_number)
+            )
+
+            chapter = _get_or_create(keys, project_id=book.project_id, title=f'第{chapter_number}章')
+            chapter.content = '\n'.join(lines)
+            db.session.commit()
+            return chapter
+
+    async def section_outline(self, chapter: Outline, section_number: int) -> Outline:
+        """分节大纲节点"""
+        keys = {'parent_id': chapter.id, 'level': 'section', 'order': section_number}
+        async with _node('outline', *keys.values()):
+            section = Outline.query.filter_by(**keys).first()
+            if section and section.content and not self.refresh:
+                return section
+
+            chapter_title = chapter.title
+            chapter_content = chapter.content or ''
+            content = await self._call(
+                f'{chapter_title}第{section_number}节大纲',
+                lambda: self.ai_assistant.generate_section_outline(chapter_content, section_number)
+            )
+
+            section = _get_or_create(keys, project_id=chapter.project_id,
+                                     title=f'{chapter_title}第{section_number}节')
+            section.content = content
+            db.session.commit()
+            return section
+
+    async def section_summary(self, section: Outline) -> Outline:
+        """内容概要节点"""
+        async with _node('summary', section.id):
+            # 等待期间可能已由另一个流水线生成
+            db.session.refresh(section)
+            if section.summary and not self.refresh:
+                return section
+
+            section_content = section.content or ''
+            section.summary = await self._call(
+                f'{section.title}概要',
+                lambda: self.ai_assistant.generate_section_summary(section_content)
+            )
+            db.session.commit()
+            return section
+
+    async def section_content(self, section: Outline) -> Content:
+        """正文节点"""
+        async with _node('content', section.id):
+            content = Content.query.filter_by(outline_id=section.id).order_by(Content.id).first()
+            if content and content.content:
+                return content
+
+            summary = section.summary or ''
+            text = await self._call(
+                f'{section.title}正文',
+                lambda: self.ai_assistant.generate_section_content(summary)
+            )
+
+            # 先更新分节纲要行（行锁/写锁）再检查：其他进程同时生成同一分节时，等它提交后使用已有的正文记录
+            db.session.execute(db.update(Outline).where(Outline.id == section.id)
+                               .values(updated_at=db.func.current_timestamp()))
+            content = Content.query.filter_by(outline_id=section.id).order_by(Content.id).first()
+            if content is None:
+                content = Content(project_id=section.project_id, outline_id=section.id, title=section.title)
+                db.session.add(content)
+            content.content = text
+            db.session.commit()
+            return content
+
+    # ---- 子图 ----
+
+    async def run_section(self, chapter: Outline, section_number: int) -> Content:
+        """分节大纲 → 概要 → 正文"""
+        section = await self.section_outline(chapter, section_number)
+        section = await self.section_summary(section)
+        return await self.section_content(section)
+
+    async def run_chapter(self, book: Outline, chapter_number: int) -> List[Content]:
+        """章节大纲 → 各分节（并发）"""
+        chapter = await self.chapter_outline(book, chapter_number)
+        return await self.gather([
+            self.run_section(chapter, n) for n in range(1, self.sections_per_chapter + 1)
+        ])
+
+    async def run(self, concept: BasicConcept) -> Dict[str, Any]:
+        """执行整本书的生成，返回完成情况"""
+        self.failures = []
+        book = await self.full_outline(concept)
+        chapter_count = concept.estimated_chapters or self.default_chapters
+        chapters = await self.gather([
+            self.run_chapter(book, n) for n in range(1, chapter_count + 1)
+        ])
+        return {
+            'outline_id': book.id,
+            'chapters': chapter_count,
+            'completed_sections': sum(len(c) for c in chapters),
+            'failures': list(self.failures)
+        }
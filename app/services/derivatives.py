@@ -0,0 +1,409 @@
+"""素材的缩略图、预览图和文本
+
+列表页直接嵌入原图时，几十 MB 的照片和 PDF 拖慢整个页面。上传完成后由后台任务
+material.derivatives 为每个文件生成：
+- thumb：列表中使用的小图（DERIVATIVE_THUMB_SIZE）
+- preview：点开查看的网页尺寸图（DERIVATIVE_PREVIEW_SIZE）
+- txt：提取的纯文本，保存到 InspirationMaterial.extracted_text，生成创意时作为提示词的上下文
+
+解码和缩放图片是 CPU 密集的工作，在 DERIVATIVE_WORKERS 个子进程组成的进程池中执行，
+不占用 Web 进程和任务线程的 GIL。生成的文件与原文件放在一起（<哈希>.thumb.webp 等），
+相同内容的文件只生成一次，重复执行时已存在的文件直接复用。
+
+图片需要安装 Pillow，PDF 需要安装 PyMuPDF（只提取文本时也可以用 pypdf）；
+缺少时对应的文件不会生成，状态记为 incomplete，安装后执行 `flask materials-derivatives` 补齐。
+纯文本和 docx 只用标准库即可提取。
+"""
+import asyncio
+import io
+import multiprocessing
+import os
+import threading
+import zipfile
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Union
+from xml.etree import ElementTree
+
+from flask import current_app
+
+from app import db
+from app.models import Blob
+from app.models.creation import InspirationMaterial
+from app.services import blob_store
+
+VARIANTS = ('thumb', 'preview')
+
+DOCX_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+_WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+# 可直接按文本读取的非 text/* 类型
+_TEXT_TYPES = {'application/json', 'application/xml', 'application/x-yaml'}
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def supported(content_type: Optional[str]) -> bool:
+    """是否能为该类型的文件生成缩略图或文本"""
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    return (content_type.startswith('image/') or content_type.startswith('text/')
+            or content_type in _TEXT_TYPES or content_type in ('application/pdf', DOCX_TYPE))
+
+
+def image_format() -> str:
+    return str(current_app.config.get('DERIVATIVE_IMAGE_FORMAT', 'WEBP')).upper()
+
+
+def image_mimetype() -> str:
+    return 'image/jpeg' if image_format() == 'JPEG' else f'image/{image_format().lower()}'
+
+
+def derivative_path(sha256: str, variant: str) -> str:
+    """生成文件的路径：与原文件在同一目录"""
+    extension = 'txt' if variant == 'txt' else ('jpg' if image_format() == 'JPEG' else image_format().lower())
+    suffix = 'txt' if variant == 'txt' else f'{variant}.{extension}'
+    return f'{blob_store.blob_path(sha256)}.{suffix}'
+
+
+def _settings() -> Dict[str, Any]:
+    """传给子进程的参数（子进程中没有应用上下文）"""
+    config = current_app.config
+    return {
+        'thumb_size': int(config.get('DERIVATIVE_THUMB_SIZE', 320)),
+        'preview_size': int(config.get('DERIVATIVE_PREVIEW_SIZE', 1280)),
+        'format': image_format(),
+        'quality': int(config.get('DERIVATIVE_QUALITY', 80)),
+        'max_pixels': int(config.get('DERIVATIVE_MAX_PIXELS', 100_000_000)),
+        'text_chars': int(config.get('DERIVATIVE_TEXT_CHARS', 200_000)),
+    }
+
+
+def _pool() -> ProcessPoolExecutor:
+    """进程池（每个进程只创建一次）
+
+    使用 spawn 启动子进程：Web 和任务进程中有多个线程，fork 可能复制到被其他线程持有的锁。
+    子进程处理 DERIVATIVE_MAX_TASKS_PER_CHILD 个文件后重启，释放解码大图占用的内存。
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                config = current_app.config
+                _executor = ProcessPoolExecutor(
+                    max_workers=int(config.get('DERIVATIVE_WORKERS', 2)) or None,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    max_tasks_per_child=int(config.get('DERIVATIVE_MAX_TASKS_PER_CHILD', 50)) or None)
+    return _executor
+
+
+def shutdown(wait: bool = True) -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
+
+
+# ---- 以下函数在子进程中执行，只使用参数中的路径和设置 ----
+
+def generate(path: str, content_type: Optional[str], outputs: Dict[str, str],
+             settings: Dict[str, Any]) -> Dict[str, Any]:
+    """为 path 处的文件生成 outputs 中列出的文件（{'thumb': 路径, 'preview': 路径, 'txt': 路径}）
+
+    已存在的文件不再生成。返回 {'thumb': bool, 'preview': bool, 'text': 文本或 None, 'missing': [缺少的依赖]}。
+    """
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    result: Dict[str, Any] = {'thumb': False, 'preview': False, 'text': None, 'missing': []}
+
+    images_done = all(os.path.exists(outputs[v]) for v in VARIANTS)
+    if content_type.startswith('image/'):
+        if not images_done:
+            _image_derivatives(path, outputs, settings, result)
+    elif content_type == 'application/pdf':
+        _pdf_derivatives(path, outputs, settings, result, images_done)
+    elif content_type == DOCX_TYPE:
+        if not os.path.exists(outputs['txt']):
+            _write_text(outputs['txt'], '\n'.join(docx_paragraphs(path)))
+    elif content_type.startswith('text/') or content_type in _TEXT_TYPES:
+        if not os.path.exists(outputs['txt']):
+            with open(path, 'rb') as f:
+                # 只读取需要的部分；中文按最多 4 字节/字估算
+                _write_text(outputs['txt'], decode_text(f.read(settings['text_chars'] * 4)))
+
+    for variant in VARIANTS:
+        result[variant] = os.path.exists(outputs[variant])
+    if os.path.exists(outputs['txt']):
+        with open(outputs['txt'], encoding='utf-8') as f:
+            result['text'] = f.read(settings['text_chars'])
+    return result
+
+
+def detect_encoding(head: bytes) -> str:
+    """根据文件开头判断编码：UTF-8（可带 BOM），否则按 GB18030（常见的中文文本编码）"""
+    if head.startswith(b'\xef\xbb\xbf'):
+        return 'utf-8-sig'
+    try:
+        head.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # 按字节截断时可能切断最后一个字符
+        if e.start < len(head) - 3:
+            return 'gb18030'
+    return 'utf-8'
+
+
+def decode_text(data: bytes) -> str:
+    """按 detect_encoding() 判断的编码解码（UTF-8 只有末尾被截断的字符可能出错，直接丢弃）"""
+    encoding = detect_encoding(data)
+    return data.decode(encoding, errors='replace' if encoding == 'gb18030' else 'ignore')
+
+
+def docx_paragraphs(path: Union[str, BinaryIO]) -> Iterator[str]:
+    """逐段读取 docx 正文（docx 是 zip 包，正文在 word/document.xml）"""
+    with zipfile.ZipFile(path) as archive, archive.open('word/document.xml') as document:
+        for _, element in ElementTree.iterparse(document):
+            if element.tag == f'{_WORD_NS}p':
+                yield ''.join(node.text or '' for node in element.iter(f'{_WORD_NS}t'))
+                element.clear()
+
+
+def _write_text(path: str, text: str) -> None:
+    _atomic_write(path, lambda f: f.write(text.encode('utf-8')))
+
+
+def _atomic_write(path: str, write: Callable[[Any], Any]) -> None:
+    """先写临时文件再重命名，其他进程不会读到写了一半的文件"""
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(temp_path, 'wb') as f:
+            write(f)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _pillow() -> Any:
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return None
+    return Image, ImageOps
+
+
+def _image_derivatives(path: str, outputs: Dict[str, str], settings: Dict[str, Any],
+                       result: Dict[str, Any]) -> None:
+    modules = _pillow()
+    if modules is None:
+        result['missing'].append('Pillow')
+        return
+    Image, ImageOps = modules
+    Image.MAX_IMAGE_PIXELS = settings['max_pixels']
+    with Image.open(path) as image:
+        # JPEG 解码时直接按 1/2、1/4、1/8 缩小，大照片不必解码全部像素
+        image.draft('RGB', (settings['preview_size'], settings['preview_size']))
+        _save_variants(ImageOps.exif_transpose(image), outputs, settings)
+
+
+def _save_variants(image: Any, outputs: Dict[str, str], settings: Dict[str, Any]) -> None:
+    """按预览图、缩略图的顺序缩小并保存（缩略图由预览图缩小，比从原图缩小快）"""
+    from PIL import Image
+
+    fmt = settings['format']
+    if image.mode not in ('RGB', 'RGBA', 'L'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+    if fmt == 'JPEG' and image.mode == 'RGBA':
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    for variant, size in (('preview', settings['preview_size']), ('thumb', settings['thumb_size'])):
+        image = image.copy()
+        image.thumbnail((size, size))
+        if not os.path.exists(outputs[variant]):
+            _atomic_write(outputs[variant], lambda f: image.save(f, fmt, quality=settings['quality']))
+
+
+def _pymupdf() -> Any:
+    try:
+        import pymupdf
+    except ImportError:
+        try:
+            import fitz as pymupdf
+        except ImportError:
+            return None
+    return pymupdf
+
+
+def _pdf_derivatives(path: str, outputs: Dict[str, str], settings: Dict[str, Any],
+                     result: Dict[str, Any], images_done: bool) -> None:
+    text_done = os.path.exists(outputs['txt'])
+    pymupdf = _pymupdf()
+    if pymupdf is None:
+        result['missing'].append('PyMuPDF')
+        if not text_done:
+            _pdf_text_pypdf(path, outputs, settings, result)
+        return
+
+    with pymupdf.open(path) as document:
+        if not text_done:
+            parts: List[str] = []
+            length = 0
+            for page in document:
+                # 超过长度上限后不再读取剩余的页
+                parts.append(page.get_text())
+                length += len(parts[-1])
+                if length >= settings['text_chars']:
+                    break
+            _write_text(outputs['txt'], ''.join(parts)[:settings['text_chars']])
+        if not images_done and document.page_count:
+            modules = _pillow()
+            if modules is None:
+                result['missing'].append('Pillow')
+                return
+            # 首页按预览图尺寸渲染
+            page = document[0]
+            zoom = settings['preview_size'] / max(page.rect.width, page.rect.height, 1)
+            pixmap = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), alpha=False)
+            with modules[0].open(io.BytesIO(pixmap.tobytes('png'))) as image:
+                _save_variants(image, outputs, settings)
+
+
+def _pdf_text_pypdf(path: str, outputs: Dict[str, str], settings: Dict[str, Any],
+                    result: Dict[str, Any]) -> None:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        return
+    parts: List[str] = []
+    length = 0
+    for page in PdfReader(path).pages:
+        parts.append(page.extract_text() or '')
+        length += len(parts[-1])
+        if length >= settings['text_chars']:
+            break
+    _write_text(outputs['txt'], '\n'.join(parts)[:settings['text_chars']])
+
+
+# ---- 以下函数在应用进程中执行 ----
+
+def _outputs(sha256: str) -> Dict[str, str]:
+    return {variant: derivative_path(sha256, variant) for variant in VARIANTS + ('txt',)}
+
+
+def _status(result: Dict[str, Any]) -> str:
+    return 'incomplete' if result['missing'] else 'ready'
+
+
+def record(blob_id: int, result: Dict[str, Any]) -> int:
+    """把生成结果写到引用该文件的所有素材上，返回更新的行数；调用方负责提交"""
+    return db.session.execute(
+        db.update(InspirationMaterial).where(InspirationMaterial.blob_id == blob_id).values(
+            has_thumbnail=result['thumb'],
+            has_preview=result['preview'],
+            extracted_text=result['text'],
+            derivative_status=_status(result)
+        ), execution_options={'synchronize_session': False}
+    ).rowcount
+
+
+def mark_failed(blob_id: int) -> None:
+    db.session.execute(
+        db.update(InspirationMaterial).where(InspirationMaterial.blob_id == blob_id)
+        .values(derivative_status='failed'), execution_options={'synchronize_session': False})
+
+
+async def process_blob(blob: Blob) -> Dict[str, Any]:
+    """在进程池中为一个文件生成缩略图、预览图和文本，并记录到素材上；调用方负责提交"""
+    loop = asyncio.get_running_loop()
+    try:
+        result = await loop.run_in_executor(
+            _pool(), generate, blob_store.blob_path(blob.sha256), blob.content_type, _outputs(blob.sha256), _settings())
+    except BrokenProcessPool:
+        # 子进程意外退出后进程池不能再使用，下次重新创建
+        shutdown(wait=False)
+        raise
+    record(blob.id, result)
+    return result
+
+
+def process_all(blobs: Iterable[Blob], executor: Optional[Executor] = None,
+                on_result: Optional[Callable[[Blob, Optional[Dict[str, Any]], Optional[BaseException]], None]] = None
+                ) -> Dict[str, int]:
+    """批量生成（补齐旧素材或安装依赖后重新生成），所有文件同时提交给进程池
+
+    每个文件完成后记录并提交，返回各状态的数量。
+    """
+    executor = executor or _pool()
+    settings = _settings()
+    futures = {
+        executor.submit(generate, blob_store.blob_path(blob.sha256), blob.content_type,
+                        _outputs(blob.sha256), settings): blob
+        for blob in blobs
+    }
+    counts = {'ready': 0, 'incomplete': 0, 'failed': 0}
+    for future in as_completed(futures):
+        blob = futures[future]
+        error = future.exception()
+        if error is None:
+            result = future.result()
+            record(blob.id, result)
+            counts[_status(result)] += 1
+        else:
+            current_app.logger.warning(f'素材文件 {blob.sha256[:12]} 处理失败: {error}')
+            mark_failed(blob.id)
+            counts['failed'] += 1
+            result = None
+        db.session.commit()
+        if on_result is not None:
+            on_result(blob, result, error)
+    return counts
+
+
+def schedule(blob_ids: Iterable[int]) -> List[int]:
+    """为新上传的文件创建后台任务，返回任务 ID
+
+    相同内容的文件已经生成过时，直接复制已有素材上的结果，不再创建任务。
+    """
+    from app.services import job_queue
+
+    job_ids: List[int] = []
+    for blob_id in sorted(set(blob_ids)):
+        blob = db.session.get(Blob, blob_id)
+        if blob is None or not supported(blob.content_type):
+            continue
+        done = db.session.execute(
+            db.select(InspirationMaterial.has_thumbnail, InspirationMaterial.has_preview,
+                      InspirationMaterial.extracted_text)
+            .filter_by(blob_id=blob_id, derivative_status='ready').limit(1)
+        ).first()
+        if done is not None:
+            record(blob_id, {'thumb': done[0], 'preview': done[1], 'text': done[2], 'missing': []})
+            db.session.commit()
+            continue
+        db.session.execute(
+            db.update(InspirationMaterial)
+            .where(InspirationMaterial.blob_id == blob_id, InspirationMaterial.derivative_status.is_(None))
+            .values(derivative_status='pending'), execution_options={'synchronize_session': False})
+        job_ids.append(job_queue.enqueue('material.derivatives', {'blob_id': blob_id}).id)
+    return job_ids
+
+
+def prompt_context(inspiration_id: int, limit: Optional[int] = None) -> str:
+    """灵感所附素材中提取的文本，合计不超过 limit 个字符（默认 DERIVATIVE_PROMPT_CHARS）"""
+    if limit is None:
+        limit = int(current_app.config.get('DERIVATIVE_PROMPT_CHARS', 4000))
+    rows = db.session.execute(
+        db.select(InspirationMaterial.file_path, InspirationMaterial.extracted_text)
+        .filter(InspirationMaterial.inspiration_id == inspiration_id,
+                InspirationMaterial.extracted_text.isnot(None))
+        .order_by(InspirationMaterial.id)
+    ).all()
+    parts: List[str] = []
+    for name, text in rows:
+        text = text.strip()
+        if not text or limit <= 0:
+            continue
+        parts.append(f'【{name}】\n{text[:limit]}')
+        limit -= len(parts[-1])
+    return '\n\n'.join(parts)
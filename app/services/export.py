@@ -0,0 +1,394 @@
+"""导出书稿：EPUB、Markdown、纯文本
+
+按大纲树的顺序（同级按 Outline.order）输出各节的正文，可选在前面附上项目设定和作品构思。
+导出是逐块生成的：
+- 大纲只取出标题等少量字段，正文按 EXPORT_BATCH_SIZE 个节点一批查询，每批之后释放数据库连接，
+  导出过程中不会长时间占用连接或读事务；
+- 每写完一节就把已生成的数据交给响应（或写入文件），EPUB 的 zip 包同样边压缩边输出
+  （zipfile 写入不可 seek 的流时使用数据描述符，不需要回头修改文件头）。
+内存占用只与一批正文的大小有关，与全书字数无关。
+"""
+import html
+import io
+import re
+import uuid
+import zipfile
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from flask import current_app
+
+from app import db
+from app.models import BasicConcept, Content, Outline, Project, Setting
+
+FORMATS = {
+    'epub': 'application/epub+zip',
+    'md': 'text/markdown; charset=utf-8',
+    'txt': 'text/plain; charset=utf-8',
+}
+
+# 作品构思中导出的字段（与构思页面的顺序、名称一致）
+CONCEPT_FIELDS = [
+    ('world_setting', '世界设定'), ('culture_background', '文化背景'), ('special_elements', '特殊元素'),
+    ('core_conflict', '核心冲突'), ('plot_outline', '故事大纲'), ('subplot_design', '子情节设计'),
+    ('key_events', '关键事件'), ('plot_progression', '情节推进'),
+    ('main_characters', '主要人物'), ('supporting_characters', '重要配角'),
+    ('character_relationships', '人物关系'), ('character_arcs', '人物成长'),
+    ('theme_design', '主题设计'), ('philosophical_elements', '哲学元素'),
+    ('social_commentary', '社会评论'), ('symbolic_system', '象征系统'),
+    ('narrative_perspective', '叙事视角'), ('timeline_structure', '时间线结构'),
+    ('pacing_design', '节奏设计'), ('foreshadowing', '伏笔设置'),
+    ('writing_style', '写作风格'), ('language_features', '语言特色'),
+    ('atmosphere_building', '氛围营造'), ('literary_devices', '文学手法'),
+    ('chapter_structure', '章节结构'), ('volume_planning', '分卷规划'),
+]
+
+
+class Heading(NamedTuple):
+    """标题：depth 为 1 时是章（EPUB 中每章一个文件），更大的为章内的小标题"""
+    depth: int
+    title: str
+
+
+Block = Union[Heading, str]  # 标题或一段正文
+
+
+def _batch_size() -> int:
+    return int(current_app.config.get('EXPORT_BATCH_SIZE', 50))
+
+
+def _release() -> None:
+    """结束读事务并归还连接，下一批查询时重新获取"""
+    db.session.close()
+
+
+# ---- 遍历书稿 ----
+
+def blocks(project_id: int, include_settings: bool = False, include_concept: bool = False) -> Iterator[Block]:
+    """按阅读顺序依次产生标题和正文"""
+    if include_settings:
+        yield from _setting_blocks(project_id)
+    if include_concept:
+        yield from _concept_blocks(project_id)
+    yield from _outline_blocks(project_id)
+    yield from _unassigned_blocks(project_id)
+
+
+def _setting_blocks(project_id: int) -> Iterator[Block]:
+    rows = db.session.execute(
+        db.select(Setting.setting_type, Setting.content)
+        .filter_by(project_id=project_id).order_by(Setting.id)
+    ).all()
+    _release()
+    if rows:
+        yield Heading(1, '设定')
+        for setting_type, content in rows:
+            yield Heading(2, setting_type)
+            if content:
+                yield content
+
+
+def _concept_blocks(project_id: int) -> Iterator[Block]:
+    concept = db.session.execute(
+        db.select(BasicConcept).filter_by(project_id=project_id)
+        .order_by(BasicConcept.created_at.desc(), BasicConcept.id.desc()).limit(1)
+    ).scalar()
+    if concept is None:
+        return
+    fields = [(label, getattr(concept, name)) for name, label in CONCEPT_FIELDS]
+    _release()
+    yield Heading(1, '作品构思')
+    for label, value in fields:
+        if value:
+            yield Heading(2, label)
+            yield value
+
+
+def outline_order(project_id: int) -> List[Tuple[int, int, str]]:
+    """项目的大纲节点按阅读顺序排列，返回 [(outline_id, 标题层级, 标题)]
+
+    只查询树结构需要的字段。全文大纲（level=book）是章节的容器，本身不作为标题（层级为 0）。
+    """
+    rows = db.session.execute(
+        db.select(Outline.id, Outline.parent_id, Outline.title, Outline.level)
+        .filter_by(project_id=project_id)
+        .order_by(db.func.coalesce(Outline.order, 0), Outline.id)
+    ).all()
+    ids = {row.id for row in rows}
+    children: Dict[Optional[int], List[Any]] = {}
+    for row in rows:
+        # 父节点属于其他项目或已删除时作为顶层节点
+        parent_id = row.parent_id if row.parent_id in ids else None
+        children.setdefault(parent_id, []).append(row)
+
+    result: List[Tuple[int, int, str]] = []
+    stack = [(row, 0) for row in reversed(children.get(None, []))]
+    while stack:
+        row, parent_depth = stack.pop()
+        depth = parent_depth if row.level == 'book' else parent_depth + 1
+        result.append((row.id, depth, row.title))
+        stack.extend((child, depth) for child in reversed(children.get(row.id, [])))
+    return result
+
+
+def _outline_blocks(project_id: int) -> Iterator[Block]:
+    order = outline_order(project_id)
+    _release()
+    batch_size = _batch_size()
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+        contents: Dict[int, List[Tuple[Optional[str], Optional[str]]]] = {}
+        for outline_id, title, text in db.session.execute(
+            db.select(Content.outline_id, Content.title, Content.content)
+            .filter(Content.project_id == project_id, Content.outline_id.in_([row[0] for row in batch]))
+            .order_by(Content.id)
+        ):
+            contents.setdefault(outline_id, []).append((title, text))
+        _release()
+
+        for outline_id, depth, title in batch:
+            if depth > 0:
+                yield Heading(depth, title)
+            for content_title, text in contents.pop(outline_id, []):
+                if content_title and content_title != title:
+                    yield Heading(depth + 1, content_title)
+                if text:
+                    yield text
+
+
+def _unassigned_blocks(project_id: int) -> Iterator[Block]:
+    """没有关联大纲的正文，按创建顺序放在最后"""
+    last_id = 0
+    batch_size = _batch_size()
+    while True:
+        rows = db.session.execute(
+            db.select(Content.id, Content.title, Content.content)
+            .filter(Content.project_id == project_id, Content.outline_id.is_(None), Content.id > last_id)
+            .order_by(Content.id).limit(batch_size)
+        ).all()
+        _release()
+        if not rows:
+            return
+        for _, title, text in rows:
+            yield Heading(1, title or '未命名')
+            if text:
+                yield text
+        last_id = rows[-1].id
+
+
+def paragraphs(text: str) -> List[str]:
+    """按行切分为段落，去掉空行"""
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+# ---- 输出格式 ----
+
+def export(project: Project, fmt: str, include_settings: bool = False,
+           include_concept: bool = False) -> Iterator[bytes]:
+    """按格式逐块产生导出文件的数据"""
+    writers = {'epub': write_epub, 'md': write_markdown, 'txt': write_text}
+    if fmt not in writers:
+        raise ValueError(f'不支持的导出格式: {fmt}')
+    title, description = project.name, project.description
+    project_id = project.id
+    _release()
+    return writers[fmt](title, description, project_id,
+                        blocks(project_id, include_settings, include_concept))
+
+
+def write_text(title: str, description: Optional[str], project_id: int, items: Iterable[Block]) -> Iterator[bytes]:
+    yield f'{title}\n\n'.encode('utf-8')
+    for item in items:
+        if isinstance(item, Heading):
+            yield f'\n{item.title}\n\n'.encode('utf-8')
+        else:
+            yield ''.join(f'{line}\n' for line in paragraphs(item)).encode('utf-8')
+
+
+_MARKDOWN_SPECIAL = re.compile(r'^([#>*+\-]|\d+\.)(?=\s)')
+
+
+def _escape_markdown(line: str) -> str:
+    """行首的 #、>、- 和数字编号会被当作 Markdown 语法，加反斜杠转义（编号转义其后的点）"""
+    marker = _MARKDOWN_SPECIAL.match(line)
+    if marker is None:
+        return line
+    if marker.group(1).endswith('.'):
+        return marker.group(1)[:-1] + '\\.' + line[marker.end():]
+    return '\\' + line
+
+
+def write_markdown(title: str, description: Optional[str], project_id: int,
+                   items: Iterable[Block]) -> Iterator[bytes]:
+    yield f'# {title}\n\n'.encode('utf-8')
+    if description:
+        yield f'> {description}\n\n'.encode('utf-8')
+    for item in items:
+        if isinstance(item, Heading):
+            yield f"{'#' * min(item.depth + 1, 6)} {item.title}\n\n".encode('utf-8')
+        else:
+            # 段落之间空一行
+            yield ''.join(f'{_escape_markdown(line)}\n\n' for line in paragraphs(item)).encode('utf-8')
+
+
+class _Pipe(io.RawIOBase):
+    """zipfile 写入的目标：收集写入的数据，由生成器取走后交给响应
+
+    不支持 seek，zipfile 因此在每个文件之后写数据描述符，不需要回头修改文件头。
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        raise io.UnsupportedOperation('seek')
+
+    def tell(self) -> int:
+        return self._position
+
+    def write(self, data: Any) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+_EPUB_MIMETYPE = b'application/epub+zip'
+
+_EPUB_CSS = '''body { font-family: serif; line-height: 1.8; }
+h1 { font-size: 1.6em; text-align: center; margin: 2em 0 1em; }
+h2 { font-size: 1.3em; margin: 1.5em 0 0.8em; }
+h3, h4, h5, h6 { font-size: 1.1em; }
+p { text-indent: 2em; margin: 0 0 0.4em; }
+'''
+
+
+def _xhtml_head(title: str) -> str:
+    return ('<?xml version="1.0" encoding="utf-8"?>\n<!DOCTYPE html>\n'
+            '<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" '
+            'lang="zh-CN" xml:lang="zh-CN">\n'
+            f'<head><meta charset="utf-8"/><title>{html.escape(title)}</title>'
+            '<link rel="stylesheet" type="text/css" href="style.css"/></head>\n<body>\n')
+
+
+def write_epub(title: str, description: Optional[str], project_id: int,
+               items: Iterable[Block]) -> Iterator[bytes]:
+    """EPUB 3：每章一个 XHTML 文件，目录（nav.xhtml、content.opf）在全部章节写完后最后写入"""
+    pipe = _Pipe()
+    book_id = f'urn:uuid:{uuid.uuid5(uuid.NAMESPACE_URL, f"writer-prompt/project/{project_id}")}'
+    # 目录只保存标题和文件名
+    toc: List[Tuple[int, str, str]] = []  # (层级, 标题, href)
+    files: List[str] = []
+
+    # mimetype 必须是第一个文件、不压缩，且文件头中要有大小（阅读器按固定偏移识别格式），
+    # 因此手动写入，再登记到 zip 的目录中；其余文件由 zipfile 从其后开始写入
+    mimetype = zipfile.ZipInfo('mimetype')
+    mimetype.file_size = mimetype.compress_size = len(_EPUB_MIMETYPE)
+    mimetype.CRC = zlib.crc32(_EPUB_MIMETYPE)
+    mimetype.header_offset = 0
+    pipe.write(mimetype.FileHeader() + _EPUB_MIMETYPE)
+
+    with zipfile.ZipFile(pipe, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.filelist.append(mimetype)
+        archive.NameToInfo[mimetype.filename] = mimetype
+        archive.writestr('META-INF/container.xml',
+                         '<?xml version="1.0" encoding="utf-8"?>\n'
+                         '<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">'
+                         '<rootfiles><rootfile full-path="OEBPS/content.opf" '
+                         'media-type="application/oebps-package+xml"/></rootfiles></container>')
+        archive.writestr('OEBPS/style.css', _EPUB_CSS)
+        yield pipe.drain()
+
+        chapter: Optional[Any] = None
+
+        def open_chapter(heading_title: str) -> Any:
+            name = f'chapter{len(files) + 1:04d}.xhtml'
+            files.append(name)
+            handle = archive.open(f'OEBPS/{name}', 'w')
+            handle.write(_xhtml_head(heading_title).encode('utf-8'))
+            return handle
+
+        def close_chapter(handle: Any) -> None:
+            handle.write(b'</body>\n</html>\n')
+            handle.close()
+
+        for item in items:
+            if isinstance(item, Heading):
+                if item.depth <= 1 or chapter is None:
+                    if chapter is not None:
+                        close_chapter(chapter)
+                    chapter = open_chapter(item.title)
+                anchor = f'h{len(toc) + 1}'
+                toc.append((max(item.depth, 1), item.title, f'{files[-1]}#{anchor}'))
+                level = min(max(item.depth, 1), 6)
+                chapter.write(f'<h{level} id="{anchor}">{html.escape(item.title)}</h{level}>\n'.encode('utf-8'))
+            else:
+                if chapter is None:
+                    chapter = open_chapter(title)
+                chapter.write(''.join(f'<p>{html.escape(line)}</p>\n'
+                                      for line in paragraphs(item)).encode('utf-8'))
+            data = pipe.drain()
+            if data:
+                yield data
+
+        if chapter is not None:
+            close_chapter(chapter)
+        if not files:
+            chapter = open_chapter(title)
+            chapter.write(f'<h1>{html.escape(title)}</h1>\n'.encode('utf-8'))
+            close_chapter(chapter)
+
+        archive.writestr('OEBPS/nav.xhtml', _epub_nav(title, toc))
+        archive.writestr('OEBPS/content.opf', _epub_package(book_id, title, description, files))
+        yield pipe.drain()
+    yield pipe.drain()
+
+
+def _epub_nav(title: str, toc: List[Tuple[int, str, str]]) -> str:
+    """嵌套的目录列表"""
+    parts = [_xhtml_head(title), '<nav epub:type="toc" id="toc"><h1>目录</h1>\n']
+    depth = 0
+    for level, heading, href in toc:
+        level = min(level, depth + 1)
+        if level > depth:
+            parts.append('<ol>' * (level - depth))
+        else:
+            parts.append('</li>' + '</ol></li>' * (depth - level))
+        parts.append(f'<li><a href="{html.escape(href)}">{html.escape(heading)}</a>')
+        depth = level
+    if depth:
+        parts.append('</li>' + '</ol></li>' * (depth - 1) + '</ol>')
+    else:
+        parts.append(f'<ol><li><a href="chapter0001.xhtml">{html.escape(title)}</a></li></ol>')
+    parts.append('\n</nav>\n</body>\n</html>\n')
+    return ''.join(parts)
+
+
+def _epub_package(book_id: str, title: str, description: Optional[str], files: List[str]) -> str:
+    modified = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
+    manifest = ''.join(f'<item id="c{index}" href="{name}" media-type="application/xhtml+xml"/>'
+                       for index, name in enumerate(files, 1))
+    spine = ''.join(f'<itemref idref="c{index}"/>' for index in range(1, len(files) + 1))
+    meta_description = f'<dc:description>{html.escape(description)}</dc:description>' if description else ''
+    return ('<?xml version="1.0" encoding="utf-8"?>\n'
+            '<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="book-id" xml:lang="zh-CN">'
+            '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">'
+            f'<dc:identifier id="book-id">{book_id}</dc:identifier>'
+            f'<dc:title>{html.escape(title)}</dc:title><dc:language>zh-CN</dc:language>{meta_description}'
+            f'<meta property="dcterms:modified">{modified}</meta></metadata>'
+            '<manifest><item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>'
+            f'<item id="css" href="style.css" media-type="text/css"/>{manifest}</manifest>'
+            f'<spine>{spine}</spine></package>')
@@ -0,0 +1,222 @@
+"""导入书稿：从 txt、md、docx 文件批量创建纲要和正文
+
+文件按行（docx 按段落）流式读取，识别章节标题（第N章、第N卷、序章/楔子/尾声、Chapter N，
+Markdown 的 # 标题），每个标题创建一个 Outline（卷为章的上级节点），标题下的文字保存为对应的 Content。
+读到的章节攒够 IMPORT_BATCH_SIZE 章或 IMPORT_BATCH_CHARS 个字符后用 bulk_insert_mappings
+一次写入，整个导入在同一个事务中，由调用方提交；失败时回滚，不会留下导入了一半的书稿。
+
+批量写入不经过 ORM 的 flush 事件：全文搜索索引由 search.index_records() 在每批写入后建立；
+正文不记录初始修订，第一次编辑时会把导入的内容保存为第一个快照（见 revisions._record_change）。
+"""
+import io
+import os
+import re
+from types import SimpleNamespace
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from flask import current_app
+
+from app import db
+from app.models import Content, Outline
+from app.services import derivatives, search
+
+FORMATS = ('txt', 'md', 'docx')
+
+_NUMBER = '0-9０-９零〇一二三四五六七八九十百千万两壹贰叁肆伍陆柒捌玖拾佰仟'
+# 标题后面的内容：不含句末标点，避免把以“第一章”开头的正文句子当作标题
+_TITLE_TAIL = r'(?:[\s:：·、.．\-—]*[^。！？!?；;]{0,30})?$'
+
+# (级别, 正则)：级别小的是级别大的上级
+HEADING_PATTERNS = [
+    (1, re.compile(rf'^第[{_NUMBER}]+[卷部篇集]{_TITLE_TAIL}')),
+    (2, re.compile(rf'^第[{_NUMBER}]+[章回话]{_TITLE_TAIL}')),
+    (2, re.compile(rf'^(?:序章|序言|楔子|引子|前言|尾声|终章|后记|番外[{_NUMBER}]*)(?:[\s:：·、\-—]+[^。！？!?]{{0,30}})?$')),
+    (2, re.compile(r'^(?:chapter\s+[\w\-]+|prologue|epilogue)\b[^.!?]{0,60}$', re.IGNORECASE)),
+]
+_MARKDOWN_HEADING = re.compile(r'^(#{1,6})\s+(.+?)\s*#*\s*$')
+
+
+class InvalidManuscript(ValueError):
+    """文件无法导入（格式不支持、内容为空等）"""
+
+
+class Heading(NamedTuple):
+    level: int
+    title: str
+
+
+def detect_format(filename: str) -> str:
+    """按扩展名判断格式"""
+    fmt = os.path.splitext(filename)[1].lstrip('.').lower()
+    if fmt == 'markdown':
+        fmt = 'md'
+    if fmt not in FORMATS:
+        raise InvalidManuscript(f'不支持的文件格式: {filename}（支持 {"、".join(FORMATS)}）')
+    return fmt
+
+
+def parse_heading(line: str, markdown: bool = False, max_chars: int = 50) -> Optional[Heading]:
+    """识别一行是否为章节标题（超过 max_chars 个字符的行不是标题）"""
+    text = line.strip()
+    if not text or len(text) > max_chars:
+        return None
+    if markdown:
+        match = _MARKDOWN_HEADING.match(text)
+        if match:
+            return Heading(len(match.group(1)), match.group(2).strip())
+    for level, pattern in HEADING_PATTERNS:
+        if pattern.match(text):
+            return Heading(level, text)
+    return None
+
+
+def read_lines(stream: BinaryIO, fmt: str) -> Iterator[str]:
+    """逐行（docx 逐段）读取文件，不把整个文件读入内存；stream 需要支持 seek"""
+    if fmt == 'docx':
+        yield from derivatives.docx_paragraphs(stream)
+        return
+    head = stream.read(64 * 1024)
+    stream.seek(0)
+    text = io.TextIOWrapper(stream, encoding=derivatives.detect_encoding(head), errors='replace', newline=None)
+    try:
+        for line in text:
+            yield line.rstrip('\n')
+    finally:
+        # 不关闭调用方传入的流
+        text.detach()
+
+
+class _Node:
+    """导入中的一个纲要节点"""
+    __slots__ = ('title', 'parent', 'level', 'order', 'children', 'lines', 'chars', 'id')
+
+    def __init__(self, title: str, parent: Optional['_Node'], level: int, order: int) -> None:
+        self.title = title[:200]
+        self.parent = parent
+        self.level = level
+        self.order = order
+        self.children = 0
+        self.lines: List[str] = []
+        self.chars = 0
+        self.id: Optional[int] = None
+
+    @property
+    def depth(self) -> int:
+        return 1 + (self.parent.depth if self.parent is not None else 0)
+
+    def text(self) -> str:
+        return '\n'.join(self.lines).strip('\n')
+
+
+def chapters(lines: Iterable[str], markdown: bool = False, first_order: int = 1,
+             max_heading_chars: int = 50) -> Iterator[_Node]:
+    """把行序列切分为章节节点，按出现顺序产生（上级节点总是先于下级）
+
+    第一个标题之前的文字归入“前言”。
+    """
+    stack: List[_Node] = []
+    top_count = first_order - 1
+    current: Optional[_Node] = None
+    for line in lines:
+        heading = parse_heading(line, markdown, max_heading_chars)
+        if heading is None:
+            if current is None:
+                if not line.strip():
+                    continue
+                # 前言不作为后续标题的上级，不入栈
+                top_count += 1
+                current = _Node('前言', None, 0, top_count)
+            current.lines.append(line)
+            current.chars += len(line) + 1
+            continue
+
+        if current is not None:
+            yield current
+        while stack and stack[-1].level >= heading.level:
+            stack.pop()
+        parent = stack[-1] if stack else None
+        if parent is None:
+            top_count += 1
+            order = top_count
+        else:
+            parent.children += 1
+            order = parent.children
+        current = _Node(heading.title, parent, heading.level, order)
+        stack.append(current)
+    if current is not None:
+        yield current
+
+
+class ImportResult(NamedTuple):
+    outlines: int
+    contents: int
+    characters: int
+    indexed: int
+
+    def to_dict(self) -> Dict[str, int]:
+        return self._asdict()
+
+
+def import_manuscript(project_id: int, stream: BinaryIO, fmt: str) -> ImportResult:
+    """导入书稿，导入的章节排在项目已有的顶层纲要之后；调用方负责提交"""
+    if fmt not in FORMATS:
+        raise InvalidManuscript(f'不支持的文件格式: {fmt}')
+    config = current_app.config
+    batch_size = int(config.get('IMPORT_BATCH_SIZE', 200))
+    batch_chars = int(config.get('IMPORT_BATCH_CHARS', 2_000_000))
+
+    last_order = db.session.execute(
+        db.select(db.func.max(Outline.order)).filter(Outline.project_id == project_id, Outline.parent_id.is_(None))
+    ).scalar()
+    totals = [0, 0, 0, 0]
+    batch: List[_Node] = []
+    pending_chars = 0
+    nodes = chapters(read_lines(stream, fmt), markdown=fmt == 'md', first_order=int(last_order or 0) + 1,
+                     max_heading_chars=int(config.get('IMPORT_HEADING_MAX_CHARS', 50)))
+    for node in nodes:
+        batch.append(node)
+        pending_chars += node.chars
+        if len(batch) >= batch_size or pending_chars >= batch_chars:
+            _add(totals, _write_batch(project_id, batch))
+            batch, pending_chars = [], 0
+    _add(totals, _write_batch(project_id, batch))
+    if not totals[0]:
+        raise InvalidManuscript('文件中没有内容')
+    return ImportResult(*totals)
+
+
+def _add(totals: List[int], counts: Tuple[int, int, int, int]) -> None:
+    for index, value in enumerate(counts):
+        totals[index] += value
+
+
+def _write_batch(project_id: int, nodes: List[_Node]) -> Tuple[int, int, int, int]:
+    """写入一批节点：按层级逐层插入纲要（上级的 id 先确定），再插入正文并建立搜索索引"""
+    if not nodes:
+        return 0, 0, 0, 0
+    by_depth: Dict[int, List[_Node]] = {}
+    for node in nodes:
+        by_depth.setdefault(node.depth, []).append(node)
+    for depth in sorted(by_depth):
+        group = by_depth[depth]
+        mappings = [{'project_id': project_id, 'title': node.title, 'order': node.order,
+                     'parent_id': node.parent.id if node.parent is not None else None}
+                    for node in group]
+        db.session.bulk_insert_mappings(Outline, mappings, return_defaults=True)
+        for node, mapping in zip(group, mappings):
+            node.id = mapping['id']
+
+    contents: List[Dict[str, Any]] = []
+    characters = 0
+    for node in nodes:
+        text = node.text()
+        # 写入后只保留 id，上级节点在后续批次中只需要 id
+        node.lines = []
+        if text.strip():
+            contents.append({'project_id': project_id, 'outline_id': node.id, 'title': node.title, 'content': text})
+            characters += len(text)
+    indexed = 0
+    if contents:
+        db.session.bulk_insert_mappings(Content, contents, return_defaults=True)
+        indexed = search.index_records('content', [SimpleNamespace(**mapping) for mapping in contents])
+    return len(nodes), len(contents), characters, indexed
@@ -0,0 +1,255 @@
+"""基于数据库的后台任务队列
+
+AI生成耗时较长，接口只负责创建 GenerationJob 并立即返回 202，由工作线程在后台执行。
+任务表本身就是队列，不依赖外部消息中间件：工作线程可以运行在 Web 进程内
+（JOB_WORKERS > 0 时在第一次入队时启动），也可以用 `flask run-worker` 单独运行。
+同一个任务只会被一个工作线程领取（条件更新保证），失败后按指数退避重试，
+运行中的任务可以请求取消，单次执行超过 timeout 秒会被中止。
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from flask import Flask, current_app
+from sqlalchemy import or_, select
+
+from app import db
+from app.models.job import GenerationJob
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+_handlers: Dict[str, JobHandler] = {}
+
+
+class JobFailed(Exception):
+    """任务执行失败，且不应再重试"""
+
+
+def job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """注册任务处理函数；处理函数接收 payload，返回可 JSON 序列化的结果"""
+    def decorator(func: JobHandler) -> JobHandler:
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+def enqueue(kind: str, payload: Dict[str, Any], timeout: Optional[int] = None,
+            max_attempts: Optional[int] = None) -> GenerationJob:
+    """创建任务并唤醒工作线程"""
+    if kind not in _handlers:
+        raise ValueError(f'未注册的任务类型: {kind}')
+    config = current_app.config
+    job = GenerationJob(
+        kind=kind,
+        payload=json.dumps(payload, ensure_ascii=False),
+        timeout=timeout or int(config.get('JOB_DEFAULT_TIMEOUT', 300)),
+        max_attempts=max_attempts or int(config.get('JOB_MAX_ATTEMPTS', 3))
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    pool = ensure_workers(current_app._get_current_object())  # type: ignore
+    if pool is not None:
+        pool.wake()
+    return job
+
+
+def cancel(job: GenerationJob) -> GenerationJob:
+    """取消任务：等待中的任务直接取消，运行中的任务由工作线程在下一次检查时中止
+
+    与领取任务一样用条件更新：检查状态之后任务可能刚被工作线程领取，此时改为请求中止。
+    """
+    cancelled = GenerationJob.query.filter_by(id=job.id, status='pending').update({
+        'status': 'cancelled',
+        'finished_at': datetime.utcnow()
+    }, synchronize_session=False)
+    if not cancelled:
+        GenerationJob.query.filter_by(id=job.id, status='running').update(
+            {'cancel_requested': True}, synchronize_session=False)
+    db.session.commit()
+    db.session.refresh(job)
+    return job
+
+
+class JobWorkerPool:
+    """轮询任务表的工作线程池"""
+
+    def __init__(self, app: Flask, workers: int, poll_interval: float = 1.0) -> None:
+        self.app = app
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'job-worker-{os.getpid()}-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, wait: bool = True) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        name = threading.current_thread().name
+        while not self._stop.is_set():
+            with self.app.app_context():
+                try:
+                    job = self._claim(name)
+                    if job is not None:
+                        self._execute(job)
+                        continue
+                except Exception as e:
+                    self.app.logger.error(f"任务工作线程出错: {str(e)}")
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _claim(self, worker: str) -> Optional[GenerationJob]:
+        """领取一个待执行的任务；条件更新保证同一任务只被一个工作线程领取"""
+        now = datetime.utcnow()
+        self._requeue_stale(now)
+
+        candidates = GenerationJob.query.filter(
+            GenerationJob.status == 'pending',
+            or_(GenerationJob.run_after.is_(None), GenerationJob.run_after <= now)
+        ).order_by(GenerationJob.created_at, GenerationJob.id).limit(5).all()
+
+        for candidate in candidates:
+            claimed = GenerationJob.query.filter_by(id=candidate.id, status='pending').update({
+                'status': 'running',
+                'worker': worker,
+                'started_at': now,
+                'attempts': GenerationJob.attempts + 1
+            }, synchronize_session=False)
+            db.session.commit()
+            if claimed:
+                return db.session.get(GenerationJob, candidate.id)
+        return None
+
+    def _requeue_stale(self, now: datetime) -> None:
+        """工作进程意外退出时，超时已久的运行中任务重新放回队列"""
+        grace = timedelta(seconds=int(self.app.config.get('JOB_STALE_GRACE', 60)))
+        stale = GenerationJob.query.filter(GenerationJob.status == 'running').all()
+        changed = False
+        for job in stale:
+            if job.started_at and job.started_at + timedelta(seconds=job.timeout) + grace < now:
+                job.status = 'pending' if job.attempts < job.max_attempts else 'failed'
+                job.error = '任务执行中断'
+                if job.status == 'failed':
+                    job.finished_at = now
+                changed = True
+        if changed:
+            db.session.commit()
+
+    def _execute(self, job: GenerationJob) -> None:
+        handler = _handlers.get(job.kind)
+        if handler is None:
+            self._finish(job, 'failed', error=f'未注册的任务类型: {job.kind}')
+            return
+
+        self.app.logger.info(f"开始执行任务 {job.id} ({job.kind})，第 {job.attempts} 次")
+        try:
+            result = asyncio.run(self._run_handler(job, handler))
+        except asyncio.CancelledError:
+            db.session.rollback()
+            self._finish(job, 'cancelled', error='任务已取消')
+        except asyncio.TimeoutError:
+            db.session.rollback()
+            self._fail_or_retry(job, f'任务执行超时（{job.timeout} 秒）')
+        except JobFailed as e:
+            db.session.rollback()
+            self._finish(job, 'failed', error=str(e))
+        except Exception as e:
+            db.session.rollback()
+            self._fail_or_retry(job, f'{type(e).__name__}: {str(e)}')
+        else:
+            self._finish(job, 'succeeded', result=result)
+
+    async def _run_handler(self, job: GenerationJob, handler: JobHandler) -> Any:
+        """在超时限制内执行处理函数，并定期检查取消请求"""
+        task = asyncio.ensure_future(handler(job.get_payload()))
+        deadline = time.monotonic() + job.timeout
+        job_id = job.id
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                await self._cancel_task(task)
+                raise asyncio.TimeoutError()
+            done, _ = await asyncio.wait({task}, timeout=min(self.poll_interval, remaining))
+            if done:
+                return task.result()
+            if self._cancel_requested(job_id):
+                await self._cancel_task(task)
+                raise asyncio.CancelledError()
+
+    @staticmethod
+    async def _cancel_task(task: asyncio.Future) -> None:
+        # 等处理函数的清理（释放限流名额、回滚、finally 块）执行完，再由调用方记录任务状态
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    def _cancel_requested(self, job_id: int) -> bool:
+        # 使用独立连接读取，避免处理函数未提交的事务看不到其他进程写入的取消标记
+        with db.engine.connect() as conn:
+            return bool(conn.execute(
+                select(GenerationJob.cancel_requested).where(GenerationJob.id == job_id)
+            ).scalar())
+
+    def _fail_or_retry(self, job: GenerationJob, error: str) -> None:
+        job = db.session.get(GenerationJob, job.id)
+        if job.cancel_requested:
+            self._finish(job, 'cancelled', error='任务已取消')
+        elif job.attempts < job.max_attempts:
+            backoff = float(self.app.config.get('JOB_RETRY_BACKOFF', 5)) * (2 ** (job.attempts - 1))
+            job.status = 'pending'
+            job.error = error
+            job.worker = None
+            job.run_after = datetime.utcnow() + timedelta(seconds=backoff)
+            db.session.commit()
+            self.app.logger.warning(f"任务 {job.id} 失败，{backoff:.0f} 秒后重试: {error}")
+        else:
+            self._finish(job, 'failed', error=error)
+
+    def _finish(self, job: GenerationJob, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        job = db.session.get(GenerationJob, job.id)
+        job.status = status
+        job.error = error
+        job.result = json.dumps(result, ensure_ascii=False) if result is not None else None
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        log = self.app.logger.info if status == 'succeeded' else self.app.logger.error
+        log(f"任务 {job.id} ({job.kind}) 结束: {status}{'，' + error if error else ''}")
+
+
+_pool: Optional[JobWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def ensure_workers(app: Flask) -> Optional[JobWorkerPool]:
+    """按 JOB_WORKERS 配置在当前进程内启动工作线程（只启动一次）；为 0 时由独立进程执行任务"""
+    global _pool
+    workers = int(app.config.get('JOB_WORKERS', 2))
+    if workers <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = JobWorkerPool(app, workers, float(app.config.get('JOB_POLL_INTERVAL', 1.0)))
+                pool.start()
+                _pool = pool
+    return _pool
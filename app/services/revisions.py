@@ -0,0 +1,251 @@
+"""正文修订历史
+
+每次修改 Content.content（编辑保存、自动保存、AI生成）都由 Session 的 before_flush 事件
+在同一事务中记录一条 ContentRevision，回滚时一起回滚。
+
+修订不保存全文：大多数修订只保存相对上一修订的行级差异（JSON 格式的替换操作列表），
+每隔 REVISION_SNAPSHOT_INTERVAL 条、或自上一快照以来累计的差异超过全文的
+REVISION_SNAPSHOT_RATIO 时保存一次完整快照。重建任意修订只需读取最近的快照和其后
+不超过 REVISION_SNAPSHOT_INTERVAL 条差异，一次查询取出。
+
+计算差异前先去掉首尾相同的行，自动保存通常只改动一两段，5 万字的章节也只需比较改动的几行。
+快照和较大的差异由 CompressedText 压缩存储。
+
+自动保存会产生大量修订，compact() 把 REVISION_COMPACT_AFTER_DAYS 天前的修订
+按 REVISION_COMPACT_BUCKET_MINUTES 分钟合并为一条（保留每段时间内的最后一条），
+可以用 `flask revisions-compact` 或后台任务 content.compact_revisions 执行。
+"""
+import json
+from datetime import datetime, timedelta
+from difflib import SequenceMatcher
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from flask import Flask, current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import Content, ContentRevision
+
+# 差异操作：把旧文本的第 start 到 end 行（不含）替换为 text
+Delta = List[Tuple[int, int, str]]
+
+
+class RevisionNotFound(LookupError):
+    """指定的修订不存在（或已被合并）"""
+
+
+def init_app(app: Flask) -> None:
+    """注册修订记录事件"""
+    if not event.contains(Session, 'before_flush', _record_before_flush):
+        event.listen(Session, 'before_flush', _record_before_flush)
+
+
+def _setting(key: str, default: Any) -> Any:
+    return current_app.config.get(key, default) if has_app_context() else default
+
+
+def make_delta(old: str, new: str) -> Delta:
+    """计算把 old 变为 new 的行级差异"""
+    a = old.splitlines(keepends=True)
+    b = new.splitlines(keepends=True)
+
+    # 先去掉首尾相同的行，只比较中间改动的部分
+    prefix, limit = 0, min(len(a), len(b))
+    while prefix < limit and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and a[-suffix - 1] == b[-suffix - 1]:
+        suffix += 1
+
+    a_middle = a[prefix:len(a) - suffix]
+    b_middle = b[prefix:len(b) - suffix]
+    if not a_middle or not b_middle:
+        return [(prefix, prefix + len(a_middle), ''.join(b_middle))] if a_middle or b_middle else []
+    return [
+        (prefix + i1, prefix + i2, ''.join(b_middle[j1:j2]))
+        for tag, i1, i2, j1, j2 in SequenceMatcher(None, a_middle, b_middle).get_opcodes()
+        if tag != 'equal'
+    ]
+
+
+def apply_delta(lines: List[str], delta: Delta) -> List[str]:
+    """对按行切分（保留换行符）的文本应用差异，返回新的行列表"""
+    result: List[str] = []
+    position = 0
+    for start, end, replacement in delta:
+        result.extend(lines[position:start])
+        result.extend(replacement.splitlines(keepends=True))
+        position = end
+    result.extend(lines[position:])
+    return result
+
+
+def _encode_delta(delta: Delta) -> str:
+    return json.dumps(delta, ensure_ascii=False, separators=(',', ':'))
+
+
+def _decode_delta(data: str) -> Delta:
+    return [tuple(op) for op in json.loads(data)]  # type: ignore[misc]
+
+
+def _revision(number: int, old: Optional[str], new: str, previous: Optional[ContentRevision]) -> Dict[str, Any]:
+    """按快照规则编码一条修订：previous 为上一修订（old 为其全文），没有时保存快照"""
+    if previous is not None and old is not None:
+        data = _encode_delta(make_delta(old, new))
+        delta_chars = previous.delta_chars + len(data)
+        interval = int(_setting('REVISION_SNAPSHOT_INTERVAL', 50))
+        ratio = float(_setting('REVISION_SNAPSHOT_RATIO', 0.5))
+        if number - previous.snapshot_number < interval and delta_chars <= max(len(new) * ratio, 1024):
+            return {'number': number, 'is_snapshot': False, 'snapshot_number': previous.snapshot_number,
+                    'data': data, 'delta_chars': delta_chars, 'length': len(new)}
+    return {'number': number, 'is_snapshot': True, 'snapshot_number': number,
+            'data': new, 'delta_chars': 0, 'length': len(new)}
+
+
+def _latest(session: Session, content_id: int) -> Optional[ContentRevision]:
+    return session.execute(
+        db.select(ContentRevision).filter_by(content_id=content_id)
+        .order_by(ContentRevision.number.desc()).limit(1)
+    ).scalar()
+
+
+def _record_before_flush(session: Session, flush_context: Any, instances: Any) -> None:
+    changed = [obj for obj in session.dirty
+               if isinstance(obj, Content) and db.inspect(obj).attrs.content.history.has_changes()]
+    created = [obj for obj in session.new if isinstance(obj, Content) and obj.content]
+    deleted = [obj.id for obj in session.deleted if isinstance(obj, Content)]
+    if not (changed or created or deleted):
+        return
+
+    with session.no_autoflush:
+        for content_id in deleted:
+            session.execute(db.delete(ContentRevision).where(ContentRevision.content_id == content_id))
+        for obj in created:
+            session.add(ContentRevision(content=obj, **_revision(1, None, obj.content, None)))
+        for obj in changed:
+            _record_change(session, obj)
+
+
+def _record_change(session: Session, obj: Content) -> None:
+    new = obj.content or ''
+    history = db.inspect(obj).attrs.content.history
+    if history.deleted:
+        old = history.deleted[0] or ''
+    else:
+        # 修改前未加载旧值（如提交后过期），此时数据库中还是修改前的内容
+        old = session.execute(db.select(Content.content).filter_by(id=obj.id)).scalar() or ''
+    if old == new:
+        return
+
+    previous = _latest(session, obj.id)
+    if previous is None:
+        # 启用修订历史之前的正文：先把旧内容保存为第一个快照
+        if old:
+            previous = ContentRevision(content_id=obj.id, **_revision(1, None, old, None))
+            session.add(previous)
+        number = 2 if old else 1
+    else:
+        number = previous.number + 1
+    session.add(ContentRevision(content_id=obj.id, **_revision(number, old, new, previous)))
+
+
+def _chain(content_id: int, number: int) -> List[Tuple[bool, str]]:
+    """重建第 number 条修订需要的 (是否快照, 数据)：最近的快照及其后的差异"""
+    snapshot_number = db.session.execute(
+        db.select(ContentRevision.snapshot_number).filter_by(content_id=content_id, number=number)
+    ).scalar()
+    if snapshot_number is None:
+        raise RevisionNotFound(f'修订不存在: {number}')
+    return list(db.session.execute(
+        db.select(ContentRevision.is_snapshot, ContentRevision.data)
+        .filter(ContentRevision.content_id == content_id,
+                ContentRevision.number >= snapshot_number,
+                ContentRevision.number <= number)
+        .order_by(ContentRevision.number)
+    ).tuples())
+
+
+def get_text(content_id: int, number: int) -> str:
+    """重建第 number 条修订的全文"""
+    lines: List[str] = []
+    for is_snapshot, data in _chain(content_id, number):
+        lines = data.splitlines(keepends=True) if is_snapshot else apply_delta(lines, _decode_delta(data))
+    return ''.join(lines)
+
+
+def _texts(content_id: int, batch_size: int = 200) -> Iterator[Tuple[ContentRevision, str]]:
+    """按修订号顺序依次重建每条修订，只在内存中保留当前一条的全文"""
+    lines: List[str] = []
+    last_number = 0
+    while True:
+        rows = db.session.execute(
+            db.select(ContentRevision).options(db.undefer(ContentRevision.data))
+            .filter(ContentRevision.content_id == content_id, ContentRevision.number > last_number)
+            .order_by(ContentRevision.number).limit(batch_size)
+        ).scalars().all()
+        if not rows:
+            return
+        for row in rows:
+            if row.is_snapshot:
+                lines = row.data.splitlines(keepends=True)
+            else:
+                lines = apply_delta(lines, _decode_delta(row.data))
+            yield row, ''.join(lines)
+        last_number = rows[-1].number
+
+
+def compact(content_id: int, before: Optional[datetime] = None, bucket: Optional[timedelta] = None) -> int:
+    """合并 before 之前的修订：每 bucket 时间段只保留最后一条，返回删除的修订数
+
+    保留的修订号不变，之后的修订按新的前后关系重新编码。调用方负责提交。
+    """
+    if before is None:
+        before = datetime.utcnow() - timedelta(days=int(_setting('REVISION_COMPACT_AFTER_DAYS', 7)))
+    if bucket is None:
+        bucket = timedelta(minutes=int(_setting('REVISION_COMPACT_BUCKET_MINUTES', 60)))
+
+    rows = db.session.execute(
+        db.select(ContentRevision.number, ContentRevision.created_at)
+        .filter_by(content_id=content_id).order_by(ContentRevision.number)
+    ).all()
+    dropped = set()
+    for (number, created_at), following in zip(rows, rows[1:]):
+        if created_at is None or created_at >= before:
+            continue
+        # 与下一条在同一时间段内的修订被下一条取代
+        if following.created_at is not None and \
+                int(created_at.timestamp() // bucket.total_seconds()) == \
+                int(following.created_at.timestamp() // bucket.total_seconds()):
+            dropped.add(number)
+    if not dropped:
+        return 0
+
+    # 第一条被删除的修订之前的部分不受影响，之后保留的修订相对上一条保留的修订重新编码
+    first_dropped = min(dropped)
+    previous: Optional[ContentRevision] = None
+    previous_text: Optional[str] = None
+    for row, text in _texts(content_id):
+        if row.number in dropped:
+            db.session.delete(row)
+            continue
+        if row.number > first_dropped:
+            for key, value in _revision(row.number, previous_text, text, previous).items():
+                setattr(row, key, value)
+        previous, previous_text = row, text
+    db.session.flush()
+    return len(dropped)
+
+
+def compact_all(before: Optional[datetime] = None, bucket: Optional[timedelta] = None) -> int:
+    """合并所有正文的旧修订，每个正文提交一次，返回删除的修订数"""
+    if before is None:
+        before = datetime.utcnow() - timedelta(days=int(_setting('REVISION_COMPACT_AFTER_DAYS', 7)))
+    content_ids = db.session.execute(
+        db.select(ContentRevision.content_id).filter(ContentRevision.created_at < before).distinct()
+    ).scalars().all()
+    removed = 0
+    for content_id in content_ids:
+        removed += compact(content_id, before, bucket)
+        db.session.commit()
+    return removed
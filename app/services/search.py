@@ -0,0 +1,339 @@
+"""项目全文搜索
+
+正文、纲要、设定、灵感和全文构思的文本写入 SQLite FTS5 虚拟表 search_index，
+由 Session 的 after_flush 事件在同一事务中同步，回滚时索引一起回滚。
+
+FTS5 自带的 unicode61 分词器把连续的中文当作一个词，因此写入和查询前先用分词器
+在词之间插入零宽空格（SEPARATOR）。默认的 unigram 分词器把每个汉字作为一个词，
+查询词按短语匹配，相当于子串查找；安装 jieba 后可设置 SEARCH_SEGMENTER = 'jieba'，
+也可以用 register_segmenter() 注册其他分词器。更换分词器后需执行 `flask search-reindex`。
+
+长文本按段落切分为约 SEARCH_CHUNK_CHARS 个字符的片段分别索引，
+摘要只需处理命中的片段，百万字的正文也能在毫秒级返回结果。
+"""
+import re
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from flask import Flask, current_app, has_app_context
+from markupsafe import Markup, escape
+from sqlalchemy import DDL, bindparam, event, text
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import Project, Setting, Outline, Content
+from app.models.planning import InitialIdea, BasicConcept, CONCEPT_FIELD_GROUPS
+
+Segmenter = Callable[[str], str]
+
+SEPARATOR = '\u200b'  # 零宽空格：unicode61 视为分隔符，显示时去掉即可还原原文
+
+# 汉字、假名、谚文
+_CJK = re.compile('([\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff\U00020000-\U0002ffff])')
+
+# 摘要中命中词的起止标记（私用区字符，转义后再替换为 <mark>）
+_MARK_START, _MARK_END = '\ue000', '\ue001'
+
+CREATE_INDEX_SQL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+    "project, title, body, doc_type UNINDEXED, doc_id UNINDEXED, field UNINDEXED, chunk UNINDEXED, "
+    "tokenize = 'unicode61 remove_diacritics 2')"
+)
+DROP_INDEX_SQL = 'DROP TABLE IF EXISTS search_index'
+
+# db.create_all() 时一并创建（只对 SQLite 生效）
+event.listen(db.metadata, 'after_create', DDL(CREATE_INDEX_SQL).execute_if(dialect='sqlite'))
+event.listen(db.metadata, 'before_drop', DDL(DROP_INDEX_SQL).execute_if(dialect='sqlite'))
+
+
+class Source(NamedTuple):
+    model: Any
+    code: int  # 参与计算 rowid，已写入索引后不能修改
+    title: Optional[str]
+    fields: Tuple[str, ...]
+
+
+_CONCEPT_TEXT_FIELDS = tuple(
+    field for _, _, fields in CONCEPT_FIELD_GROUPS for field in fields
+    if field not in ('word_count_target', 'estimated_chapters')
+)
+
+SOURCES: Dict[str, Source] = {
+    'content': Source(Content, 1, 'title', ('content',)),
+    'outline': Source(Outline, 2, 'title', ('content', 'summary')),
+    'setting': Source(Setting, 3, 'setting_type', ('content',)),
+    'initial_idea': Source(InitialIdea, 4, None, ('content',)),
+    'basic_concept': Source(BasicConcept, 5, None, _CONCEPT_TEXT_FIELDS),
+}
+_SOURCES_BY_MODEL = {source.model: (doc_type, source) for doc_type, source in SOURCES.items()}
+
+# rowid = 类型(11 位) | 记录 id(32 位) | 字段序号(8 位) | 片段序号(12 位)，
+# 同一条记录的索引行 rowid 连续，更新和删除时按 rowid 范围操作，不需要扫描索引表
+_ID_BITS, _FIELD_BITS, _CHUNK_BITS = 32, 8, 12
+_MAX_CHUNKS = 1 << _CHUNK_BITS
+
+
+class SearchHit(NamedTuple):
+    doc_type: str
+    doc_id: int
+    field: str
+    title: str
+    snippet: Markup
+    rank: float
+
+
+def unigram(value: str) -> str:
+    """每个汉字（假名、谚文）单独成词，其他文字按 unicode61 的规则分词"""
+    return _CJK.sub(SEPARATOR + r'\1' + SEPARATOR, value).replace(SEPARATOR * 2, SEPARATOR)
+
+
+def jieba_segmenter(value: str) -> str:
+    """使用 jieba 按词切分（需要安装 jieba）"""
+    import jieba
+    return SEPARATOR.join(jieba.cut(value))
+
+
+SEGMENTERS: Dict[str, Segmenter] = {
+    'unigram': unigram,
+    'jieba': jieba_segmenter,
+}
+
+
+def register_segmenter(name: str, segmenter: Segmenter) -> None:
+    """注册分词器：接收原文，返回在词之间插入了 SEPARATOR 的文本"""
+    SEGMENTERS[name] = segmenter
+
+
+def get_segmenter() -> Segmenter:
+    name = current_app.config.get('SEARCH_SEGMENTER', 'unigram') if has_app_context() else 'unigram'
+    try:
+        return SEGMENTERS[name]
+    except KeyError:
+        raise ValueError(f'未知的分词器: {name}') from None
+
+
+def init_app(app: Flask) -> None:
+    """注册索引同步事件"""
+    if not event.contains(Session, 'after_flush', _sync_after_flush):
+        event.listen(Session, 'after_flush', _sync_after_flush)
+
+
+def is_available(connection: Any = None) -> bool:
+    """当前数据库是否支持全文搜索（仅 SQLite）"""
+    bind = connection if connection is not None else db.session.get_bind()
+    return bind.dialect.name == 'sqlite'
+
+
+def search(project_id: int, query: str, limit: int = 20, offset: int = 0) -> List[SearchHit]:
+    """搜索项目内的文本；多个词以空白分隔，全部命中才返回
+
+    结果按文档计数：同一条记录（如一章正文）的多个命中片段只返回最相关的一个，limit/offset 也按文档计算。
+    命中片段不超过 SEARCH_RANK_LIMIT 个时按相关度（bm25，标题权重更高）排序；
+    超过时（如搜索主角的名字）逐个计算相关度代价很高且意义不大，改为按文档顺序返回，每个文档取第一个片段。
+    """
+    match = _match_expression(project_id, query)
+    if match is None:
+        return []
+
+    rank_limit = int(current_app.config.get('SEARCH_RANK_LIMIT', 1000))
+    matches = db.session.execute(text(
+        'SELECT count(*) FROM (SELECT rowid FROM search_index WHERE search_index MATCH :match LIMIT :cap)'
+    ), {'match': match, 'cap': rank_limit + 1}).scalar()
+    if matches <= rank_limit:
+        best = (
+            'SELECT id, rank FROM ('
+            '  SELECT id, rank, row_number() OVER (PARTITION BY doc_type, doc_id ORDER BY rank, id) AS n FROM ('
+            '    SELECT rowid AS id, doc_type, doc_id, bm25(search_index, 0.0, 5.0, 1.0) AS rank '
+            '    FROM search_index WHERE search_index MATCH :match))'
+            ' WHERE n = 1 ORDER BY rank, id LIMIT :limit OFFSET :offset'
+        )
+    else:
+        # bm25() 第一次调用时要统计全部命中片段，按文档顺序返回时不能出现在查询中；
+        # 同一文档的片段 rowid 连续，最小的 rowid 即文档的第一个命中片段
+        best = (
+            'SELECT min(rowid) AS id, 0.0 AS rank FROM search_index WHERE search_index MATCH :match '
+            'GROUP BY doc_type, doc_id ORDER BY id LIMIT :limit OFFSET :offset'
+        )
+    params = {'match': match, 'limit': limit, 'offset': offset}
+    ranked = db.session.execute(text(best), params).all()
+    if not ranked:
+        return []
+
+    # 只为选中的片段生成摘要
+    rows = db.session.execute(text(
+        "SELECT rowid AS id, doc_type, doc_id, field, title, "
+        "snippet(search_index, 2, :start, :end, '…', :tokens) AS snippet "
+        "FROM search_index WHERE search_index MATCH :match AND rowid IN :ids"
+    ).bindparams(bindparam('ids', expanding=True)), {
+        'start': _MARK_START, 'end': _MARK_END,
+        'tokens': int(current_app.config.get('SEARCH_SNIPPET_TOKENS', 32)),
+        'match': match, 'ids': [row.id for row in ranked],
+    })
+    by_id = {row.id: row for row in rows}
+    return [SearchHit(row.doc_type, row.doc_id, row.field, _restore(row.title), _highlight(row.snippet), rank)
+            for row, rank in ((by_id[item.id], item.rank) for item in ranked if item.id in by_id)]
+
+
+def rebuild_index(project_id: Optional[int] = None) -> int:
+    """重建索引（全部或单个项目），返回写入的片段数；由调用方提交事务"""
+    connection = db.session.connection()
+    if not is_available(connection):
+        return 0
+    if project_id is None:
+        connection.execute(text('DELETE FROM search_index'))
+    else:
+        connection.execute(text('DELETE FROM search_index WHERE search_index MATCH :match'),
+                           {'match': f'project:{_project_token(project_id)}'})
+
+    segment = get_segmenter()
+    count = 0
+    for doc_type, source in SOURCES.items():
+        query = source.model.query
+        if project_id is not None:
+            query = query.filter_by(project_id=project_id)
+        rows: List[Dict[str, Any]] = []
+        for obj in query.order_by(source.model.id).yield_per(200):
+            rows.extend(_index_rows(doc_type, source, obj, segment))
+            if len(rows) >= 1000:
+                count += _insert(connection, rows)
+                rows = []
+        count += _insert(connection, rows)
+    return count
+
+
+def index_records(doc_type: str, records: Sequence[Any]) -> int:
+    """为绕过 ORM 事件写入的记录（如批量导入）建立索引，返回写入的片段数"""
+    connection = db.session.connection()
+    if not is_available(connection):
+        return 0
+    source = SOURCES[doc_type]
+    segment = get_segmenter()
+    for obj in records:
+        _delete_document(connection, source, obj.id)
+    return _insert(connection, [row for obj in records for row in _index_rows(doc_type, source, obj, segment)])
+
+
+def _sync_after_flush(session: Session, flush_context: Any) -> None:
+    upserts: List[Tuple[str, Source, Any]] = []
+    deletes: List[Tuple[Source, int]] = []
+    deleted_projects: List[int] = []
+
+    for obj in session.new:
+        entry = _SOURCES_BY_MODEL.get(type(obj))
+        if entry is not None:
+            upserts.append((entry[0], entry[1], obj))
+    for obj in session.dirty:
+        entry = _SOURCES_BY_MODEL.get(type(obj))
+        if entry is not None and _indexed_fields_changed(obj, entry[1]):
+            upserts.append((entry[0], entry[1], obj))
+    for obj in session.deleted:
+        entry = _SOURCES_BY_MODEL.get(type(obj))
+        if entry is not None:
+            deletes.append((entry[1], obj.id))
+        elif isinstance(obj, Project):
+            deleted_projects.append(obj.id)
+
+    if not (upserts or deletes or deleted_projects):
+        return
+    connection = session.connection()
+    if not is_available(connection):
+        return
+
+    for source, doc_id in deletes:
+        _delete_document(connection, source, doc_id)
+    for project_id in deleted_projects:
+        connection.execute(text('DELETE FROM search_index WHERE search_index MATCH :match'),
+                           {'match': f'project:{_project_token(project_id)}'})
+    if upserts:
+        segment = get_segmenter()
+        rows = []
+        for doc_type, source, obj in upserts:
+            _delete_document(connection, source, obj.id)
+            rows.extend(_index_rows(doc_type, source, obj, segment))
+        _insert(connection, rows)
+
+
+def _indexed_fields_changed(obj: Any, source: Source) -> bool:
+    state = db.inspect(obj)
+    keys = ('project_id',) + source.fields + ((source.title,) if source.title else ())
+    return any(state.attrs[key].history.has_changes() for key in keys)
+
+
+def _rowid(source: Source, doc_id: int, field_index: int = 0, chunk: int = 0) -> int:
+    return (((source.code << _ID_BITS | doc_id) << _FIELD_BITS | field_index) << _CHUNK_BITS) | chunk
+
+
+def _delete_document(connection: Any, source: Source, doc_id: int) -> None:
+    low = _rowid(source, doc_id)
+    high = _rowid(source, doc_id + 1) - 1
+    connection.execute(text('DELETE FROM search_index WHERE rowid BETWEEN :low AND :high'),
+                       {'low': low, 'high': high})
+
+
+def _index_rows(doc_type: str, source: Source, obj: Any, segment: Segmenter) -> Iterator[Dict[str, Any]]:
+    title = (getattr(obj, source.title) or '') if source.title else ''
+    chunk_chars = int(current_app.config.get('SEARCH_CHUNK_CHARS', 2000)) if has_app_context() else 2000
+    for field_index, field in enumerate(source.fields):
+        value = getattr(obj, field)
+        if not value:
+            continue
+        for chunk, part in enumerate(_chunks(value, chunk_chars)):
+            yield {
+                'rowid': _rowid(source, obj.id, field_index, chunk),
+                'project': _project_token(obj.project_id),
+                'title': segment(title),
+                'body': segment(part),
+                'doc_type': doc_type,
+                'doc_id': obj.id,
+                'field': field,
+                'chunk': chunk,
+            }
+
+
+def _insert(connection: Any, rows: List[Dict[str, Any]]) -> int:
+    if rows:
+        connection.execute(text(
+            'INSERT INTO search_index (rowid, project, title, body, doc_type, doc_id, field, chunk) '
+            'VALUES (:rowid, :project, :title, :body, :doc_type, :doc_id, :field, :chunk)'
+        ), rows)
+    return len(rows)
+
+
+def _chunks(value: str, size: int) -> Iterator[str]:
+    """按段落切分，片段长度不超过 size（单个段落过长时直接截断）"""
+    start, count = 0, 0
+    while start < len(value):
+        end = start + size
+        if end < len(value) and count < _MAX_CHUNKS - 1:
+            newline = value.rfind('\n', start + size // 2, end)
+            if newline != -1:
+                end = newline + 1
+        else:
+            end = len(value)
+        yield value[start:end]
+        start, count = end, count + 1
+
+
+def _project_token(project_id: int) -> str:
+    return f'p{project_id}'
+
+
+def _match_expression(project_id: int, query: str) -> Optional[str]:
+    segment = get_segmenter()
+    phrases = [
+        '"' + segment(term).replace('"', '""') + '"'
+        for term in query.split() if re.search(r'\w', term)
+    ]
+    if not phrases:
+        return None
+    return f"project:{_project_token(project_id)} AND {{title body}}:({' AND '.join(phrases)})"
+
+
+def _restore(value: Optional[str]) -> str:
+    return (value or '').replace(SEPARATOR, '')
+
+
+def _highlight(snippet: str) -> Markup:
+    """去掉分词符，转义后把命中标记替换为 <mark>，相邻的标记合并"""
+    html = str(escape(_restore(snippet)))
+    html = html.replace(_MARK_END + _MARK_START, '')
+    return Markup(html.replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>'))
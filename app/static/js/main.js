@@ -53,4 +53,152 @@ function loadHelperContent(url) {
                 console.error('Error loading helper content:', error);
             });
     }
-}
\ No newline at end of file
+}
+
+// 等待后台生成任务完成：接口返回 202 和任务地址后轮询任务状态，完成后返回任务结果
+function waitForJob(response, interval) {
+    interval = interval || 2000;
+    return new Promise(function(resolve, reject) {
+        if (!response || !response.status_url) {
+            resolve(response);
+            return;
+        }
+        function poll() {
+            fetch(response.status_url)
+                .then(res => res.json())
+                .then(job => {
+                    if (job.status === 'succeeded') {
+                        fetch(response.result_url)
+                            .then(res => res.json())
+                            .then(resolve, reject);
+                    } else if (job.status === 'failed' || job.status === 'cancelled') {
+                        reject(new Error(job.error || '任务失败'));
+                    } else {
+                        setTimeout(poll, interval);
+                    }
+                })
+                .catch(reject);
+        }
+        poll();
+    });
+}
+
+// 列表无限滚动：.infinite-scroll 元素进入视口时请求 data-next-url（分页接口，html=1），
+// 把返回的列表项追加到 data-target 指定的容器，并在容器上触发 items-loaded 事件
+function initInfiniteScroll(sentinel) {
+    const target = document.querySelector(sentinel.dataset.target);
+    let loading = false;
+
+    function loadNext() {
+        const nextUrl = sentinel.dataset.nextUrl;
+        if (loading || !nextUrl || !target) {
+            return;
+        }
+        loading = true;
+        const url = new URL(nextUrl, window.location.origin);
+        url.searchParams.set('start', target.children.length);
+        fetch(url)
+            .then(response => response.json())
+            .then(data => {
+                target.insertAdjacentHTML('beforeend', data.html || '');
+                target.dispatchEvent(new CustomEvent('items-loaded', {detail: data}));
+                if (data.next_url) {
+                    sentinel.dataset.nextUrl = data.next_url;
+                } else {
+                    observer.disconnect();
+                    sentinel.remove();
+                }
+            })
+            .catch(error => {
+                // 出错后停止自动加载，避免反复请求
+                console.error('Error loading next page:', error);
+                observer.disconnect();
+                delete sentinel.dataset.nextUrl;
+            })
+            .finally(() => {
+                loading = false;
+                // 追加后哨兵仍在视口内时不会再次触发观察回调，直接继续加载
+                if (sentinel.isConnected && sentinel.getBoundingClientRect().top < window.innerHeight + 400) {
+                    loadNext();
+                }
+            });
+    }
+
+    const observer = new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting)) {
+            loadNext();
+        }
+    }, {rootMargin: '400px'});
+    observer.observe(sentinel);
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('.infinite-scroll').forEach(initInfiniteScroll);
+});
+
+// 分块上传文件：先创建上传（createUrl），再按服务端返回的 chunk_size 逐块 PATCH，
+// 请求失败或偏移量不一致（409）时按服务端记录的 offset 续传，最后 complete 返回 blob_id
+function uploadInChunks(createUrl, file, onProgress, maxRetries) {
+    maxRetries = maxRetries === undefined ? 5 : maxRetries;
+
+    function json(response) {
+        return response.json().then(data => {
+            if (!response.ok && response.status !== 409) {
+                throw new Error(data.error || response.statusText);
+            }
+            return {status: response.status, data: data};
+        });
+    }
+
+    return fetch(createUrl, {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({filename: file.name, size: file.size, content_type: file.type})
+    })
+        .then(json)
+        .then(({data: upload}) => {
+            let offset = upload.offset;
+            let retries = 0;
+
+            function next() {
+                if (onProgress) {
+                    onProgress(offset, file.size);
+                }
+                if (offset >= file.size) {
+                    return fetch(upload.upload_url + '/complete', {method: 'POST'})
+                        .then(json)
+                        .then(({status, data}) => {
+                            if (status === 409) {
+                                throw new Error(data.error);
+                            }
+                            return data;
+                        });
+                }
+                return fetch(upload.upload_url, {
+                    method: 'PATCH',
+                    headers: {'Upload-Offset': String(offset), 'Content-Type': 'application/octet-stream'},
+                    body: file.slice(offset, offset + upload.chunk_size)
+                })
+                    .then(json)
+                    .then(({data}) => {
+                        offset = data.offset;
+                        retries = 0;
+                        return next();
+                    })
+                    .catch(error => {
+                        if (++retries > maxRetries) {
+                            throw error;
+                        }
+                        // 网络中断：查询服务端已接收的字节数后续传
+                        return new Promise(resolve => setTimeout(resolve, 1000 * retries))
+                            .then(() => fetch(upload.upload_url).then(json))
+                            .then(({data}) => {
+                                offset = data.offset;
+                                return next();
+                            });
+                    });
+            }
+
+            return next();
+        });
+}
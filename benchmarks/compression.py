@@ -0,0 +1,227 @@
+"""长文本压缩的效果对比
+
+用同一份数据分别在不压缩和各压缩方式下建库，报告：
+- VACUUM 后的数据库文件大小，以及正文、全文构思两张表占用的页数（dbstat 统计，含溢出页）；
+- 按页缓存大小估算的随机读取命中率：Python 的 sqlite3 模块不提供页缓存命中计数，
+  这里按“均匀随机读取时命中率约为 缓存页数 / 表页数”估算，表越小，同样的缓存命中率越高；
+- 随机读取单条正文、单条全文构思（读出全部字段）的延迟，包含解压的开销。
+
+压测数据不使用 benchmarks.seed：seed 的正文是同一句话重复，压缩率远高于真实文本。
+这里按字频近似 Zipf 分布随机生成中文，压缩率接近真实小说正文。
+
+每种压缩方式在单独的子进程中运行（配置在导入应用时读取）。
+
+用法（在项目根目录执行）：
+    python -m benchmarks.compression
+    python -m benchmarks.compression --codec none --codec zlib --chapters 100
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+TABLES = ['content', 'basic_concept']
+
+# 估算命中率时使用的页缓存大小（KB）：较小的缓存，以及 sqlite 引擎配置的默认值
+CACHE_SIZES_KB = [8 * 1024, 64000]
+
+# 常用汉字从 U+4E00 开始取，按 1/rank 的频率抽样
+_CHARSET = [chr(0x4E00 + index) for index in range(3500)]
+_WEIGHTS = [1.0 / (rank + 1) for rank in range(len(_CHARSET))]
+
+
+def _prose(rng: random.Random, length: int) -> str:
+    """生成约 length 个字符、带标点和分段的随机中文"""
+    chars = rng.choices(_CHARSET, weights=_WEIGHTS, k=length)
+    position = 0
+    while position < length:
+        position += rng.randint(8, 30)
+        if position < length:
+            chars[position] = '。' if rng.random() < 0.4 else '，'
+        if rng.random() < 0.05 and position + 1 < length:
+            chars[position + 1] = '\n'
+    return ''.join(chars)
+
+
+def generate(chapters: int, chapter_chars: int, concepts: int) -> Dict[str, int]:
+    """写入一个项目的正文和全文构思"""
+    from app import db
+    from app.models import Project, Content
+    from app.models.planning import InitialIdea, CreativeExpansion, BasicConcept, CONCEPT_FIELD_GROUPS
+
+    rng = random.Random(42)
+    project = Project(name='压缩对比')
+    db.session.add(project)
+    db.session.flush()
+    idea = InitialIdea(project_id=project.id, content='压缩对比', source_type='虚构世界')
+    db.session.add(idea)
+    db.session.flush()
+    expansion = CreativeExpansion(project_id=project.id, initial_idea_id=idea.id, summary='压缩对比')
+    db.session.add(expansion)
+    db.session.commit()
+
+    for start in range(0, chapters, 20):
+        db.session.execute(db.insert(Content), [{
+            'project_id': project.id,
+            'title': f'第{index + 1}章',
+            'content': _prose(rng, chapter_chars),
+        } for index in range(start, min(start + 20, chapters))])
+        db.session.commit()
+
+    text_fields = [field for _, _, fields in CONCEPT_FIELD_GROUPS for field in fields
+                   if field not in ('word_count_target', 'estimated_chapters')]
+    db.session.execute(db.insert(BasicConcept), [
+        dict({'project_id': project.id, 'creative_expansion_id': expansion.id},
+             **{field: _prose(rng, 400) for field in text_fields})
+        for _ in range(concepts)
+    ])
+    db.session.commit()
+    return {'project_id': project.id}
+
+
+def _table_pages() -> Dict[str, int]:
+    from app import db
+
+    rows = db.session.execute(db.text(
+        'SELECT name, count(*) FROM dbstat WHERE name IN :names GROUP BY name'
+    ).bindparams(db.bindparam('names', expanding=True)), {'names': TABLES})
+    return {name: pages for name, pages in rows}
+
+
+def _read_latency(model: Any, ids: List[int], columns: List[str], iterations: int) -> Dict[str, float]:
+    from app import db
+    from benchmarks.harness import percentile
+
+    rng = random.Random(7)
+    samples = []
+    for _ in range(iterations):
+        row_id = rng.choice(ids)
+        db.session.expire_all()
+        start = time.perf_counter()
+        row = db.session.get(model, row_id)
+        for column in columns:
+            getattr(row, column)
+        samples.append((time.perf_counter() - start) * 1000)
+    return {'p50_ms': percentile(samples, 50), 'p95_ms': percentile(samples, 95)}
+
+
+def run_codec(codec: str, chapters: int, chapter_chars: int, concepts: int,
+              iterations: int) -> Dict[str, Any]:
+    """在临时数据库中按指定压缩方式建库并测量"""
+    from benchmarks.run import build_app, configure_environment
+
+    workdir = tempfile.mkdtemp(prefix='writer-compression-')
+    try:
+        configure_environment(workdir)
+        os.environ['COMPRESSION_CODEC'] = codec
+        app = build_app()
+
+        from app import db
+        from app.models import Content
+        from app.models.planning import BasicConcept
+        from app.models.types import compressed_columns
+
+        with app.app_context():
+            db.create_all()
+            start = time.perf_counter()
+            generate(chapters, chapter_chars, concepts)
+            write_seconds = time.perf_counter() - start
+
+            db.session.execute(db.text('VACUUM'))
+            db.session.execute(db.text('PRAGMA wal_checkpoint(TRUNCATE)'))
+            page_size = db.session.execute(db.text('PRAGMA page_size')).scalar()
+            pages = _table_pages()
+            size = os.path.getsize(app.config['SQLALCHEMY_DATABASE_URI'][len('sqlite:///'):])
+
+            columns = compressed_columns()
+            content_ids = list(db.session.execute(db.select(Content.id)).scalars())
+            concept_ids = list(db.session.execute(db.select(BasicConcept.id)).scalars())
+            reads = {
+                'content': _read_latency(Content, content_ids, columns['content'], iterations),
+                'basic_concept': _read_latency(BasicConcept, concept_ids, columns['basic_concept'], iterations),
+            }
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    hit_rates = {
+        str(cache_kb): {table: min(1.0, cache_kb * 1024 / page_size / count)
+                        for table, count in pages.items()}
+        for cache_kb in CACHE_SIZES_KB
+    }
+    return {
+        'codec': codec,
+        'db_bytes': size,
+        'page_size': page_size,
+        'table_pages': pages,
+        'estimated_hit_rate': hit_rates,
+        'reads': reads,
+        'write_seconds': write_seconds,
+    }
+
+
+def _available_codecs() -> List[str]:
+    codecs = ['none', 'zlib']
+    try:
+        import zstandard  # noqa: F401
+        codecs.append('zstd')
+    except ImportError:
+        pass
+    return codecs
+
+
+def _print_report(results: List[Dict[str, Any]]) -> None:
+    baseline = results[0]
+    for result in results:
+        ratio = baseline['db_bytes'] / result['db_bytes']
+        print(f"\n[{result['codec']}] 数据库 {result['db_bytes'] / 1024 / 1024:.1f}MB"
+              f"（{ratio:.2f}x）  写入 {result['write_seconds']:.1f}s")
+        for table in TABLES:
+            pages = result['table_pages'].get(table, 0)
+            hit_rates = '  '.join(
+                f"缓存 {int(cache_kb) // 1024}MB 命中约 {rates.get(table, 1.0):.0%}"
+                for cache_kb, rates in result['estimated_hit_rate'].items()
+            )
+            reads = result['reads'][table]
+            print(f"  {table:<14} {pages:>7} 页  {hit_rates}  "
+                  f"读取 p50 {reads['p50_ms']:.2f}ms  p95 {reads['p95_ms']:.2f}ms")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='长文本压缩的效果对比')
+    parser.add_argument('--codec', action='append', help='压缩方式（可重复），默认为 none、zlib 和可用的 zstd')
+    parser.add_argument('--chapters', type=int, default=300, help='正文章节数')
+    parser.add_argument('--chapter-chars', type=int, default=8000, help='每章字数')
+    parser.add_argument('--concepts', type=int, default=300, help='全文构思条数')
+    parser.add_argument('--iterations', type=int, default=200, help='读取计时次数')
+    parser.add_argument('--json', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.json:
+        # 子进程：只测量一种压缩方式，结果以 JSON 输出
+        result = run_codec(args.codec[0], args.chapters, args.chapter_chars, args.concepts, args.iterations)
+        print(json.dumps(result))
+        return 0
+
+    results = []
+    for codec in args.codec or _available_codecs():
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.compression', '--json', '--codec', codec,
+             '--chapters', str(args.chapters), '--chapter-chars', str(args.chapter_chars),
+             '--concepts', str(args.concepts), '--iterations', str(args.iterations)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    _print_report(results)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
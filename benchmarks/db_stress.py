@@ -0,0 +1,143 @@
+"""数据库并发写入压力测试
+
+多个写线程同时在同一个 SQLite 文件上提交事务（新增灵感、更新项目时间戳），
+读线程同时查询规划页面的列表，统计 "database is locked" 错误。出现锁错误即以非零状态退出。
+
+用法（在项目根目录执行）：
+    python -m benchmarks.db_stress                    # 使用默认引擎配置
+    python -m benchmarks.db_stress --profile none     # 不做调整，对比默认配置的效果
+    python -m benchmarks.db_stress --writers 32 --transactions 100
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from benchmarks.run import build_app, configure_environment
+
+
+def _writer(app: Any, project_id: int, transactions: int, stats: Dict[str, Any],
+            start: threading.Event) -> None:
+    from sqlalchemy.exc import OperationalError
+
+    from app import db
+    from app.models import Project
+    from app.models.planning import InitialIdea
+
+    start.wait()
+    with app.app_context():
+        for index in range(transactions):
+            try:
+                db.session.add(InitialIdea(project_id=project_id, content=f'压力测试 {index}',
+                                           source_type='虚构世界'))
+                project = db.session.get(Project, project_id)
+                project.updated_at = datetime.utcnow()
+                db.session.commit()
+                with stats['lock']:
+                    stats['committed'] += 1
+            except OperationalError as e:
+                db.session.rollback()
+                with stats['lock']:
+                    stats['errors'].append(str(e.orig))
+        db.session.remove()
+
+
+def _reader(app: Any, project_id: int, stop: threading.Event, stats: Dict[str, Any],
+            start: threading.Event) -> None:
+    from sqlalchemy.exc import OperationalError
+
+    from app import db
+    from app.queries import planning as planning_queries
+
+    start.wait()
+    with app.app_context():
+        while not stop.is_set():
+            try:
+                planning_queries.get_initial_ideas(project_id)
+                with stats['lock']:
+                    stats['reads'] += 1
+            except OperationalError as e:
+                with stats['lock']:
+                    stats['errors'].append(str(e.orig))
+            finally:
+                db.session.remove()
+
+
+def run(app: Any, writers: int, readers: int, transactions: int) -> Dict[str, Any]:
+    from app import db
+    from app.models import Project
+
+    with app.app_context():
+        db.create_all()
+        project = Project(name='并发写入')
+        db.session.add(project)
+        db.session.commit()
+        project_id = project.id
+
+    stats: Dict[str, Any] = {'lock': threading.Lock(), 'committed': 0, 'reads': 0, 'errors': []}
+    start, stop = threading.Event(), threading.Event()
+    threads = [threading.Thread(target=_writer, args=(app, project_id, transactions, stats, start))
+               for _ in range(writers)]
+    reader_threads = [threading.Thread(target=_reader, args=(app, project_id, stop, stats, start))
+                      for _ in range(readers)]
+    for thread in threads + reader_threads:
+        thread.start()
+
+    began = time.perf_counter()
+    start.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+    stop.set()
+    for thread in reader_threads:
+        thread.join()
+
+    stats['elapsed'] = elapsed
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='数据库并发写入压力测试')
+    parser.add_argument('--writers', type=int, default=16, help='写线程数')
+    parser.add_argument('--readers', type=int, default=4, help='读线程数')
+    parser.add_argument('--transactions', type=int, default=50, help='每个写线程提交的事务数')
+    parser.add_argument('--profile', default='', help='数据库引擎配置，为空时按连接串选择')
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='writer-db-stress-')
+    try:
+        configure_environment(workdir)
+        os.environ['DATABASE_ENGINE_PROFILE'] = args.profile
+        app = build_app()
+        stats = run(app, args.writers, args.readers, args.transactions)
+
+        from app import db
+        from app.database import pragma_values
+        with app.app_context():
+            pragmas = pragma_values(['journal_mode', 'busy_timeout', 'synchronous'])
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    expected = args.writers * args.transactions
+    errors = stats['errors']
+    print(f"引擎配置: {app.extensions['database_engine_profile']}  PRAGMA: {pragmas}")
+    print(f"写线程 {args.writers}  读线程 {args.readers}  用时 {stats['elapsed']:.2f}s")
+    print(f"提交 {stats['committed']}/{expected}  "
+          f"吞吐 {stats['committed'] / stats['elapsed']:.0f} 事务/s  读取 {stats['reads']} 次")
+    locked = [error for error in errors if 'locked' in error or 'busy' in error]
+    if errors:
+        print(f'错误 {len(errors)} 次（锁错误 {len(locked)} 次），例如: {errors[0]}')
+        return 1
+    print('没有出现锁错误')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""基准测试的计时、SQL 计数和内存测量工具"""
+import gc
+import math
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryCounter:
+    """统计代码块执行期间的 SQL 语句数
+
+    异步视图在 asgiref 的线程中执行，因此不按线程过滤；测量时不应有其他线程访问数据库。
+    """
+
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+        self.count = 0
+        self.statements: List[str] = []
+
+    def _before_execute(self, conn: Any, cursor: Any, statement: str, parameters: Any,
+                        context: Any, executemany: bool) -> None:
+        self.count += 1
+        self.statements.append(statement)
+
+    def __enter__(self) -> 'QueryCounter':
+        self.count = 0
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._before_execute)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        event.remove(self.engine, 'before_cursor_execute', self._before_execute)
+
+
+@contextmanager
+def peak_memory() -> Iterator[Dict[str, int]]:
+    """测量代码块执行期间 Python 分配内存的峰值（字节）"""
+    result = {'peak': 0}
+    gc.collect()
+    tracemalloc.start()
+    try:
+        yield result
+    finally:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result['peak'] = peak
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """最近秩法计算百分位数"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def measure(request: Callable[[], Any], engine: Engine, iterations: int = 20,
+            warmup: int = 2) -> Dict[str, Any]:
+    """多次执行请求，返回延迟百分位数（毫秒）、单次请求的 SQL 数和内存峰值
+
+    计时的请求不开启 tracemalloc，内存峰值由额外的一次请求单独测量。
+    """
+    for _ in range(warmup):
+        _check(request())
+
+    with QueryCounter(engine) as counter:
+        _check(request())
+    queries = counter.count
+
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        _check(request())
+        samples.append((time.perf_counter() - start) * 1000)
+
+    with peak_memory() as memory:
+        _check(request())
+
+    return {
+        'p50_ms': round(percentile(samples, 50), 2),
+        'p95_ms': round(percentile(samples, 95), 2),
+        'p99_ms': round(percentile(samples, 99), 2),
+        'mean_ms': round(sum(samples) / len(samples), 2),
+        'queries': queries,
+        'peak_memory_kb': round(memory['peak'] / 1024),
+    }
+
+
+def _check(response: Any) -> None:
+    status = getattr(response, 'status_code', 200)
+    if status >= 400:
+        raise RuntimeError(f'请求失败: HTTP {status}')
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.25,
+            min_delta_ms: float = 5.0) -> List[str]:
+    """与基线比较，返回回归说明
+
+    - p95 延迟超过基线的 (1 + tolerance) 倍且差值超过 min_delta_ms
+    - SQL 语句数增加
+    - 内存峰值超过基线的 1.5 倍
+    """
+    regressions = []
+    for name, result in current.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if (result['p95_ms'] > base['p95_ms'] * (1 + tolerance)
+                and result['p95_ms'] - base['p95_ms'] > min_delta_ms):
+            regressions.append(f"{name}: p95 {base['p95_ms']}ms -> {result['p95_ms']}ms")
+        if result['queries'] > base['queries']:
+            regressions.append(f"{name}: SQL {base['queries']} -> {result['queries']}")
+        if result['peak_memory_kb'] > base['peak_memory_kb'] * 1.5:
+            regressions.append(
+                f"{name}: 内存峰值 {base['peak_memory_kb']}KB -> {result['peak_memory_kb']}KB"
+            )
+    return regressions
@@ -0,0 +1,78 @@
+"""检查被取消的 AI 调用会归还并发名额
+
+作业超时或被取消时会取消正在进行的 AI 调用。这里让 max_concurrency 个调用（普通调用和流式调用各一轮）
+在执行中被取消，然后确认 in_flight 回到 0、新的调用仍能立即拿到名额；名额泄漏时新调用会一直等待，
+超时后以非零状态退出。不依赖数据库和真实服务商。
+
+用法（在项目根目录执行）：
+    python -m benchmarks.limiter_check
+"""
+import asyncio
+import sys
+from typing import AsyncIterator, List, Optional
+
+from app.services.ai.rate_limit import ProviderLimiter
+
+MAX_CONCURRENCY = 4
+TIMEOUT = 2.0  # 新调用等待名额的上限（秒）
+
+
+async def _hang() -> str:
+    await asyncio.Event().wait()
+    return ''
+
+
+async def _hanging_stream() -> AsyncIterator[str]:
+    await asyncio.Event().wait()
+    yield ''
+
+
+async def _consume(limiter: ProviderLimiter) -> None:
+    async for _ in limiter.stream(_hanging_stream):
+        pass
+
+
+async def _answer() -> str:
+    return 'ok'
+
+
+async def check(mode: str) -> Optional[str]:
+    """取消 MAX_CONCURRENCY 个执行中的调用，返回发现的问题，没有问题时返回 None"""
+    limiter = ProviderLimiter(max_concurrency=MAX_CONCURRENCY, max_retries=0)
+    if mode == 'call':
+        tasks = [asyncio.create_task(limiter.call(_hang)) for _ in range(MAX_CONCURRENCY)]
+    else:
+        tasks = [asyncio.create_task(_consume(limiter)) for _ in range(MAX_CONCURRENCY)]
+    while limiter.concurrency.in_flight < MAX_CONCURRENCY:
+        await asyncio.sleep(0.01)
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    if limiter.concurrency.in_flight:
+        return f'取消后仍占用 {limiter.concurrency.in_flight} 个名额'
+    try:
+        await asyncio.wait_for(limiter.call(_answer), TIMEOUT)
+    except asyncio.TimeoutError:
+        return f'新调用 {TIMEOUT:g} 秒内未拿到名额'
+    return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    failed = []
+    for mode in ('call', 'stream'):
+        problem = asyncio.run(check(mode))
+        print(f'{mode:<8} 取消 {MAX_CONCURRENCY} 个执行中的调用: {problem or "名额已全部归还"}')
+        if problem:
+            failed.append(mode)
+
+    if failed:
+        print(f"\n以下调用方式取消后泄漏并发名额: {', '.join(failed)}")
+        return 1
+    print('\n取消的调用均已归还并发名额')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
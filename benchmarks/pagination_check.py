@@ -0,0 +1,109 @@
+"""检查游标分页不重复、不遗漏
+
+为每个分页列表准备一批在同一秒内创建的记录：灵感和创意通过模型默认值写入，
+其余列表先批量写入，再把一半记录的 created_at 改成同一时刻。
+然后以很小的页大小逐页翻到末尾，每个 id 必须恰好出现一次，否则以非零状态退出。
+
+用法（在项目根目录执行）：
+    python -m benchmarks.pagination_check
+"""
+import random
+import shutil
+import sys
+import tempfile
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.run import build_app, configure_environment
+
+ROWS = 7
+PAGE_SIZE = 3
+MAX_PAGES = 50  # 游标不前进时避免死循环
+
+
+def _prepare() -> Dict[str, Tuple[Callable[..., Any], Dict[str, Any], List[int]]]:
+    """写入数据，返回 {名称: (分页函数, 参数, 全部 id)}"""
+    from app import db
+    from app.models import Project
+    from app.models.creation import Inspiration, CreativeIdea
+    from app.models.planning import InitialIdea, CreativeExpansion, BasicConcept
+    from app.queries import creation as creation_queries, planning as planning_queries
+    from benchmarks.seed import seed_planning
+
+    project = Project(name='分页检查')
+    db.session.add(project)
+    db.session.commit()
+
+    inspirations = [Inspiration(project_id=project.id, content=f'灵感{n}') for n in range(ROWS)]
+    ideas = [CreativeIdea(project_id=project.id, summary=f'创意{n}') for n in range(ROWS)]
+    db.session.add_all(inspirations + ideas)
+    db.session.commit()
+
+    seed_planning(project.id, ROWS, ROWS, ROWS, random.Random(42))
+    same_second = datetime.utcnow().replace(microsecond=0)
+    for model in (InitialIdea, CreativeExpansion, BasicConcept):
+        ids = db.session.scalars(db.select(model.id).filter_by(project_id=project.id)).all()
+        db.session.execute(db.update(model).where(model.id.in_(ids[::2])).values(created_at=same_second))
+    db.session.commit()
+
+    idea = InitialIdea.query.filter_by(project_id=project.id).order_by(InitialIdea.id).first()
+
+    def ids_of(model: Any, **filters: Any) -> List[int]:
+        return db.session.scalars(db.select(model.id).filter_by(project_id=project.id, **filters)).all()
+
+    return {
+        'inspirations': (creation_queries.inspirations_page, {'project_id': project.id}, ids_of(Inspiration)),
+        'creative_ideas': (creation_queries.creative_ideas_page, {'project_id': project.id}, ids_of(CreativeIdea)),
+        'initial_ideas': (planning_queries.initial_ideas_page, {'project_id': project.id}, ids_of(InitialIdea)),
+        'creative_expansions': (planning_queries.creative_expansions_page,
+                                {'project_id': project.id, 'idea_id': idea.id},
+                                ids_of(CreativeExpansion, initial_idea_id=idea.id)),
+        'concepts': (planning_queries.concepts_page, {'project_id': project.id}, ids_of(BasicConcept)),
+    }
+
+
+def collect(page_func: Callable[..., Any], params: Dict[str, Any]) -> List[int]:
+    """逐页取出列表，返回按顺序出现的 id"""
+    seen: List[int] = []
+    cursor = None
+    for _ in range(MAX_PAGES):
+        page = page_func(cursor=cursor, limit=PAGE_SIZE, **params)
+        seen.extend(item.id for item in page.items)
+        cursor = page.next_cursor
+        if not cursor:
+            break
+    return seen
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    workdir = tempfile.mkdtemp(prefix='writer-pagination-')
+    try:
+        configure_environment(workdir)
+        app = build_app()
+        from app import db
+
+        with app.app_context():
+            db.create_all()
+            lists = _prepare()
+            results = {name: (collect(page_func, params), expected)
+                       for name, (page_func, params, expected) in lists.items()}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    broken = []
+    for name, (seen, expected) in results.items():
+        ok = len(seen) == len(set(seen)) and sorted(seen) == sorted(expected)
+        flag = '' if ok else '  <- 重复或遗漏'
+        print(f'{name:<22} 记录 {len(expected):>3}  翻页取得 {len(seen):>3}{flag}')
+        if not ok:
+            broken.append(name)
+
+    if broken:
+        print(f"\n以下列表翻页时重复或遗漏记录: {', '.join(broken)}")
+        return 1
+    print('\n所有列表翻页时每条记录恰好出现一次')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
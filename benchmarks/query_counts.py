@@ -0,0 +1,100 @@
+"""检查页面的 SQL 语句数不随数据量增长
+
+在同一个数据库中准备一个小项目和一个大项目（灵感、创意发散、构思数量相差十倍以上），
+分别请求每个页面并统计 SQL 语句数，两者不相等即说明存在 N+1 查询，以非零状态退出。
+
+用法（在项目根目录执行）：
+    python -m benchmarks.query_counts
+"""
+import random
+import shutil
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.run import build_app, configure_environment
+
+# (名称, URL 模板)
+ROUTES: List[Tuple[str, str]] = [
+    ('index', '/'),
+    ('project_view', '/project/{project_id}'),
+    ('planning_concepts', '/project/{project_id}/planning/concepts'),
+    ('planning_initial_idea', '/project/{project_id}/planning/initial-idea'),
+    ('planning_creative_expansions', '/project/{project_id}/planning/initial-idea/{idea_id}/creative-expansions'),
+    ('planning_basic_concept', '/project/{project_id}/planning/creative-expansion/{expansion_id}/basic-concept'),
+    ('concept_view', '/concept/{concept_id}'),
+]
+
+SIZES = {
+    'small': {'ideas': 3, 'expansions_per_idea': 2, 'concepts': 3},
+    'large': {'ideas': 60, 'expansions_per_idea': 20, 'concepts': 60},
+}
+
+
+def _prepare(size: Dict[str, int], rng: random.Random) -> Dict[str, Any]:
+    from app import db
+    from app.models import Project
+    from app.models.planning import InitialIdea, CreativeExpansion, BasicConcept
+    from benchmarks.seed import seed_planning
+
+    project = Project(name='查询数检查')
+    db.session.add(project)
+    db.session.commit()
+    seed_planning(project.id, size['ideas'], size['expansions_per_idea'], size['concepts'], rng)
+
+    idea = InitialIdea.query.filter_by(project_id=project.id).order_by(InitialIdea.id).first()
+    expansion = CreativeExpansion.query.filter_by(initial_idea_id=idea.id).order_by(CreativeExpansion.id).first()
+    concept = BasicConcept.query.filter_by(project_id=project.id).order_by(BasicConcept.id).first()
+    return {'project_id': project.id, 'idea_id': idea.id, 'expansion_id': expansion.id,
+            'concept_id': concept.id}
+
+
+def count_queries(app: Any, ids: Dict[str, Any]) -> Dict[str, int]:
+    from app import db
+    from benchmarks.harness import QueryCounter
+
+    client = app.test_client()
+    counts = {}
+    for name, template in ROUTES:
+        url = template.format(**ids)
+        client.get(url)  # 预热，排除首次请求的一次性查询
+        with app.app_context(), QueryCounter(db.engine) as counter:
+            response = client.get(url)
+        if response.status_code >= 400:
+            raise RuntimeError(f'{url} 请求失败: HTTP {response.status_code}')
+        counts[name] = counter.count
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    workdir = tempfile.mkdtemp(prefix='writer-query-counts-')
+    try:
+        configure_environment(workdir)
+        app = build_app()
+        from app import db
+
+        rng = random.Random(42)
+        with app.app_context():
+            db.create_all()
+            ids = {name: _prepare(size, rng) for name, size in SIZES.items()}
+        counts = {name: count_queries(app, ids[name]) for name in SIZES}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    growing = []
+    for name, _ in ROUTES:
+        small, large = counts['small'][name], counts['large'][name]
+        flag = '' if small == large else '  <- 随数据量增长'
+        print(f'{name:<30} 小项目 {small:>4}  大项目 {large:>4}{flag}')
+        if small != large:
+            growing.append(name)
+
+    if growing:
+        print(f"\n以下页面的查询数随数据量增长: {', '.join(growing)}")
+        return 1
+    print('\n所有页面的查询数与数据量无关')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""检查热点查询的查询计划
+
+对每个热点查询执行 EXPLAIN QUERY PLAN，出现未使用索引的全表扫描即以非零状态退出。
+新增列表页或按新条件过滤时，把对应的查询加入 hot_queries()。
+
+用法（在项目根目录执行）：
+    python -m benchmarks.query_plans
+"""
+import shutil
+import sys
+import tempfile
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from benchmarks.run import build_app, configure_environment
+
+
+def hot_queries() -> List[Tuple[str, Any, Tuple[str, ...]]]:
+    """(名称, 查询, 允许全表扫描的表)"""
+    from sqlalchemy import or_, tuple_
+
+    from app import db
+    from app.models import Project, Setting, Outline, Content, ContentRevision, Blob
+    from app.models.job import GenerationJob
+    from app.models.creation import Inspiration, InspirationMaterial, CreativeIdea
+    from app.models.planning import InitialIdea, CreativeExpansion, BasicConcept
+    from app.queries import content as content_queries
+    from app.queries import creation as creation_queries
+    from app.queries import planning as planning_queries
+
+    def next_page(query: Any, model: Any) -> Any:
+        # 与 pagination.paginate() 生成的条件相同
+        return query.filter(tuple_(model.created_at, model.id) < (datetime(2024, 1, 1), 100)).limit(21)
+
+    return [
+        # 侧边栏本来就列出全部项目
+        ('sidebar_projects', db.select(Project.id, Project.name, Project.genre).order_by(Project.id), ('project',)),
+        ('planning_concepts', planning_queries.concepts_query(1), ()),
+        ('planning_initial_ideas', planning_queries.initial_ideas_query(1), ()),
+        ('planning_creative_expansions', planning_queries.creative_expansions_query(1, 1), ()),
+        ('planning_concepts_next_page', next_page(planning_queries.concepts_query(1), BasicConcept), ()),
+        ('planning_initial_ideas_next_page', next_page(planning_queries.initial_ideas_query(1), InitialIdea), ()),
+        ('planning_creative_expansions_next_page',
+         next_page(planning_queries.creative_expansions_query(1, 1), CreativeExpansion), ()),
+        ('creation_inspirations_next_page', next_page(creation_queries.inspirations_query(1), Inspiration), ()),
+        ('creation_creative_ideas_next_page', next_page(creation_queries.creative_ideas_query(1), CreativeIdea), ()),
+        ('planning_basic_concept', BasicConcept.query.filter_by(project_id=1, creative_expansion_id=1), ()),
+        ('project_settings', Setting.query.filter_by(project_id=1), ()),
+        ('project_setting_by_type', Setting.query.filter_by(project_id=1, setting_type='world'), ()),
+        ('project_outlines', Outline.query.filter_by(project_id=1), ()),
+        ('project_contents', Content.query.filter_by(project_id=1), ()),
+        ('pipeline_book_outline', Outline.query.filter_by(basic_concept_id=1, level='book'), ()),
+        ('pipeline_child_outline', Outline.query.filter_by(parent_id=1, level='chapter', order=1), ()),
+        ('pipeline_section_content', Content.query.filter_by(outline_id=1), ()),
+        ('content_revisions_next_page', next_page(content_queries.revisions_query(1), ContentRevision), ()),
+        # 与 revisions._chain() 相同：重建修订时取出快照及其后的差异
+        ('content_revision_chain', db.select(ContentRevision.is_snapshot, ContentRevision.data).filter(
+            ContentRevision.content_id == 1, ContentRevision.number >= 1, ContentRevision.number <= 50
+        ).order_by(ContentRevision.number), ()),
+        ('inspiration_material', InspirationMaterial.query.filter_by(inspiration_id=1, file_path='a.png'), ()),
+        ('blob_by_hash', Blob.query.filter_by(sha256='0' * 64), ()),
+        ('blob_gc', Blob.query.filter(Blob.ref_count <= 0, Blob.created_at < datetime(2024, 1, 1)).limit(500), ()),
+        ('job_claim', GenerationJob.query.filter(
+            GenerationJob.status == 'pending',
+            or_(GenerationJob.run_after.is_(None), GenerationJob.run_after <= datetime(2024, 1, 1))
+        ).order_by(GenerationJob.created_at, GenerationJob.id).limit(5), ()),
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    workdir = tempfile.mkdtemp(prefix='writer-query-plans-')
+    try:
+        configure_environment(workdir)
+        app = build_app()
+        from app import db
+        from app.queries.explain import explain
+
+        failures = []
+        with app.app_context():
+            db.create_all()
+            for name, query, allowed in hot_queries():
+                steps = explain(query)
+                scans = [step.detail for step in steps if step.full_scan and step.table not in allowed]
+                print(f"{name:<30} {'全表扫描' if scans else 'OK'}")
+                for step in steps:
+                    print(f'    {step.detail}')
+                if scans:
+                    failures.append(name)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if failures:
+        print(f"\n以下查询出现全表扫描: {', '.join(failures)}")
+        return 1
+    print('\n所有热点查询都使用了索引')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""页面级基准测试
+
+在临时 SQLite 数据库中生成指定规模的数据，使用本地假AI服务（不需要API密钥），
+逐个请求热点页面，报告延迟百分位数、单次请求的 SQL 语句数和内存峰值，并与基线比较。
+
+用法（在项目根目录执行）：
+    python -m benchmarks.run                      # 默认规模，与 benchmarks/baseline.json 比较
+    python -m benchmarks.run --scale small        # 快速检查
+    python -m benchmarks.run --save-baseline      # 更新基线
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# (名称, URL 模板)，模板中的占位符由 seed() 返回的 id 填充
+ROUTES: List[Tuple[str, str]] = [
+    ('index', '/'),
+    ('project_view', '/project/{project_id}'),
+    ('planning_concepts', '/project/{project_id}/planning/concepts'),
+    ('planning_initial_idea', '/project/{project_id}/planning/initial-idea'),
+    ('planning_creative_expansions', '/project/{project_id}/planning/initial-idea/{idea_id}/creative-expansions'),
+    ('concept_view', '/concept/{concept_id}'),
+    ('project_search', '/project/{project_id}/search?q=灯火+窗前'),
+]
+
+
+def configure_environment(workdir: str) -> None:
+    """导入应用之前设置环境变量：临时数据库、假AI服务、不启动后台任务线程"""
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'benchmark.db')
+    os.environ['AI_SERVICE'] = 'fake'
+    os.environ['AI_CACHE_PATH'] = os.path.join(workdir, 'ai_cache.db')
+    os.environ['JOB_WORKERS'] = '0'
+
+
+def build_app() -> Any:
+    """创建应用，关闭 SQL 日志等影响计时的输出"""
+    import logging
+    from app import create_app
+
+    app = create_app()
+    app.logger.setLevel(logging.WARNING)
+    return app
+
+
+def run_routes(app: Any, ids: Dict[str, Any], iterations: int,
+               only: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """测量每个页面"""
+    from app import db
+    from benchmarks.harness import measure
+
+    client = app.test_client()
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, template in ROUTES:
+        if only and name not in only:
+            continue
+        url = template.format(**ids)
+        request: Callable[[], Any] = lambda url=url: client.get(url)
+        with app.app_context():
+            results[name] = measure(request, db.engine, iterations=iterations)
+        results[name]['url'] = template
+        print(_format_row(name, results[name]), flush=True)
+    return results
+
+
+def _format_row(name: str, result: Dict[str, Any]) -> str:
+    return (f"{name:<30} p50 {result['p50_ms']:>9.2f}ms  p95 {result['p95_ms']:>9.2f}ms  "
+            f"p99 {result['p99_ms']:>9.2f}ms  SQL {result['queries']:>5}  "
+            f"内存峰值 {result['peak_memory_kb']:>8}KB")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='页面级基准测试')
+    parser.add_argument('--scale', default='full', choices=['small', 'full'], help='数据规模')
+    parser.add_argument('--iterations', type=int, default=20, help='每个页面的计时次数')
+    parser.add_argument('--route', action='append', help='只测量指定页面（可重复）')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='基线文件')
+    parser.add_argument('--save-baseline', action='store_true', help='将本次结果写入基线文件')
+    parser.add_argument('--output', help='将本次结果写入指定 JSON 文件')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='p95 允许的相对增幅')
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='writer-benchmark-')
+    try:
+        configure_environment(workdir)
+        app = build_app()
+
+        from app import db
+        from benchmarks.seed import seed
+
+        with app.app_context():
+            db.create_all()
+            start = time.perf_counter()
+            ids = seed(args.scale)
+            seed_seconds = time.perf_counter() - start
+        print(f"数据规模 {args.scale}：{ids['counts']}，生成用时 {seed_seconds:.1f} 秒", flush=True)
+
+        results = run_routes(app, ids, args.iterations, args.route)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'scale': args.scale,
+            'iterations': args.iterations,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'routes': results,
+    }
+    if args.output:
+        _write(args.output, report)
+
+    exit_code = 0
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('meta', {}).get('scale') != args.scale:
+            print(f"基线规模为 {baseline.get('meta', {}).get('scale')}，与本次不同，跳过比较")
+        else:
+            from benchmarks.harness import compare
+
+            regressions = compare(results, baseline.get('routes', {}), tolerance=args.tolerance)
+            if regressions:
+                print('\n性能回归：')
+                for line in regressions:
+                    print(f'  - {line}')
+                exit_code = 1
+            else:
+                print('\n与基线相比没有回归')
+
+    if args.save_baseline:
+        _write(args.baseline, report)
+        print(f'基线已写入 {args.baseline}')
+    return exit_code
+
+
+def _write(path: str, report: Dict[str, Any]) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+        f.write('\n')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
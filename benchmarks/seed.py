@@ -0,0 +1,159 @@
+"""基准测试数据生成
+
+按接近真实使用的规模批量写入数据：大量项目（侧边栏），以及少数“重”项目，
+每个重项目有数百条灵感、创意发散和全文构思，以及数 MB 的正文。
+数据内容由固定种子生成，同一规模每次得到相同的数据。
+"""
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from app import db
+from app.models import Project, Content, Outline
+from app.models.planning import InitialIdea, CreativeExpansion, BasicConcept, CONCEPT_FIELD_GROUPS
+from app.services import search
+
+SCALES: Dict[str, Dict[str, int]] = {
+    # 快速检查：几秒内完成
+    'small': {
+        'projects': 200,
+        'heavy_projects': 1,
+        'ideas': 20,
+        'expansions_per_idea': 3,
+        'concepts': 20,
+        'contents': 4,
+        'content_bytes': 256 * 1024,
+    },
+    # 默认规模：数千个项目，重项目有数百条规划数据和数 MB 正文
+    'full': {
+        'projects': 3000,
+        'heavy_projects': 2,
+        'ideas': 300,
+        'expansions_per_idea': 3,
+        'concepts': 300,
+        'contents': 6,
+        'content_bytes': 2 * 1024 * 1024,
+    },
+}
+
+_BATCH = 1000
+_TEXT = '夜色渐深，城市的灯火一盏盏熄灭。她站在窗前，回想起那封来自远方的信，心中涌起难以言说的情绪。'
+
+
+def _text(rng: random.Random, length: int) -> str:
+    """生成约 length 个字符的正文"""
+    repeat = length // len(_TEXT) + 1
+    start = rng.randrange(len(_TEXT))
+    return (_TEXT[start:] + _TEXT * repeat)[:length]
+
+
+def _insert(model: Any, rows: List[Dict[str, Any]]) -> None:
+    for start in range(0, len(rows), _BATCH):
+        db.session.execute(db.insert(model), rows[start:start + _BATCH])
+
+
+def seed_planning(project_id: int, ideas: int, expansions_per_idea: int, concepts: int,
+                  rng: random.Random) -> None:
+    """为项目写入灵感、创意发散和全文构思"""
+    now = datetime(2024, 1, 1)
+    concept_fields = [field for _, _, fields in CONCEPT_FIELD_GROUPS for field in fields]
+
+    _insert(InitialIdea, [{
+        'project_id': project_id,
+        'content': _text(rng, 300),
+        'source_type': '虚构世界',
+        'created_at': now + timedelta(minutes=index),
+    } for index in range(ideas)])
+    db.session.commit()
+    idea_ids = [row[0] for row in db.session.execute(
+        db.select(InitialIdea.id).filter_by(project_id=project_id).order_by(InitialIdea.id)
+    )]
+
+    _insert(CreativeExpansion, [{
+        'project_id': project_id,
+        'initial_idea_id': idea_id,
+        'summary': _text(rng, 100),
+        'genre': '奇幻小说',
+        'theme': _text(rng, 30),
+        'innovation_points': _text(rng, 120),
+        'is_selected': n == 0,
+        'created_at': now + timedelta(minutes=index),
+    } for index, idea_id in enumerate(idea_ids) for n in range(expansions_per_idea)])
+    db.session.commit()
+    expansion_ids = [row[0] for row in db.session.execute(
+        db.select(CreativeExpansion.id).filter_by(project_id=project_id).order_by(CreativeExpansion.id)
+    )]
+
+    rows = []
+    for index in range(concepts):
+        row: Dict[str, Any] = {
+            'project_id': project_id,
+            'creative_expansion_id': expansion_ids[index % len(expansion_ids)],
+            'created_at': now + timedelta(minutes=index),
+            'updated_at': now + timedelta(minutes=index),
+        }
+        for field in concept_fields:
+            row[field] = rng.randint(100000, 800000) if field == 'word_count_target' else (
+                rng.randint(10, 80) if field == 'estimated_chapters' else _text(rng, 400))
+        rows.append(row)
+    _insert(BasicConcept, rows)
+    db.session.commit()
+
+
+def seed(scale: str = 'full', seed_value: int = 42) -> Dict[str, Any]:
+    """写入指定规模的数据，返回重项目和示例记录的 id，供基准测试构造请求"""
+    params = SCALES[scale]
+    rng = random.Random(seed_value)
+    now = datetime(2024, 1, 1)
+    genres = ['novel', 'script', 'article', 'other']
+
+    _insert(Project, [{
+        'name': f'项目{index:05d}',
+        'description': _text(rng, 80),
+        'genre': genres[index % len(genres)],
+        'created_at': now + timedelta(minutes=index),
+        'updated_at': now + timedelta(minutes=index),
+    } for index in range(params['projects'])])
+    db.session.commit()
+
+    project_ids = [row[0] for row in db.session.execute(
+        db.select(Project.id).order_by(Project.id).limit(params['heavy_projects'])
+    )]
+
+    for project_id in project_ids:
+        seed_planning(project_id, params['ideas'], params['expansions_per_idea'], params['concepts'], rng)
+
+        _insert(Outline, [{
+            'project_id': project_id,
+            'title': f'第{index + 1}章',
+            'content': _text(rng, 2000),
+            'order': index + 1,
+        } for index in range(params['contents'])])
+        # 正文逐条写入，避免一次性在内存中构造全部数据
+        for index in range(params['contents']):
+            _insert(Content, [{
+                'project_id': project_id,
+                'title': f'第{index + 1}章正文',
+                'content': _text(rng, params['content_bytes'] // 3),  # 中文 UTF-8 每字 3 字节
+            }])
+            db.session.commit()
+
+    # 批量写入不触发 ORM 事件，最后统一建立全文搜索索引
+    search.rebuild_index()
+    db.session.commit()
+
+    heavy = project_ids[0]
+    return {
+        'project_id': heavy,
+        'idea_id': db.session.execute(
+            db.select(InitialIdea.id).filter_by(project_id=heavy).order_by(InitialIdea.id)
+        ).scalar(),
+        'expansion_id': db.session.execute(
+            db.select(CreativeExpansion.id).filter_by(project_id=heavy, is_selected=True)
+            .order_by(CreativeExpansion.id)
+        ).scalar(),
+        'concept_id': db.session.execute(
+            db.select(BasicConcept.id).filter_by(project_id=heavy).order_by(BasicConcept.id)
+        ).scalar(),
+        'counts': dict(params),
+    }
@@ -7,10 +7,159 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'app.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    
+
+    # 数据库引擎配置：为空时按连接串选择（sqlite:// 用 sqlite，其他用 server），none 表示不做调整。
+    # SQLALCHEMY_ENGINE_OPTIONS 中显式给出的选项优先于配置中的同名选项
+    DATABASE_ENGINE_PROFILE = os.environ.get('DATABASE_ENGINE_PROFILE') or ''
+    DATABASE_ENGINE_PROFILES = {
+        # 异步视图和后台任务线程并发写入：WAL 下读写互不阻塞，写锁冲突时等待而不是立即报错
+        'sqlite': {
+            'engine_options': {'connect_args': {'timeout': 30}},
+            'pragmas': {
+                'journal_mode': 'WAL',
+                'busy_timeout': 30000,  # 毫秒
+                'synchronous': 'NORMAL',
+                'mmap_size': 256 * 1024 * 1024,
+                'cache_size': -64000,  # 负数单位为 KB
+            },
+        },
+        # PostgreSQL/MySQL 等服务端数据库
+        'server': {
+            'engine_options': {
+                'pool_size': int(os.environ.get('DATABASE_POOL_SIZE') or 10),
+                'max_overflow': int(os.environ.get('DATABASE_MAX_OVERFLOW') or 20),
+                'pool_timeout': 30,
+                'pool_pre_ping': True,
+                'pool_recycle': 1800,  # 秒，早于服务端断开空闲连接
+            },
+        },
+        'none': {},
+    }
+
+    # 长文本压缩（Content.content 和全文构思的文本字段）：zlib、zstd、zstd-dict（zstd 需安装 zstandard）或 none；
+    # 超过 COMPRESSION_THRESHOLD 字节的值压缩存储，COMPRESSION_ZSTD_DICT 为 `flask compress-train-dict` 生成的字典
+    COMPRESSION_CODEC = os.environ.get('COMPRESSION_CODEC') or 'zlib'
+    COMPRESSION_THRESHOLD = 1024
+    COMPRESSION_LEVEL = 6
+    COMPRESSION_ZSTD_DICT = os.environ.get('COMPRESSION_ZSTD_DICT') or None
+
+    # 侧边栏项目列表缓存时间（秒）；本进程内的修改会立即失效，此时间只影响其他进程的修改
+    SIDEBAR_CACHE_TTL = 60
+
+    # 列表页每页条数（键集分页，后续页面滚动加载）
+    LIST_PAGE_SIZE = 20
+
+    # 全文搜索：分词器（unigram 按字切分，jieba 需另行安装）、长文本切片长度（字符）和摘要长度（词）
+    SEARCH_SEGMENTER = os.environ.get('SEARCH_SEGMENTER') or 'unigram'
+    SEARCH_CHUNK_CHARS = 2000
+    SEARCH_SNIPPET_TOKENS = 32
+    SEARCH_RANK_LIMIT = 1000  # 命中片段超过此数时按文档顺序返回，不计算相关度
+
+    # 正文修订历史：每隔多少条修订、或累计差异超过全文的多少比例时保存完整快照；
+    # 合并时 REVISION_COMPACT_AFTER_DAYS 天前的修订每 REVISION_COMPACT_BUCKET_MINUTES 分钟保留一条
+    REVISION_SNAPSHOT_INTERVAL = 50
+    REVISION_SNAPSHOT_RATIO = 0.5
+    REVISION_COMPACT_AFTER_DAYS = 7
+    REVISION_COMPACT_BUCKET_MINUTES = 60
+
+    # 导出书稿时每批查询的大纲节点数（每批的正文同时在内存中）
+    EXPORT_BATCH_SIZE = 50
+
+    # 导入书稿：每 IMPORT_BATCH_SIZE 章或 IMPORT_BATCH_CHARS 个字符批量写入一次；超过 IMPORT_HEADING_MAX_CHARS 的行不识别为标题
+    IMPORT_BATCH_SIZE = 200
+    IMPORT_BATCH_CHARS = 2_000_000
+    IMPORT_HEADING_MAX_CHARS = 50
+
     # 文件上传配置
     UPLOAD_FOLDER = os.path.join(basedir, 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max upload size
+
+    # 素材文件存储：按内容哈希分片保存，相同文件只存一份；大文件用分块上传，
+    # 每块不超过 UPLOAD_CHUNK_SIZE（需小于 MAX_CONTENT_LENGTH），整个文件不超过 MAX_UPLOAD_SIZE
+    BLOB_FOLDER = os.environ.get('BLOB_FOLDER') or os.path.join(basedir, 'uploads', 'blobs')
+    BLOB_READ_SIZE = 64 * 1024  # 写入时每次从请求流读取的字节数
+    UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+    MAX_UPLOAD_SIZE = 1024 * 1024 * 1024
+    UPLOAD_SESSION_TTL_HOURS = 24  # 超过此时间未继续的上传由 `flask blobs-gc` 清理
+    BLOB_GC_GRACE_HOURS = 24  # 没有引用的文件保留此时间后才会被回收
+
+    # 素材文件的读取：URL 含内容哈希，可长期缓存；BLOB_SENDFILE 为 x-accel-redirect（nginx）
+    # 或 x-sendfile（Apache/lighttpd）时由前端服务器发送文件，BLOB_ACCEL_PREFIX 为 nginx 的 internal location
+    BLOB_CACHE_MAX_AGE = 365 * 24 * 3600
+    BLOB_SENDFILE = os.environ.get('BLOB_SENDFILE') or ''
+    BLOB_ACCEL_PREFIX = os.environ.get('BLOB_ACCEL_PREFIX') or '/_blobs/'
+
+    # 素材的缩略图、预览图（最长边像素）和提取的文本，上传后由 DERIVATIVE_WORKERS 个子进程生成；
+    # 图片需要安装 Pillow，PDF 需要安装 PyMuPDF。生成创意时最多附带 DERIVATIVE_PROMPT_CHARS 个字符的素材文本
+    DERIVATIVE_WORKERS = int(os.environ.get('DERIVATIVE_WORKERS') or 2)
+    DERIVATIVE_MAX_TASKS_PER_CHILD = 50
+    DERIVATIVE_THUMB_SIZE = 320
+    DERIVATIVE_PREVIEW_SIZE = 1280
+    DERIVATIVE_IMAGE_FORMAT = 'WEBP'  # WEBP 或 JPEG
+    DERIVATIVE_QUALITY = 80
+    DERIVATIVE_MAX_PIXELS = 100_000_000  # 超过此像素数的图片不处理
+    DERIVATIVE_TEXT_CHARS = 200_000
+    DERIVATIVE_PROMPT_CHARS = 4000
     
+    # AI服务配置
+    AI_SERVICE = os.environ.get('AI_SERVICE') or 'gemini'
+
     # Gemini AI配置
-    GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY') or 'your-gemini-api-key-here'
\ No newline at end of file
+    GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY') or 'your-gemini-api-key-here'
+    GEMINI_MODEL = os.environ.get('GEMINI_MODEL') or 'gemini-2.5-pro'
+    GEMINI_TRANSPORT = os.environ.get('GEMINI_TRANSPORT') or 'grpc'  # grpc 通道长连接复用
+
+    # 本地假AI服务（AI_SERVICE=fake）：不需要密钥，用于离线基准测试和压力测试
+    FAKE_AI_LATENCY = float(os.environ.get('FAKE_AI_LATENCY') or 0.05)  # 每次调用（流式为首段）的延迟（秒）
+    FAKE_AI_CHUNK_SIZE = int(os.environ.get('FAKE_AI_CHUNK_SIZE') or 16)  # 流式输出每段字符数
+    FAKE_AI_CHUNK_INTERVAL = float(os.environ.get('FAKE_AI_CHUNK_INTERVAL') or 0.02)  # 流式输出段间隔（秒）
+    FAKE_AI_ERROR_RATE = float(os.environ.get('FAKE_AI_ERROR_RATE') or 0.0)  # 返回限流错误的比例
+    FAKE_AI_SEED = int(os.environ.get('FAKE_AI_SEED') or 0)
+
+    # AI调用并发配置：每个进程同时进行的模型调用上限
+    AI_MAX_CONCURRENCY = int(os.environ.get('AI_MAX_CONCURRENCY') or 8)
+
+    # 服务商配额：每分钟请求数和 token 数（0 表示不限制），超限或 5xx 时退避重试
+    AI_RATE_LIMIT_RPM = int(os.environ.get('AI_RATE_LIMIT_RPM') or 60)
+    AI_RATE_LIMIT_TPM = int(os.environ.get('AI_RATE_LIMIT_TPM') or 1000000)
+    AI_MAX_RETRIES = 4
+    AI_RETRY_BASE_DELAY = 1.0  # 秒
+    AI_RETRY_MAX_DELAY = 60.0  # 秒
+
+    # 全文构思生成方式：single 一次生成全部字段；sectioned 按字段分组并发生成后合并
+    CONCEPT_GENERATION_MODE = os.environ.get('CONCEPT_GENERATION_MODE') or 'sectioned'
+
+    # 各功能提示词的 token 预算（0 表示不限制），超出时按开头+结尾裁剪上下文
+    AI_PROMPT_BUDGET_DEFAULT = 16000
+    AI_PROMPT_BUDGETS = {
+        'concept': 8000,
+        'creative_ideas': 4000,
+        'basic_concept': 4000,
+        'outline': 8000,
+        'chapter_outline': 12000,
+        'section_outline': 6000,
+        'section_summary': 4000,
+        'section_content': 4000,
+    }
+
+    # AI响应缓存：内存 LRU + SQLite 持久层（多进程共享）
+    AI_CACHE_ENABLED = os.environ.get('AI_CACHE_ENABLED', '1') != '0'
+    AI_CACHE_PATH = os.environ.get('AI_CACHE_PATH') or os.path.join(basedir, 'ai_cache.db')
+    AI_CACHE_TTL = 3600  # 内存层过期时间（秒）
+    AI_CACHE_MEMORY_ENTRIES = 512
+    AI_CACHE_DISK_TTL = 7 * 24 * 3600  # 持久层过期时间（秒）
+    AI_CACHE_DISK_ENTRIES = 20000
+    # 只缓存输入相同即可复用结果的功能；创意类生成每次重试都应得到新结果
+    AI_CACHEABLE_FEATURES = ('outline', 'chapter_outline', 'section_outline', 'section_summary')
+
+    # 整书生成流水线
+    PIPELINE_MAX_CONCURRENCY = int(os.environ.get('PIPELINE_MAX_CONCURRENCY') or 8)  # 同时进行的节点数
+    PIPELINE_DEFAULT_CHAPTERS = 10  # 构思未给出预计章节数时使用
+    PIPELINE_SECTIONS_PER_CHAPTER = 3
+
+    # 后台任务队列：JOB_WORKERS 为 Web 进程内的工作线程数，设为 0 时使用 `flask run-worker` 单独运行
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS') or 2)
+    JOB_POLL_INTERVAL = 1.0  # 秒
+    JOB_DEFAULT_TIMEOUT = 300  # 单次执行超时（秒）
+    JOB_MAX_ATTEMPTS = 3
+    JOB_RETRY_BACKOFF = 5  # 首次重试等待（秒），之后逐次翻倍
@@ -0,0 +1,36 @@
+"""Add outline hierarchy for book generation
+
+Revision ID: 3b7e1c9d2a41
+Revises: f118f9a04bb1
+Create Date: 2025-10-09 10:12:41.208317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7e1c9d2a41'
+down_revision = 'f118f9a04bb1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('outline', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('level', sa.String(length=20), nullable=True))
+        batch_op.add_column(sa.Column('parent_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('basic_concept_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('summary', sa.Text(), nullable=True))
+        batch_op.create_foreign_key('fk_outline_parent_id_outline', 'outline', ['parent_id'], ['id'])
+        batch_op.create_foreign_key('fk_outline_basic_concept_id_basic_concept', 'basic_concept', ['basic_concept_id'], ['id'])
+
+
+def downgrade():
+    with op.batch_alter_table('outline', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_outline_basic_concept_id_basic_concept', type_='foreignkey')
+        batch_op.drop_constraint('fk_outline_parent_id_outline', type_='foreignkey')
+        batch_op.drop_column('summary')
+        batch_op.drop_column('basic_concept_id')
+        batch_op.drop_column('parent_id')
+        batch_op.drop_column('level')
@@ -0,0 +1,58 @@
+"""Add indexes for foreign keys and per-project timelines
+
+Revision ID: 9a4c2e7d5b13
+Revises: 6f2d8e4b1c07
+Create Date: 2025-10-13 11:27:05.319846
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4c2e7d5b13'
+down_revision = '6f2d8e4b1c07'
+branch_labels = None
+depends_on = None
+
+# (索引名, 表, 列)
+INDEXES = [
+    ('ix_initial_idea_project_id_created_at', 'initial_idea', ['project_id', 'created_at']),
+    ('ix_creative_expansion_project_id_initial_idea_id', 'creative_expansion', ['project_id', 'initial_idea_id', 'created_at']),
+    ('ix_creative_expansion_initial_idea_id', 'creative_expansion', ['initial_idea_id']),
+    ('ix_basic_concept_project_id_created_at', 'basic_concept', ['project_id', 'created_at']),
+    ('ix_basic_concept_creative_expansion_id', 'basic_concept', ['creative_expansion_id']),
+    ('ix_setting_project_id_setting_type', 'setting', ['project_id', 'setting_type']),
+    ('ix_outline_project_id', 'outline', ['project_id']),
+    ('ix_outline_parent_id', 'outline', ['parent_id']),
+    ('ix_outline_basic_concept_id', 'outline', ['basic_concept_id']),
+    ('ix_content_project_id', 'content', ['project_id']),
+    ('ix_content_outline_id', 'content', ['outline_id']),
+    # 灵感素材相关的表已在 ca0d5894e827 中删除，仅在表仍然存在时创建
+    ('ix_inspiration_project_id', 'inspiration', ['project_id']),
+    ('ix_inspiration_material_inspiration_id', 'inspiration_material', ['inspiration_id']),
+    ('ix_creative_idea_project_id', 'creative_idea', ['project_id']),
+    ('ix_creative_idea_inspiration_id', 'creative_idea', ['inspiration_id']),
+]
+
+
+def _existing_indexes():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    return tables, {
+        (table, index['name']) for table in tables for index in inspector.get_indexes(table)
+    }
+
+
+def upgrade():
+    tables, existing = _existing_indexes()
+    for name, table, columns in INDEXES:
+        if table in tables and (table, name) not in existing:
+            op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    tables, existing = _existing_indexes()
+    for name, table, _ in reversed(INDEXES):
+        if (table, name) in existing:
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,34 @@
+"""Add thumbnail, preview and extracted text status to inspiration materials
+
+Revision ID: a8e5c1f4b7d2
+Revises: f3b9d2c7e5a1
+Create Date: 2025-10-16 14:21:05.318842
+
+Existing materials keep derivative_status NULL; `flask materials-derivatives`
+generates their thumbnails and text.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8e5c1f4b7d2'
+down_revision = 'f3b9d2c7e5a1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('inspiration_material', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('derivative_status', sa.String(length=20), nullable=True))
+        batch_op.add_column(sa.Column('has_thumbnail', sa.Boolean(), nullable=False, server_default=sa.false()))
+        batch_op.add_column(sa.Column('has_preview', sa.Boolean(), nullable=False, server_default=sa.false()))
+        batch_op.add_column(sa.Column('extracted_text', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('inspiration_material', schema=None) as batch_op:
+        batch_op.drop_column('extracted_text')
+        batch_op.drop_column('has_preview')
+        batch_op.drop_column('has_thumbnail')
+        batch_op.drop_column('derivative_status')
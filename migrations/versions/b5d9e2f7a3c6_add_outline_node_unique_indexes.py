@@ -0,0 +1,59 @@
+"""Make generated outline nodes unique
+
+Revision ID: b5d9e2f7a3c6
+Revises: a8e5c1f4b7d2
+Create Date: 2025-10-17 10:12:44.906215
+
+Concurrent pipeline runs could insert the same chapter or section twice. Existing
+duplicates keep their content: every copy except the oldest loses its level and
+becomes an ordinary (manual) outline, which the unique indexes do not cover.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d9e2f7a3c6'
+down_revision = 'a8e5c1f4b7d2'
+branch_labels = None
+depends_on = None
+
+# (索引名, 列)
+INDEXES = [
+    ('uq_outline_parent_id_level_order', ['parent_id', 'level', 'order']),
+    ('uq_outline_basic_concept_id_level', ['basic_concept_id', 'level']),
+]
+
+
+outline = sa.table(
+    'outline',
+    sa.column('id', sa.Integer), sa.column('level', sa.String), sa.column('parent_id', sa.Integer),
+    sa.column('order', sa.Integer), sa.column('basic_concept_id', sa.Integer),
+)
+
+
+def _release_duplicates(columns):
+    """同一唯一键的多个节点只保留最早的一个，其余清空 level"""
+    keys = [outline.c[column] for column in columns]
+    not_null = [key.isnot(None) for key in keys]
+    # 子查询包一层派生表，MySQL 才允许在 UPDATE 中读取同一张表
+    keep = sa.select(sa.func.min(outline.c.id).label('keep_id')).where(*not_null).group_by(*keys).subquery('keep')
+    op.execute(
+        outline.update()
+        .where(*not_null, outline.c.id.not_in(sa.select(keep.c.keep_id)))
+        .values(level=None)
+    )
+
+
+def upgrade():
+    for _, columns in INDEXES:
+        _release_duplicates(columns)
+    with op.batch_alter_table('outline', schema=None) as batch_op:
+        for name, columns in INDEXES:
+            batch_op.create_index(name, columns, unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('outline', schema=None) as batch_op:
+        for name, _ in reversed(INDEXES):
+            batch_op.drop_index(name)
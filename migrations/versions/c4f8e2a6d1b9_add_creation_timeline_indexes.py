@@ -0,0 +1,44 @@
+"""Add timeline indexes for creation lists
+
+Revision ID: c4f8e2a6d1b9
+Revises: b7e3f1a9c2d4
+Create Date: 2025-10-14 16:05:51.771203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4f8e2a6d1b9'
+down_revision = 'b7e3f1a9c2d4'
+branch_labels = None
+depends_on = None
+
+# (索引名, 表, 列)；灵感素材相关的表已在 ca0d5894e827 中删除，仅在表仍然存在时创建
+INDEXES = [
+    ('ix_inspiration_project_id_created_at', 'inspiration', ['project_id', 'created_at']),
+    ('ix_creative_idea_project_id_created_at', 'creative_idea', ['project_id', 'created_at']),
+]
+
+
+def _existing_indexes():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    return tables, {
+        (table, index['name']) for table in tables for index in inspector.get_indexes(table)
+    }
+
+
+def upgrade():
+    tables, existing = _existing_indexes()
+    for name, table, columns in INDEXES:
+        if table in tables and (table, name) not in existing:
+            op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    tables, existing = _existing_indexes()
+    for name, table, _ in reversed(INDEXES):
+        if (table, name) in existing:
+            op.drop_index(name, table_name=table)
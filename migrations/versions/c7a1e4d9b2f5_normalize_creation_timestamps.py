@@ -0,0 +1,38 @@
+"""Normalize inspiration and creative idea timestamps
+
+Revision ID: c7a1e4d9b2f5
+Revises: b5d9e2f7a3c6
+Create Date: 2025-10-17 15:40:12.528193
+
+created_at used to default to CURRENT_TIMESTAMP, which SQLite stores as
+'YYYY-MM-DD HH:MM:SS' while SQLAlchemy binds '... HH:MM:SS.ffffff'. SQLite
+compares the two as strings, so keyset pagination cursors never moved past rows
+created within the same second. The default is now datetime.utcnow; existing rows
+get the fractional part appended so every value uses the same format.
+Other databases store native timestamps and need no change.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7a1e4d9b2f5'
+down_revision = 'b5d9e2f7a3c6'
+branch_labels = None
+depends_on = None
+
+TABLES = ['inspiration', 'creative_idea']
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for table in TABLES:
+        op.execute(sa.text(
+            f"UPDATE {table} SET created_at = created_at || '.000000' WHERE length(created_at) = 19"
+        ))
+
+
+def downgrade():
+    # 带微秒的格式旧代码同样可以读取，无需还原
+    pass
@@ -0,0 +1,69 @@
+"""Compress large text columns
+
+Revision ID: d1a7b3e5f802
+Revises: c4f8e2a6d1b9
+Create Date: 2025-10-15 10:12:37.402958
+
+Existing content.content and basic_concept text values above the configured
+threshold are rewritten in compressed form (see app/models/types.py), in
+batches ordered by id. The column types are unchanged: compressed values are
+stored as BLOBs next to plain TEXT values. The database file only shrinks
+after a VACUUM.
+"""
+from alembic import op
+
+from app.models.types import convert_rows
+
+
+# revision identifiers, used by Alembic.
+revision = 'd1a7b3e5f802'
+down_revision = 'c4f8e2a6d1b9'
+branch_labels = None
+depends_on = None
+
+COLUMNS = {
+    'content': ['content'],
+    'basic_concept': [
+        'world_setting',
+        'culture_background',
+        'special_elements',
+        'core_conflict',
+        'plot_outline',
+        'subplot_design',
+        'key_events',
+        'plot_progression',
+        'main_characters',
+        'supporting_characters',
+        'character_relationships',
+        'character_arcs',
+        'theme_design',
+        'philosophical_elements',
+        'social_commentary',
+        'symbolic_system',
+        'narrative_perspective',
+        'timeline_structure',
+        'pacing_design',
+        'foreshadowing',
+        'writing_style',
+        'language_features',
+        'atmosphere_building',
+        'literary_devices',
+        'chapter_structure',
+        'volume_planning',
+    ],
+}
+
+
+def upgrade():
+    # 压缩只在 SQLite 上启用
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for table, columns in COLUMNS.items():
+        convert_rows(op.get_bind(), table, columns, compressed=True)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for table, columns in COLUMNS.items():
+        convert_rows(op.get_bind(), table, columns, compressed=False)
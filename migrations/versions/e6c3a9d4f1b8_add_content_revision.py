@@ -0,0 +1,43 @@
+"""Add content revision history
+
+Revision ID: e6c3a9d4f1b8
+Revises: d1a7b3e5f802
+Create Date: 2025-10-15 15:27:09.318640
+
+Existing contents get their first revision (a snapshot of the current text)
+the next time they are saved.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6c3a9d4f1b8'
+down_revision = 'd1a7b3e5f802'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('content_revision',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('content_id', sa.Integer(), nullable=False),
+    sa.Column('number', sa.Integer(), nullable=False),
+    sa.Column('is_snapshot', sa.Boolean(), nullable=False),
+    sa.Column('snapshot_number', sa.Integer(), nullable=False),
+    sa.Column('data', sa.Text(), nullable=False),
+    sa.Column('delta_chars', sa.Integer(), nullable=False),
+    sa.Column('length', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['content_id'], ['content.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('content_id', 'number', name='uq_content_revision_content_id_number')
+    )
+    with op.batch_alter_table('content_revision', schema=None) as batch_op:
+        batch_op.create_index('ix_content_revision_content_id_created_at', ['content_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('content_revision', schema=None) as batch_op:
+        batch_op.drop_index('ix_content_revision_content_id_created_at')
+    op.drop_table('content_revision')
@@ -0,0 +1,125 @@
+"""Add content-addressed blob store for inspiration materials
+
+Revision ID: f3b9d2c7e5a1
+Revises: e6c3a9d4f1b8
+Create Date: 2025-10-16 09:48:22.640175
+
+The creation pages (inspirations, creative ideas) are served again, so their
+tables are recreated when ca0d5894e827 has dropped them. Existing files in
+UPLOAD_FOLDER keep working; `flask blobs-import-legacy` moves them into the
+blob store.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b9d2c7e5a1'
+down_revision = 'e6c3a9d4f1b8'
+branch_labels = None
+depends_on = None
+
+
+def _create_creation_tables(tables):
+    if 'inspiration' not in tables:
+        op.create_table('inspiration',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=True),
+        sa.Column('source_type', sa.String(length=50), nullable=True),
+        sa.Column('tags', sa.String(length=200), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['project_id'], ['project.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('inspiration', schema=None) as batch_op:
+            batch_op.create_index('ix_inspiration_project_id', ['project_id'], unique=False)
+            batch_op.create_index('ix_inspiration_project_id_created_at', ['project_id', 'created_at'], unique=False)
+
+    if 'creative_idea' not in tables:
+        op.create_table('creative_idea',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('inspiration_id', sa.Integer(), nullable=True),
+        sa.Column('summary', sa.Text(), nullable=True),
+        sa.Column('genre', sa.String(length=50), nullable=True),
+        sa.Column('theme', sa.String(length=200), nullable=True),
+        sa.Column('innovation_points', sa.Text(), nullable=True),
+        sa.Column('score', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['inspiration_id'], ['inspiration.id'], ),
+        sa.ForeignKeyConstraint(['project_id'], ['project.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('creative_idea', schema=None) as batch_op:
+            batch_op.create_index('ix_creative_idea_project_id', ['project_id'], unique=False)
+            batch_op.create_index('ix_creative_idea_inspiration_id', ['inspiration_id'], unique=False)
+            batch_op.create_index('ix_creative_idea_project_id_created_at', ['project_id', 'created_at'], unique=False)
+
+    if 'inspiration_material' not in tables:
+        op.create_table('inspiration_material',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('inspiration_id', sa.Integer(), nullable=False),
+        sa.Column('file_path', sa.String(length=500), nullable=True),
+        sa.Column('file_type', sa.String(length=50), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['inspiration_id'], ['inspiration.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('inspiration_material', schema=None) as batch_op:
+            batch_op.create_index('ix_inspiration_material_inspiration_id', ['inspiration_id'], unique=False)
+
+
+def upgrade():
+    op.create_table('blob',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('content_type', sa.String(length=100), nullable=True),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('sha256')
+    )
+    with op.batch_alter_table('blob', schema=None) as batch_op:
+        batch_op.create_index('ix_blob_ref_count_created_at', ['ref_count', 'created_at'], unique=False)
+
+    op.create_table('upload_session',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=True),
+    sa.Column('content_type', sa.String(length=100), nullable=True),
+    sa.Column('size', sa.BigInteger(), nullable=True),
+    sa.Column('received', sa.BigInteger(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['project_id'], ['project.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('upload_session', schema=None) as batch_op:
+        batch_op.create_index('ix_upload_session_updated_at', ['updated_at'], unique=False)
+
+    _create_creation_tables(set(sa.inspect(op.get_bind()).get_table_names()))
+
+    with op.batch_alter_table('inspiration_material', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('blob_id', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_inspiration_material_blob_id', ['blob_id'], unique=False)
+        batch_op.create_foreign_key('fk_inspiration_material_blob_id_blob', 'blob', ['blob_id'], ['id'])
+
+
+def downgrade():
+    # 创作页面的表可能保存了数据，降级时保留，只去掉文件存储相关的部分
+    with op.batch_alter_table('inspiration_material', schema=None) as batch_op:
+        batch_op.drop_index('ix_inspiration_material_blob_id')
+        batch_op.drop_column('blob_id')
+
+    with op.batch_alter_table('upload_session', schema=None) as batch_op:
+        batch_op.drop_index('ix_upload_session_updated_at')
+    op.drop_table('upload_session')
+
+    with op.batch_alter_table('blob', schema=None) as batch_op:
+        batch_op.drop_index('ix_blob_ref_count_created_at')
+    op.drop_table('blob')
@@ -13,8 +13,8 @@ def init_db():
         db.create_all()
 
 if __name__ == '__main__':
-    # 检查必要的环境变量
-    if not os.environ.get('GEMINI_API_KEY'):
+    # 检查必要的环境变量（本地假AI服务不需要密钥）
+    if os.environ.get('AI_SERVICE', 'gemini') == 'gemini' and not os.environ.get('GEMINI_API_KEY'):
         print("错误：未设置 GEMINI_API_KEY 环境变量")
         print("请在 .env 文件中添加你的 Gemini API 密钥")
         exit(1)